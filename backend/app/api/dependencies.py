@@ -0,0 +1,41 @@
+"""ルートで使うサービスの取得（FastAPIの依存性注入）
+
+サービスはモジュールのインポート時ではなく、lifespanの起動処理または最初の利用時に
+プロセスごとに1つだけ作成する。外部APIのSDK（openai・google-cloud-speech）の読み込みと
+クライアントの作成は各サービスのstart()でスレッド上で行う。
+"""
+from functools import lru_cache
+
+from app.core.metrics import metrics
+from app.services.openai_service import OpenAIService
+from app.services.google_cloud_service import GoogleCloudService
+from app.services.session_store import SessionStore, create_session_store
+
+
+@lru_cache(maxsize=None)
+def get_openai_service() -> OpenAIService:
+    service = OpenAIService()
+    # 統計情報を/metricsにも出力する
+    metrics.register_stats("prompt_registry", service.prompts.stats)
+    metrics.register_stats("history_compactor", service.history_compactor.stats)
+    if service.tts_cache is not None:
+        metrics.register_stats("tts_cache", service.tts_cache.stats)
+    if service.result_cache is not None:
+        metrics.register_stats("result_cache", service.result_cache.stats)
+    return service
+
+
+@lru_cache(maxsize=None)
+def get_google_cloud_service() -> GoogleCloudService:
+    service = GoogleCloudService()
+    metrics.register_stats("stt", service.stats)
+    if service.preprocessor is not None:
+        metrics.register_stats("stt_preprocess", service.preprocessor.stats)
+    return service
+
+
+@lru_cache(maxsize=None)
+def get_session_store() -> SessionStore:
+    store = create_session_store()
+    metrics.register_stats("sessions", store.stats)
+    return store
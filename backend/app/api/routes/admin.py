@@ -0,0 +1,77 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from app.api.dependencies import get_google_cloud_service, get_openai_service, get_session_store
+from app.core.access_log import access_log_writer
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics
+from app.services.google_cloud_service import GoogleCloudService
+from app.services.openai_service import OpenAIService
+from app.services.session_store import SessionStore
+
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """X-Admin-TokenヘッダーをADMIN_API_TOKENと照合する
+
+    スタックトレースなど内部情報を返すため、ADMIN_API_TOKENが未設定の場合は存在しないものとして404を返す。
+    """
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_admin_token or "", settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="管理用トークンが正しくありません")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(verify_admin_token)])
+
+# イベントループの遅延・ブロッキング回数を/metricsにも出力する
+metrics.register_stats("loop_monitor", loop_monitor.stats)
+
+@router.get('/loop-monitor')
+async def get_loop_monitor(reset: bool = Query(False)):
+    """イベントループの遅延統計と、直近のブロッキング（スタックトレース付き）を返す
+
+    reset=trueの場合は返した後に統計と記録を消去する。
+    """
+    result = {**loop_monitor.stats(), "blocking_events": loop_monitor.events()}
+    if reset:
+        loop_monitor.reset()
+    return result
+
+@router.get('/tts-cache')
+async def get_tts_cache_stats(openai_service: OpenAIService = Depends(get_openai_service)):
+    """音声合成キャッシュの統計情報（ヒット率・節約バイト数・追い出し件数）を返す"""
+    if openai_service.tts_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.tts_cache.stats()}
+
+@router.get('/result-cache')
+async def get_result_cache_stats(openai_service: OpenAIService = Depends(get_openai_service)):
+    """評価・詳細フィードバック結果キャッシュの統計情報（ヒット率・共有件数・追い出し件数）を返す"""
+    if openai_service.result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.result_cache.stats()}
+
+@router.get('/stt')
+async def get_speech_to_text_stats(google_cloud_service: GoogleCloudService = Depends(get_google_cloud_service)):
+    """音声認識の同時実行数・キュー深度などの統計情報を返す"""
+    return google_cloud_service.stats()
+
+@router.get('/stt-preprocess')
+async def get_speech_to_text_preprocess_stats(google_cloud_service: GoogleCloudService = Depends(get_google_cloud_service)):
+    """音声の前処理（無音除去・変換）の件数・削減したバイト数などの統計情報を返す"""
+    if google_cloud_service.preprocessor is None:
+        return {"enabled": False}
+    return {"enabled": True, **google_cloud_service.preprocessor.stats()}
+
+@router.get('/sessions')
+async def get_session_stats(session_store: SessionStore = Depends(get_session_store)):
+    """セッションストアの統計情報を返す"""
+    return session_store.stats()
+
+@router.get('/access-log')
+async def get_access_log_stats():
+    """アクセスログ書き込みの統計情報（破棄件数・キュー深度など）を返す"""
+    return access_log_writer.stats()
@@ -1,30 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Query, File, UploadFile, Request
-from fastapi.responses import Response
-from typing import Dict, List, Any, Optional
+import json
+import math
+import contextlib
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, File, UploadFile, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, List, Any, Optional, AsyncIterator
 from pydantic import BaseModel
 
-from app.schemas.interview import InterviewQuestionRequest, InterviewQuestionResponse, MessageHistory, TextToSpeechRequest, InterviewEvaluationRequest, InterviewEvaluationResponse, DetailedFeedbackRequest, DetailedFeedbackResponse, FeedbackQA, FeedbackEvaluation, SpeechToTextRequest, SpeechToTextResponse
+from app.schemas.interview import InterviewQuestionRequest, InterviewQuestionResponse, MessageHistory, TextToSpeechRequest, InterviewEvaluationRequest, InterviewEvaluationResponse, DetailedFeedbackRequest, DetailedFeedbackResponse, FeedbackQA, FeedbackEvaluation, SpeechToTextRequest, SpeechToTextResponse, SessionCreateRequest, SessionCreateResponse, SessionTurnRequest, SessionEvaluationRequest
+from app.api.dependencies import get_openai_service, get_google_cloud_service, get_session_store
 from app.services.openai_service import OpenAIService
 from app.services.google_cloud_service import GoogleCloudService
-from app.core.logger import setup_logger
-from app.core.config import InterviewMode
+from app.services.session_store import SessionStore
+from app.services.rate_limiter import UpstreamRateLimitError, openai_scheduler
+from app.core.logger import log_payload
+from app.core.config import InterviewMode, settings
+from app.core.metrics import metrics
+from app.core.tracing import tracer, traced
 
 router = APIRouter(prefix="/api/interview", tags=["interview"])
-openai_service = OpenAIService()
-google_cloud_service = GoogleCloudService()
-logger = setup_logger()
+logger = logging.getLogger(__name__)
+
+# 統計情報を/metricsにも出力する（各サービスの統計はapp.api.dependenciesで登録する）
+metrics.register_stats("tracing", tracer.stats)
+metrics.register_stats("openai_scheduler", openai_scheduler.stats)
 
 # リクエストのためのスキーマ
 class GeneralQuestionRequest(BaseModel):
     message_history: List[Dict[str, str]] = []
 
+def _rate_limited(error: UpstreamRateLimitError) -> HTTPException:
+    """外部APIのレート制限を503（Retry-After付き）に変換する"""
+    logger.warning(f"レート制限のため503を返します（Retry-After: {error.retry_after}秒）: {str(error)}")
+    retry_after = max(1, math.ceil(error.retry_after or 1))
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(retry_after)})
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events形式のメッセージに変換する"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _sse_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """イベントの非同期イテレータをSSEのStreamingResponseとして返す
+    
+    最初のイベントまで待ってからレスポンスを開始するため、生成開始前のエラーは呼び出し元で
+    HTTPExceptionとして扱える。開始後のエラーはerrorイベントとして送信する。
+    """
+    try:
+        first_event = await events.__anext__()
+    except StopAsyncIteration:
+        first_event = None
+    
+    async def body():
+        try:
+            if first_event is not None:
+                yield _format_sse(first_event["event"], first_event["data"])
+            async for item in events:
+                yield _format_sse(item["event"], item["data"])
+        except Exception as e:
+            logger.error(f"ストリーミング中にエラーが発生しました: {str(e)}", exc_info=True)
+            yield _format_sse("error", {"error": str(e)})
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/")
 async def get_interview_info():
     return {"message": "面接情報API"}
 
-@router.post("/questions/general", response_model=InterviewQuestionResponse)
-async def generate_general_question(request: GeneralQuestionRequest = Body(...)):
-    """汎用的な面接質問を生成する"""
+@router.post("/questions/general", response_model=InterviewQuestionResponse, deprecated=True)
+@traced("interview.generate_general_question")
+async def generate_general_question(request: GeneralQuestionRequest = Body(...), openai_service: OpenAIService = Depends(get_openai_service)):
+    """汎用的な面接質問を生成する（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
     try:
         logger.info(f"汎用質問生成リクエスト: message_history={len(request.message_history)}件")
         
@@ -39,15 +90,19 @@ async def generate_general_question(request: GeneralQuestionRequest = Body(...))
         logger.info(f"生成された質問: {question}")
         
         return {"question": question}
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
         logger.error(f"質問生成エラー: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/questions/personalized", response_model=InterviewQuestionResponse)
+@router.post("/questions/personalized", response_model=InterviewQuestionResponse, deprecated=True)
+@traced("interview.generate_personalized_question")
 async def generate_personalized_question(
-    request: InterviewQuestionRequest = Body(...)
+    request: InterviewQuestionRequest = Body(...),
+    openai_service: OpenAIService = Depends(get_openai_service)
 ):
-    """履歴書と求人情報に基づいてパーソナライズされた質問を生成する"""
+    """履歴書と求人情報に基づいてパーソナライズされた質問を生成する（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
     try:
         logger.info(f"パーソナライズド質問生成リクエスト: resume={len(request.resume or '')}文字, job_description={len(request.job_description or '')}文字")
         
@@ -59,15 +114,149 @@ async def generate_personalized_question(
         logger.info(f"生成された質問: {question}")
         
         return {"question": question}
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
         logger.error(f"質問生成エラー: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/questions/general/stream", deprecated=True)
+@traced("interview.stream_general_question")
+async def stream_general_question(request: GeneralQuestionRequest = Body(...), openai_service: OpenAIService = Depends(get_openai_service)):
+    """汎用的な面接質問をSSEでストリーミング生成する（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
+    try:
+        logger.info(f"汎用質問ストリーミング生成リクエスト: message_history={len(request.message_history)}件")
+        
+        interview_request = InterviewQuestionRequest(
+            mode=InterviewMode.GENERAL, 
+            message_history=request.message_history
+        )
+        
+        return await _sse_response(openai_service.stream_interview_question(interview_request))
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"質問生成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/questions/personalized/stream", deprecated=True)
+@traced("interview.stream_personalized_question")
+async def stream_personalized_question(
+    request: InterviewQuestionRequest = Body(...),
+    openai_service: OpenAIService = Depends(get_openai_service)
+):
+    """履歴書と求人情報に基づいてパーソナライズされた質問をSSEでストリーミング生成する（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
+    try:
+        logger.info(f"パーソナライズド質問ストリーミング生成リクエスト: resume={len(request.resume or '')}文字, job_description={len(request.job_description or '')}文字")
+        
+        # モードを強制的にPERSONALIZEDに設定
+        request.mode = InterviewMode.PERSONALIZED
+        
+        return await _sse_response(openai_service.stream_interview_question(request))
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"質問生成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/questions/general/speech", deprecated=True)
+@traced("interview.generate_general_question_with_speech")
+async def generate_general_question_with_speech(
+    request: GeneralQuestionRequest = Body(...),
+    voice: Optional[str] = Query(None),
+    openai_service: OpenAIService = Depends(get_openai_service)
+):
+    """汎用的な面接質問の生成と音声合成を1リクエストでパイプライン実行し、SSEで返す（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
+    try:
+        logger.info(f"汎用質問＋音声生成リクエスト: message_history={len(request.message_history)}件, voice={voice}")
+        
+        interview_request = InterviewQuestionRequest(
+            mode=InterviewMode.GENERAL, 
+            message_history=request.message_history
+        )
+        
+        return await _sse_response(openai_service.stream_interview_question_with_speech(interview_request, voice=voice))
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"質問＋音声生成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/questions/personalized/speech", deprecated=True)
+@traced("interview.generate_personalized_question_with_speech")
+async def generate_personalized_question_with_speech(
+    request: InterviewQuestionRequest = Body(...),
+    voice: Optional[str] = Query(None),
+    openai_service: OpenAIService = Depends(get_openai_service)
+):
+    """パーソナライズされた面接質問の生成と音声合成を1リクエストでパイプライン実行し、SSEで返す（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
+    try:
+        logger.info(f"パーソナライズド質問＋音声生成リクエスト: resume={len(request.resume or '')}文字, job_description={len(request.job_description or '')}文字, voice={voice}")
+        
+        # モードを強制的にPERSONALIZEDに設定
+        request.mode = InterviewMode.PERSONALIZED
+        
+        return await _sse_response(openai_service.stream_interview_question_with_speech(request, voice=voice))
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"質問＋音声生成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 音声合成の出力形式（OPENAI_TTS_RESPONSE_FORMAT）ごとのContent-Type
+TTS_MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "pcm": "audio/pcm",
+}
+
+def _speech_media_type() -> str:
+    """音声合成の出力形式に対応するContent-Typeを返す"""
+    return TTS_MEDIA_TYPES.get(settings.OPENAI_TTS_RESPONSE_FORMAT, "application/octet-stream")
+
+def _speech_headers() -> Dict[str, str]:
+    """出力形式の拡張子を付けたファイル名でContent-Dispositionを返す"""
+    return {"Content-Disposition": f"attachment; filename=speech.{settings.OPENAI_TTS_RESPONSE_FORMAT}"}
+
 @router.post("/text-to-speech")
-async def text_to_speech(request: TextToSpeechRequest):
-    """テキストから音声を生成する"""
+@traced("interview.text_to_speech")
+async def text_to_speech(request: TextToSpeechRequest, stream: Optional[bool] = Query(None), openai_service: OpenAIService = Depends(get_openai_service)):
+    """テキストから音声を生成する
+    
+    stream=trueの場合は、生成された音声チャンクを到着順にStreamingResponseで返す。
+    """
     try:
-        logger.info(f"音声合成リクエスト: text長={len(request.text)}文字, voice={request.voice}")
+        use_streaming = settings.OPENAI_TTS_STREAMING if stream is None else stream
+        logger.info(f"音声合成リクエスト: text長={len(request.text)}文字, voice={request.voice}, stream={use_streaming}")
+        
+        if use_streaming:
+            audio_stream = openai_service.stream_text_to_speech(
+                text=request.text,
+                voice=request.voice
+            )
+            # 最初のチャンクまで待ち、上流のエラーはHTTP 500として返す
+            try:
+                first_chunk = await audio_stream.__anext__()
+            except StopAsyncIteration:
+                first_chunk = b""
+            
+            async def audio_body():
+                try:
+                    if first_chunk:
+                        yield first_chunk
+                    async for chunk in audio_stream:
+                        yield chunk
+                finally:
+                    await audio_stream.aclose()
+            
+            return StreamingResponse(
+                audio_body(),
+                media_type=_speech_media_type(),
+                headers=_speech_headers()
+            )
         
         # OpenAI APIを使用して音声を生成
         audio_data = await openai_service.text_to_speech(
@@ -79,21 +268,25 @@ async def text_to_speech(request: TextToSpeechRequest):
         logger.info(f"音声合成完了: サイズ={len(audio_data)}バイト")
         return Response(
             content=audio_data,
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=speech.mp3"}
+            media_type=_speech_media_type(),
+            headers=_speech_headers()
         )
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
         logger.error(f"音声合成エラー: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/speech-to-text", response_model=SpeechToTextResponse)
-async def speech_to_text(request: Request, language: str = Query("en-US")):
+@traced("interview.speech_to_text")
+async def speech_to_text(request: Request, language: str = Query("en-US"), google_cloud_service: GoogleCloudService = Depends(get_google_cloud_service)):
     """音声データをテキストに変換する"""
     try:
         logger.info(f"音声認識リクエスト: language={language}")
         
         # リクエストボディから音声データを読み込む
-        audio_content = await request.body()
+        with tracer.span("request.read_body"):
+            audio_content = await request.body()
         
         if not audio_content:
             logger.error("音声データが空です")
@@ -116,9 +309,64 @@ async def speech_to_text(request: Request, language: str = Query("en-US")):
         logger.error(f"音声認識エラー: {str(e)}", exc_info=True)
         return SpeechToTextResponse(transcript="", error=str(e))
 
-@router.post("/evaluation", response_model=InterviewEvaluationResponse)
-async def evaluate_interview(request: InterviewEvaluationRequest):
-    """面接の対話履歴を評価する"""
+@router.websocket("/speech-to-text/stream")
+async def speech_to_text_stream(websocket: WebSocket, language: str = Query("en-US"), google_cloud_service: GoogleCloudService = Depends(get_google_cloud_service)):
+    """WebSocketで音声チャンクを受け取りながらストリーミング音声認識を行う
+    
+    クライアントはWEBM/Opusの音声チャンクをバイナリメッセージで送信し、
+    話し終えたら {"type": "end"} を送信する。
+    サーバーは {"type": "interim" | "final", "transcript": ...} を逐次返し、
+    最後に {"type": "complete", "transcript": 確定テキスト全体} を返して接続を閉じる。
+    """
+    await websocket.accept()
+    logger.info(f"ストリーミング音声認識接続: language={language}")
+    
+    async def audio_chunks():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                yield message["bytes"]
+            elif message.get("text"):
+                try:
+                    if json.loads(message["text"]).get("type") == "end":
+                        return
+                except (ValueError, AttributeError):
+                    logger.warning(f"不正なテキストメッセージを無視しました: {message['text'][:100]}")
+    
+    final_transcripts = []
+    try:
+        # 送信失敗などでループを抜けた場合も、その場でセッション数・gRPCストリームを解放する
+        async with contextlib.aclosing(
+            google_cloud_service.streaming_speech_to_text(audio_chunks(), language_code=language)
+        ) as results:
+            async for result in results:
+                if result["is_final"]:
+                    final_transcripts.append(result["transcript"].strip())
+                await websocket.send_json({
+                    "type": "final" if result["is_final"] else "interim",
+                    "transcript": result["transcript"]
+                })
+        
+        transcript = " ".join(t for t in final_transcripts if t)
+        logger.info(f"ストリーミング音声認識完了: テキスト長={len(transcript)}文字")
+        await websocket.send_json({"type": "complete", "transcript": transcript})
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("ストリーミング音声認識: クライアントが切断しました")
+    except Exception as e:
+        logger.error(f"ストリーミング音声認識エラー: {str(e)}", exc_info=True)
+        try:
+            await websocket.send_json({"type": "error", "error": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+
+@router.post("/evaluation", response_model=InterviewEvaluationResponse, deprecated=True)
+@traced("interview.evaluate_interview")
+async def evaluate_interview(request: InterviewEvaluationRequest, openai_service: OpenAIService = Depends(get_openai_service)):
+    """面接の対話履歴を評価する（旧方式: 毎回対話履歴の全体を送信する。クライアントは/sessionsを使う）"""
     try:
         logger.info(f"面接評価リクエスト: message_history={len(request.message_history)}件, language={request.language}")
         
@@ -127,15 +375,18 @@ async def evaluate_interview(request: InterviewEvaluationRequest):
             request.message_history,
             language=request.language
         )
-        logger.info(f"生成された評価: {evaluation}")
+        log_payload(logger, "生成された評価", evaluation)
         
         return evaluation
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
         logger.error(f"面接評価エラー: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/detailed-feedback", response_model=DetailedFeedbackResponse)
-async def get_detailed_feedback(request: DetailedFeedbackRequest):
+@traced("interview.get_detailed_feedback")
+async def get_detailed_feedback(request: DetailedFeedbackRequest, openai_service: OpenAIService = Depends(get_openai_service)):
     """面接のQAペアごとに詳細なフィードバックを生成する"""
     try:
         logger.info(f"詳細フィードバックリクエスト: qa_count={len(request.qa_list)}件, max_feedback_count={request.max_feedback_count}, language={request.language}")
@@ -153,6 +404,136 @@ async def get_detailed_feedback(request: DetailedFeedbackRequest):
         logger.info(f"生成された詳細フィードバック数: {sum(1 for f in feedbacks if f is not None)}/{len(feedbacks)}")
         
         return DetailedFeedbackResponse(feedbacks=feedbacks)
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
     except Exception as e:
         logger.error(f"詳細フィードバック生成エラー: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sessions", response_model=SessionCreateResponse)
+@traced("interview.create_session")
+async def create_session(request: SessionCreateRequest, session_store: SessionStore = Depends(get_session_store)):
+    """面接セッションを作成する（以降は新しいターンのみを送信すればよい）"""
+    try:
+        session_id = await session_store.create({
+            "mode": request.mode.value,
+            "resume": request.resume,
+            "job_description": request.job_description
+        })
+        logger.info(f"面接セッション作成: session_id={session_id}, mode={request.mode.value}")
+        return SessionCreateResponse(session_id=session_id)
+    except Exception as e:
+        logger.error(f"面接セッション作成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _session_question_request(session: Dict[str, Any], new_messages: List[Dict[str, Any]]) -> InterviewQuestionRequest:
+    """セッションのメタデータと保存済みの履歴に新しいターンを加えた質問生成リクエストを作成する"""
+    metadata = session["metadata"]
+    # 保存済みの履歴はサーバー側のデータのため再検証せずに使う
+    return InterviewQuestionRequest.model_construct(
+        mode=InterviewMode(metadata.get("mode", InterviewMode.GENERAL.value)),
+        resume=metadata.get("resume"),
+        job_description=metadata.get("job_description"),
+        message_history=session["history"] + new_messages,
+        custom_params=None
+    )
+
+@router.post("/sessions/{session_id}/questions", response_model=InterviewQuestionResponse)
+@traced("interview.generate_session_question")
+async def generate_session_question(session_id: str, request: SessionTurnRequest = Body(...), openai_service: OpenAIService = Depends(get_openai_service), session_store: SessionStore = Depends(get_session_store)):
+    """保存済みの対話履歴に新しいターンを追加して次の質問を生成する"""
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="セッションが見つかりません")
+    
+    try:
+        new_messages = [msg.model_dump() for msg in request.messages]
+        logger.info(f"セッション質問生成リクエスト: session_id={session_id}, 保存済み履歴={len(session['history'])}件, 追加={len(new_messages)}件")
+        
+        interview_request = _session_question_request(session, new_messages)
+        question = await openai_service.generate_interview_question(interview_request, session_id=session_id)
+        logger.info(f"生成された質問: {question}")
+        
+        # 生成に成功した場合のみ、新しいターンと質問を履歴に追加する
+        await session_store.append(session_id, new_messages + [{"role": "assistant", "content": question}])
+        
+        return {"question": question}
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"質問生成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sessions/{session_id}/questions/speech")
+@traced("interview.generate_session_question_with_speech")
+async def generate_session_question_with_speech(
+    session_id: str,
+    request: SessionTurnRequest = Body(...),
+    voice: Optional[str] = Query(None),
+    openai_service: OpenAIService = Depends(get_openai_service),
+    session_store: SessionStore = Depends(get_session_store)
+):
+    """保存済みの対話履歴に新しいターンを追加し、次の質問の生成と音声合成をSSEで返す"""
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="セッションが見つかりません")
+    
+    try:
+        new_messages = [msg.model_dump() for msg in request.messages]
+        logger.info(f"セッション質問＋音声生成リクエスト: session_id={session_id}, 保存済み履歴={len(session['history'])}件, 追加={len(new_messages)}件, voice={voice}")
+        
+        stream = openai_service.stream_interview_question_with_speech(
+            _session_question_request(session, new_messages), voice=voice, session_id=session_id
+        )
+        
+        async def events():
+            try:
+                async for item in stream:
+                    if item["event"] == "done":
+                        # 質問の生成が完了した時点で、新しいターンと質問を履歴に追加する（音声は履歴に含めない）
+                        await session_store.append(
+                            session_id, new_messages + [{"role": "assistant", "content": item["data"]["question"]}]
+                        )
+                    yield item
+            finally:
+                await stream.aclose()
+        
+        return await _sse_response(events())
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"質問＋音声生成エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sessions/{session_id}/evaluation", response_model=InterviewEvaluationResponse)
+@traced("interview.evaluate_session")
+async def evaluate_session(session_id: str, request: SessionEvaluationRequest = Body(...), openai_service: OpenAIService = Depends(get_openai_service), session_store: SessionStore = Depends(get_session_store)):
+    """保存済みの対話履歴（と未保存の新しいターン）を評価する"""
+    session = await session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="セッションが見つかりません")
+    
+    try:
+        new_messages = [msg.model_dump() for msg in request.messages]
+        logger.info(f"セッション評価リクエスト: session_id={session_id}, 保存済み履歴={len(session['history'])}件, 追加={len(new_messages)}件, language={request.language}")
+        
+        evaluation = await openai_service.evaluate_interview(
+            session["history"] + new_messages,
+            language=request.language,
+            session_id=session_id
+        )
+        log_payload(logger, "生成された評価", evaluation)
+        
+        return evaluation
+    except UpstreamRateLimitError as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        logger.error(f"面接評価エラー: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/sessions/{session_id}")
+@traced("interview.delete_session")
+async def delete_session(session_id: str, session_store: SessionStore = Depends(get_session_store)):
+    """面接セッションを削除する"""
+    await session_store.delete(session_id)
+    return {"status": "ok"}
@@ -1,33 +1,97 @@
 from fastapi import APIRouter, Request, status
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-import os
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 import json
+import zlib
 from datetime import datetime
+from typing import List
 
-LOG_DIR = 'logs'
-LOG_FILE = os.path.join(LOG_DIR, 'access.log')
+from app.core.access_log import access_log_writer
+from app.core.config import settings
+from app.core.metrics import metrics
 
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+# アクセスログの統計情報を/metricsにも出力する
+metrics.register_stats("access_log", access_log_writer.stats)
+
 class LogEntry(BaseModel):
     userId: str = Field(...)
     timestamp: str = Field(...)
     message: str = Field(...)
     data: dict | None = None
 
+# 一括送信のエントリを1回でまとめて検証するためのアダプター
+log_entries_adapter = TypeAdapter(List[LogEntry])
+
 @router.post('', status_code=201)
 async def post_log(entry: LogEntry, request: Request):
     try:
-        # ディレクトリ・ファイルがなければ作成
-        os.makedirs(LOG_DIR, exist_ok=True)
-        if not os.path.exists(LOG_FILE):
-            with open(LOG_FILE, 'w', encoding='utf-8') as f:
-                pass
-        # 1行1JSONで追記
-        with open(LOG_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(entry.dict(), ensure_ascii=False) + '\n')
+        # 1行1JSONでキューに積み、書き込みはバックグラウンドで行う
+        if not access_log_writer.enqueue(json.dumps(entry.model_dump(), ensure_ascii=False)):
+            return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"error": "ログの書き込みキューが満杯です"})
         return {"status": "ok"}
     except Exception as e:
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": str(e)})
+
+def _decode_body(body: bytes, content_encoding: str) -> bytes:
+    """gzip圧縮されたボディを展開する（展開後のサイズ上限を超える場合・途中で途切れている場合はエラー）"""
+    max_bytes = settings.ACCESS_LOG_BATCH_MAX_BYTES
+    if content_encoding.lower() == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = decompressor.decompress(body, max_bytes + 1)
+        if decompressor.unconsumed_tail:
+            raise ValueError(f"ログデータが大きすぎます（上限: {max_bytes}バイト）")
+        if not decompressor.eof:
+            raise ValueError("gzipデータが途中で途切れています")
+    elif content_encoding and content_encoding.lower() != "identity":
+        raise ValueError(f"サポートされていないContent-Encodingです: {content_encoding}")
+    if len(body) > max_bytes:
+        raise ValueError(f"ログデータが大きすぎます（上限: {max_bytes}バイト）")
+    return body
+
+def _too_many_entries(max_entries: int) -> JSONResponse:
+    return JSONResponse(status_code=413, content={"error": f"ログの件数が多すぎます（上限: {max_entries}件）"})
+
+@router.post('/batch', status_code=201)
+async def post_logs_batch(request: Request):
+    """複数のログをまとめて受け付ける
+
+    ボディはLogEntryのJSON配列、またはNDJSON（Content-Type: application/x-ndjson）。
+    Content-Encoding: gzip で圧縮して送信できる。全件を1回で検証し、1回の追記で書き込む。
+    """
+    try:
+        body = _decode_body(await request.body(), request.headers.get("content-encoding", ""))
+    except (ValueError, zlib.error) as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"error": str(e)})
+
+    max_entries = settings.ACCESS_LOG_BATCH_MAX_ENTRIES
+    try:
+        # 件数の上限はPydanticでの検証（LogEntryの作成）より前に確認する
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            raw_lines = [line for line in body.splitlines() if line.strip()]
+            if len(raw_lines) > max_entries:
+                return _too_many_entries(max_entries)
+            raw_entries = [json.loads(line) for line in raw_lines]
+        else:
+            raw_entries = json.loads(body)
+            if isinstance(raw_entries, list) and len(raw_entries) > max_entries:
+                return _too_many_entries(max_entries)
+        entries = log_entries_adapter.validate_python(raw_entries)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"error": f"JSONの解析に失敗しました: {str(e)}"})
+    except ValidationError as e:
+        return JSONResponse(
+            status_code=422,
+            content={"error": "ログの形式が正しくありません", "details": e.errors(include_url=False, include_context=False)}
+        )
+
+    try:
+        lines = [json.dumps(entry.model_dump(), ensure_ascii=False) for entry in entries]
+        if not access_log_writer.enqueue_many(lines):
+            return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"error": "ログの書き込みキューが満杯です"})
+        return {"status": "ok", "accepted": len(lines)}
+    except Exception as e:
+        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"error": str(e)})
@@ -0,0 +1,207 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, TextIO
+
+from app.core.config import settings
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class AccessLogWriter:
+    """フロントエンドのアクセスログをバックグラウンドでまとめて書き込むライター
+
+    ハンドラーは有界のasyncio.Queueに1行ずつ積むだけで即座に戻り、
+    単一の書き込みタスクが件数または時間間隔でまとめてファイルへ追記する。
+    ファイルは開いたまま使い回し、サイズ上限を超えたらローテーションする。
+    LOG_ROTATION=external（複数ワーカー）の場合は自身ではローテーションせず、
+    logrotateなどでファイルが移動されたことを検知して開き直す。
+    キューが満杯の場合はその行を破棄し、破棄件数を記録する。
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        queue_size: int = None,
+        batch_size: int = None,
+        flush_interval: float = None,
+        max_bytes: int = None,
+        backup_count: int = None,
+        rotation: str = None,
+    ):
+        self.path = path or settings.ACCESS_LOG_FILE
+        self.queue_size = settings.ACCESS_LOG_QUEUE_SIZE if queue_size is None else queue_size
+        self.batch_size = settings.ACCESS_LOG_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_interval = settings.ACCESS_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_bytes = settings.ACCESS_LOG_MAX_BYTES if max_bytes is None else max_bytes
+        self.backup_count = settings.ACCESS_LOG_BACKUP_COUNT if backup_count is None else backup_count
+        self.rotation = (rotation or settings.LOG_ROTATION).lower()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._file: Optional[TextIO] = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.write_errors = 0
+        self.max_queue_depth = 0
+
+    def start(self) -> None:
+        """書き込みタスクを開始する（実行中のイベントループ上で呼び出す）"""
+        if self._task is not None and not self._task.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """キューに残っている行を書き込んでから停止する"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            if not self._queue.empty():
+                await asyncio.to_thread(self._write_batch, self._drain(self._queue.qsize()))
+            self._queue = None
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    def enqueue(self, line: str) -> bool:
+        """1行をキューに積む（満杯の場合は破棄してFalseを返す）"""
+        self.start()
+        try:
+            self._queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return True
+
+    def enqueue_many(self, lines: List[str]) -> bool:
+        """複数行を1件としてキューに積む（1回の追記でまとめて書き込まれる）"""
+        if not lines:
+            return True
+        self.start()
+        try:
+            self._queue.put_nowait("\n".join(lines))
+        except asyncio.QueueFull:
+            self.dropped += len(lines)
+            return False
+        self.enqueued += len(lines)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return True
+
+    def _drain(self, limit: int) -> List[str]:
+        lines = []
+        while len(lines) < limit:
+            try:
+                lines.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return lines
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lines: List[str] = []
+            try:
+                # 最初の1行を待ち、その後は件数上限か時間間隔に達するまでまとめる
+                lines.append(await self._queue.get())
+                deadline = loop.time() + self.flush_interval
+                while len(lines) < self.batch_size:
+                    lines.extend(self._drain(self.batch_size - len(lines)))
+                    remaining = deadline - loop.time()
+                    if len(lines) >= self.batch_size or remaining <= 0:
+                        break
+                    try:
+                        lines.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # 停止時はまとめ途中の行も書き込んでから終了する
+                if lines:
+                    await asyncio.to_thread(self._write_batch, lines)
+                raise
+            write = asyncio.ensure_future(asyncio.to_thread(self._write_batch, lines))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # 停止時も書き込み中のバッチは最後まで完了させる
+                await write
+                raise
+
+    def _open(self) -> TextIO:
+        if self._file is not None and self.rotation == "external" and self._moved():
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _moved(self) -> bool:
+        """開いているファイルが外部のローテーションで移動・削除されたか"""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self._file.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def _rotate(self) -> None:
+        """access.log → access.log.1 → ... の順にローテーションする"""
+        self._file.close()
+        self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _write_batch(self, lines: List[str]) -> None:
+        """まとめた行を1回の書き込みで追記する（スレッド上で実行）"""
+        if not lines:
+            return
+        try:
+            f = self._open()
+            f.write("".join(line if line.endswith("\n") else line + "\n" for line in lines))
+            f.flush()
+            # enqueue_manyで積んだ要素は複数行を含む
+            self.written += sum(line.rstrip("\n").count("\n") + 1 for line in lines)
+            self.flushes += 1
+            if self.rotation == "size" and self.max_bytes > 0 and f.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            self.write_errors += 1
+            logger.error(f"アクセスログの書き込みに失敗しました: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "write_errors": self.write_errors,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "queue_size": self.queue_size,
+        }
+
+
+# アプリケーション全体で共有するインスタンス
+access_log_writer = AccessLogWriter()
@@ -19,6 +19,8 @@ class InterviewMode(str, Enum):
 # プロンプトファイルパス
 PROMPTS_DIR = os.getenv("PROMPTS_DIR", "app/core/prompts")
 INTERVIEW_QUESTIONS_PROMPT_PATH = Path(PROMPTS_DIR) / "interview_questions.yaml"
+# プロンプトファイルの更新確認間隔（秒）
+PROMPT_RELOAD_CHECK_INTERVAL = float(os.getenv("PROMPT_RELOAD_CHECK_INTERVAL", "2.0"))
 
 # OpenAI APIパラメータ
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -26,14 +28,144 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_INTERVIEW_QUESTIONS_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
 OPENAI_TEMPERATURE = 0.7
 
+# OpenAI APIクライアントの接続設定（コネクションプール・タイムアウト）
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() == "true"
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_POOL_TIMEOUT = float(os.getenv("OPENAI_POOL_TIMEOUT", "10"))
+OPENAI_CHAT_TIMEOUT = float(os.getenv("OPENAI_CHAT_TIMEOUT", "30"))
+OPENAI_TTS_TIMEOUT = float(os.getenv("OPENAI_TTS_TIMEOUT", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+# 起動時に事前に確立しておく接続数（0で無効）
+OPENAI_WARMUP_CONNECTIONS = int(os.getenv("OPENAI_WARMUP_CONNECTIONS", "2"))
+
+# OpenAI API呼び出しのレート制限・再試行（上限0はレスポンスヘッダーから学習するまで無制限）
+OPENAI_SCHEDULER_ENABLED = os.getenv("OPENAI_SCHEDULER_ENABLED", "true").lower() == "true"
+OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", "0"))
+OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", "0"))
+OPENAI_RETRY_MAX_ATTEMPTS = int(os.getenv("OPENAI_RETRY_MAX_ATTEMPTS", "4"))
+OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5"))
+OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", "20"))
+
 # OpenAI Text to Speech パラメータ
 OPENAI_TTS_MODEL = os.getenv("OPENAI_TTS_MODEL", "gpt-4o-mini-tts")
 OPENAI_TTS_VOICE = os.getenv("OPENAI_TTS_VOICE", "alloy")
 OPENAI_TTS_AVAILABLE_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
 OPENAI_TTS_RESPONSE_FORMAT = "mp3"
+# 音声合成をストリーミングで返すか（リクエストのstreamパラメータで上書き可能）
+OPENAI_TTS_STREAMING = os.getenv("OPENAI_TTS_STREAMING", "false").lower() == "true"
+OPENAI_TTS_STREAM_CHUNK_SIZE = int(os.getenv("OPENAI_TTS_STREAM_CHUNK_SIZE", "4096"))
+
+# 音声合成キャッシュ設定（ディスク層はTTS_CACHE_DISK_DIRを指定した場合のみ有効）
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_MEMORY_MAX_BYTES = int(os.getenv("TTS_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+TTS_CACHE_DISK_DIR = os.getenv("TTS_CACHE_DISK_DIR", "")
+TTS_CACHE_DISK_MAX_BYTES = int(os.getenv("TTS_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+# 1件あたりの上限（超える音声はキャッシュせず、ストリーミング時もチャンクを保持し続けない）
+TTS_CACHE_MAX_ITEM_BYTES = int(os.getenv("TTS_CACHE_MAX_ITEM_BYTES", str(4 * 1024 * 1024)))
+
+# Google Speech-to-Text 設定（同時実行数・待機キュー上限・タイムアウト秒）
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+STT_MAX_QUEUE_SIZE = int(os.getenv("STT_MAX_QUEUE_SIZE", "100"))
+STT_TIMEOUT = float(os.getenv("STT_TIMEOUT", "60"))
+# ストリーミング音声認識の同時セッション数・タイムアウト秒
+STT_STREAMING_MAX_SESSIONS = int(os.getenv("STT_STREAMING_MAX_SESSIONS", "16"))
+STT_STREAMING_TIMEOUT = float(os.getenv("STT_STREAMING_TIMEOUT", "300"))
+STT_STREAMING_QUEUE_SIZE = int(os.getenv("STT_STREAMING_QUEUE_SIZE", "64"))
+# ローカルのエミュレーター（ベンチマーク用の疑似サーバーなど）に接続する場合のホスト（例: localhost:9101）
+GOOGLE_SPEECH_EMULATOR_HOST = os.getenv("GOOGLE_SPEECH_EMULATOR_HOST", "")
+# 音声形式を判定できない場合に使う形式（RecognitionConfig.AudioEncodingの名前とサンプルレート）
+STT_DEFAULT_ENCODING = os.getenv("STT_DEFAULT_ENCODING", "WEBM_OPUS")
+STT_DEFAULT_SAMPLE_RATE = int(os.getenv("STT_DEFAULT_SAMPLE_RATE", "48000"))
+# 音声認識前の前処理（無音除去・モノラル化・リサンプリング・再エンコード、PyAVが必要）
+STT_PREPROCESS_ENABLED = os.getenv("STT_PREPROCESS_ENABLED", "true").lower() == "true"
+STT_PREPROCESS_SAMPLE_RATE = int(os.getenv("STT_PREPROCESS_SAMPLE_RATE", "16000"))
+STT_PREPROCESS_DOWNMIX = os.getenv("STT_PREPROCESS_DOWNMIX", "true").lower() == "true"
+STT_PREPROCESS_BITRATE = int(os.getenv("STT_PREPROCESS_BITRATE", "24000"))
+# 前処理はCPUを使うため、同時に実行する数を制限する
+STT_PREPROCESS_CONCURRENCY = int(os.getenv("STT_PREPROCESS_CONCURRENCY", "2"))
+# 無音判定（フレームの音量がしきい値dBFS未満を無音とし、発話の前後にパディング（ミリ秒）を残す）
+STT_VAD_ENABLED = os.getenv("STT_VAD_ENABLED", "true").lower() == "true"
+STT_VAD_THRESHOLD_DBFS = float(os.getenv("STT_VAD_THRESHOLD_DBFS", "-45"))
+STT_VAD_FRAME_MS = int(os.getenv("STT_VAD_FRAME_MS", "30"))
+STT_VAD_PADDING_MS = int(os.getenv("STT_VAD_PADDING_MS", "300"))
+
+# 面接セッションストア設定（memory: プロセス内メモリ / redis: Redis互換サーバー）
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "200"))
+SESSION_MAX_MESSAGE_CHARS = int(os.getenv("SESSION_MAX_MESSAGE_CHARS", "4000"))
+
+# 対話履歴の圧縮設定（トークン予算を超えた古いターンを要約に置き換える）
+HISTORY_COMPACTION_ENABLED = os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true"
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+HISTORY_EVALUATION_TOKEN_BUDGET = int(os.getenv("HISTORY_EVALUATION_TOKEN_BUDGET", "8000"))
+HISTORY_KEEP_RECENT_TURNS = int(os.getenv("HISTORY_KEEP_RECENT_TURNS", "4"))
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "300"))
+HISTORY_SUMMARY_CACHE_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", "1000"))
+
+# フロントエンドのアクセスログ設定（バックグラウンドでまとめて書き込む）
+ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE", os.path.join("logs", "access.log"))
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", "500"))
+ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL", "1.0"))
+ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+ACCESS_LOG_BACKUP_COUNT = int(os.getenv("ACCESS_LOG_BACKUP_COUNT", "5"))
+# 一括送信（/api/logs/batch）の上限（件数・展開後のバイト数）
+ACCESS_LOG_BATCH_MAX_ENTRIES = int(os.getenv("ACCESS_LOG_BATCH_MAX_ENTRIES", "1000"))
+ACCESS_LOG_BATCH_MAX_BYTES = int(os.getenv("ACCESS_LOG_BATCH_MAX_BYTES", str(1024 * 1024)))
+
+# メトリクス設定（Prometheus形式の/metricsエンドポイント）
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# /metricsの取得に必要なトークン（Authorization: Bearer、空の場合は/metricsを公開しない）
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# トレース設定（file: OTLP/JSON形式でファイルに出力 / otlp: OTLP/HTTPでコレクターへ送信）
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "file")
+TRACING_FILE = os.getenv("TRACING_FILE", os.path.join("logs", "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "ai-interview-backend")
+
+# 評価・詳細フィードバック結果のキャッシュ設定
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+# イベントループの遅延・ブロッキング検出設定（計測間隔・ブロッキングとみなす時間は秒）
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.5"))
+LOOP_MONITOR_BLOCK_THRESHOLD = float(os.getenv("LOOP_MONITOR_BLOCK_THRESHOLD", "0.1"))
+LOOP_MONITOR_MAX_EVENTS = int(os.getenv("LOOP_MONITOR_MAX_EVENTS", "50"))
+LOOP_MONITOR_WINDOW = int(os.getenv("LOOP_MONITOR_WINDOW", "1000"))
+
+# 管理用エンドポイント（/api/admin）のトークン（空の場合はエンドポイントを無効にする）
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+# サーバーのワーカー数（gunicorn.conf.pyが設定する。レート制限の予算をワーカー数で分割する）
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+# ログファイル（app.log・openai.log・access.log）のローテーション方法
+# size: プロセス内でサイズごとにローテーション（1ワーカー用）
+# external: logrotateなど外部で移動・削除し、プロセスは移動を検知して開き直す（複数ワーカー用）
+LOG_ROTATION = os.getenv("LOG_ROTATION", "external" if WEB_CONCURRENCY > 1 else "size").lower()
+
+# 起動時の準備処理（外部APIのSDKの読み込み・クライアント作成・事前接続）をバックグラウンドで行うか
+STARTUP_WARMUP_IN_BACKGROUND = os.getenv("STARTUP_WARMUP_IN_BACKGROUND", "true").lower() == "true"
 
 # フィードバック表示設定
 FREE_DETAILED_FEEDBACK_COUNT = int(os.getenv("FREE_DETAILED_FEEDBACK_COUNT", "1"))
+# 詳細フィードバック生成の同時実行数・QAごとのタイムアウト（秒）
+DETAILED_FEEDBACK_CONCURRENCY = int(os.getenv("DETAILED_FEEDBACK_CONCURRENCY", "5"))
+DETAILED_FEEDBACK_ITEM_TIMEOUT = float(os.getenv("DETAILED_FEEDBACK_ITEM_TIMEOUT", "30"))
+# 詳細フィードバックの生成モード（parallel: QAごとに並列生成 / batched: 1回の呼び出しで一括生成）
+DETAILED_FEEDBACK_MODE = os.getenv("DETAILED_FEEDBACK_MODE", "parallel")
+# batchedモードで1回の呼び出しにまとめる最大QA数（生成トークン数の上限もこの件数分とする）
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "5"))
 
 # デフォルトの質問生成パラメータ
 # DEFAULT_INTERVIEW_PARAMS = {
@@ -55,19 +187,127 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str = Field(default=OPENAI_API_KEY)
     OPENAI_MODEL: str = Field(default=OPENAI_INTERVIEW_QUESTIONS_MODEL)
     OPENAI_TEMPERATURE: float = Field(default=OPENAI_TEMPERATURE)
+    OPENAI_MAX_CONNECTIONS: int = Field(default=OPENAI_MAX_CONNECTIONS, description="OpenAI APIへの最大同時接続数")
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=OPENAI_MAX_KEEPALIVE_CONNECTIONS, description="保持しておくアイドル接続数")
+    OPENAI_KEEPALIVE_EXPIRY: float = Field(default=OPENAI_KEEPALIVE_EXPIRY, description="アイドル接続を保持する時間（秒）")
+    OPENAI_HTTP2: bool = Field(default=OPENAI_HTTP2, description="HTTP/2を使用するか（h2パッケージが必要）")
+    OPENAI_CONNECT_TIMEOUT: float = Field(default=OPENAI_CONNECT_TIMEOUT, description="接続確立のタイムアウト（秒）")
+    OPENAI_POOL_TIMEOUT: float = Field(default=OPENAI_POOL_TIMEOUT, description="プールの空き接続待ちのタイムアウト（秒）")
+    OPENAI_CHAT_TIMEOUT: float = Field(default=OPENAI_CHAT_TIMEOUT, description="チャット補完のタイムアウト（秒）")
+    OPENAI_TTS_TIMEOUT: float = Field(default=OPENAI_TTS_TIMEOUT, description="音声合成のタイムアウト（秒）")
+    OPENAI_MAX_RETRIES: int = Field(default=OPENAI_MAX_RETRIES, description="SDKによる自動リトライ回数")
+    OPENAI_WARMUP_CONNECTIONS: int = Field(default=OPENAI_WARMUP_CONNECTIONS, description="起動時に事前確立する接続数（0で無効）")
+    OPENAI_SCHEDULER_ENABLED: bool = Field(default=OPENAI_SCHEDULER_ENABLED, description="レート制限・優先度付きキュー・再試行を行うか")
+    OPENAI_RPM_LIMIT: float = Field(default=OPENAI_RPM_LIMIT, description="1分あたりのリクエスト数の初期上限（全ワーカーの合計、0はヘッダーから学習）")
+    OPENAI_TPM_LIMIT: float = Field(default=OPENAI_TPM_LIMIT, description="1分あたりのトークン数の初期上限（全ワーカーの合計、0はヘッダーから学習）")
+    OPENAI_RETRY_MAX_ATTEMPTS: int = Field(default=OPENAI_RETRY_MAX_ATTEMPTS, description="429・5xx・接続エラー時の最大再試行回数")
+    OPENAI_RETRY_BASE_DELAY: float = Field(default=OPENAI_RETRY_BASE_DELAY, description="再試行の基準待ち時間（秒）")
+    OPENAI_RETRY_MAX_DELAY: float = Field(default=OPENAI_RETRY_MAX_DELAY, description="再試行の最大待ち時間（秒）")
     
     # OpenAI Text to Speech 設定
     OPENAI_TTS_MODEL: str = Field(default=OPENAI_TTS_MODEL)
     OPENAI_TTS_VOICE: str = Field(default=OPENAI_TTS_VOICE)
     OPENAI_TTS_RESPONSE_FORMAT: str = Field(default=OPENAI_TTS_RESPONSE_FORMAT)
     OPENAI_TTS_AVAILABLE_VOICES: List[str] = Field(default=OPENAI_TTS_AVAILABLE_VOICES)
+    OPENAI_TTS_STREAMING: bool = Field(default=OPENAI_TTS_STREAMING, description="音声合成をストリーミングで返すか")
+    OPENAI_TTS_STREAM_CHUNK_SIZE: int = Field(default=OPENAI_TTS_STREAM_CHUNK_SIZE, description="ストリーミング時のチャンクサイズ（バイト）")
+    
+    # 音声合成キャッシュ設定
+    TTS_CACHE_ENABLED: bool = Field(default=TTS_CACHE_ENABLED, description="音声合成キャッシュを有効にするか")
+    TTS_CACHE_MEMORY_MAX_BYTES: int = Field(default=TTS_CACHE_MEMORY_MAX_BYTES, description="メモリキャッシュの上限（バイト）")
+    TTS_CACHE_DISK_DIR: str = Field(default=TTS_CACHE_DISK_DIR, description="ディスクキャッシュのディレクトリ（空の場合は無効）")
+    TTS_CACHE_DISK_MAX_BYTES: int = Field(default=TTS_CACHE_DISK_MAX_BYTES, description="ディスクキャッシュの上限（バイト）")
+    TTS_CACHE_MAX_ITEM_BYTES: int = Field(default=TTS_CACHE_MAX_ITEM_BYTES, description="キャッシュする音声1件あたりの上限（バイト）")
+    
+    # Google Speech-to-Text 設定
+    STT_MAX_CONCURRENCY: int = Field(default=STT_MAX_CONCURRENCY, description="音声認識の同時実行数")
+    STT_MAX_QUEUE_SIZE: int = Field(default=STT_MAX_QUEUE_SIZE, description="音声認識の待機キュー上限（0は無制限）")
+    STT_TIMEOUT: float = Field(default=STT_TIMEOUT, description="音声認識のタイムアウト（秒）")
+    STT_STREAMING_MAX_SESSIONS: int = Field(default=STT_STREAMING_MAX_SESSIONS, description="ストリーミング音声認識の同時セッション数")
+    STT_STREAMING_TIMEOUT: float = Field(default=STT_STREAMING_TIMEOUT, description="ストリーミング音声認識のタイムアウト（秒）")
+    STT_STREAMING_QUEUE_SIZE: int = Field(default=STT_STREAMING_QUEUE_SIZE, description="ストリーミング音声認識で送信待ちにできる音声チャンク数（超えた分は受信を待たせる）")
+    GOOGLE_SPEECH_EMULATOR_HOST: str = Field(default=GOOGLE_SPEECH_EMULATOR_HOST, description="Speech-to-Textのエミュレーターのホスト（空の場合は本番のAPIに接続）")
+    STT_DEFAULT_ENCODING: str = Field(default=STT_DEFAULT_ENCODING, description="音声形式を判定できない場合のエンコーディング")
+    STT_DEFAULT_SAMPLE_RATE: int = Field(default=STT_DEFAULT_SAMPLE_RATE, description="音声形式を判定できない場合のサンプルレート")
+    STT_PREPROCESS_ENABLED: bool = Field(default=STT_PREPROCESS_ENABLED, description="音声認識前に無音除去・変換を行うか（PyAVが必要）")
+    STT_PREPROCESS_SAMPLE_RATE: int = Field(default=STT_PREPROCESS_SAMPLE_RATE, description="変換後のサンプルレート（0は元のまま）")
+    STT_PREPROCESS_DOWNMIX: bool = Field(default=STT_PREPROCESS_DOWNMIX, description="モノラルに変換するか")
+    STT_PREPROCESS_BITRATE: int = Field(default=STT_PREPROCESS_BITRATE, description="再エンコード（Opus）のビットレート")
+    STT_PREPROCESS_CONCURRENCY: int = Field(default=STT_PREPROCESS_CONCURRENCY, description="前処理の同時実行数（ワーカーごと）")
+    STT_VAD_ENABLED: bool = Field(default=STT_VAD_ENABLED, description="発話前後・発話間の無音を除去するか")
+    STT_VAD_THRESHOLD_DBFS: float = Field(default=STT_VAD_THRESHOLD_DBFS, description="無音とみなす音量（dBFS）")
+    STT_VAD_FRAME_MS: int = Field(default=STT_VAD_FRAME_MS, description="無音判定のフレーム長（ミリ秒）")
+    STT_VAD_PADDING_MS: int = Field(default=STT_VAD_PADDING_MS, description="発話の前後に残す無音（ミリ秒）")
+    
+    # 面接セッションストア設定
+    SESSION_STORE_BACKEND: str = Field(default=SESSION_STORE_BACKEND, description="セッションストアの種類（memory/redis）")
+    SESSION_REDIS_URL: str = Field(default=SESSION_REDIS_URL, description="Redis互換サーバーのURL")
+    SESSION_TTL_SECONDS: int = Field(default=SESSION_TTL_SECONDS, description="セッションの有効期限（最終アクセスからの秒数）")
+    SESSION_MAX_SESSIONS: int = Field(default=SESSION_MAX_SESSIONS, description="メモリストアで保持する最大セッション数")
+    SESSION_MAX_MESSAGES: int = Field(default=SESSION_MAX_MESSAGES, description="1セッションあたりの最大メッセージ数")
+    SESSION_MAX_MESSAGE_CHARS: int = Field(default=SESSION_MAX_MESSAGE_CHARS, description="1メッセージあたりの最大文字数")
+    
+    # 対話履歴の圧縮設定
+    HISTORY_COMPACTION_ENABLED: bool = Field(default=HISTORY_COMPACTION_ENABLED, description="対話履歴の圧縮を有効にするか")
+    HISTORY_TOKEN_BUDGET: int = Field(default=HISTORY_TOKEN_BUDGET, description="質問生成時の対話履歴のトークン予算")
+    HISTORY_EVALUATION_TOKEN_BUDGET: int = Field(default=HISTORY_EVALUATION_TOKEN_BUDGET, description="面接評価時の対話履歴のトークン予算")
+    HISTORY_KEEP_RECENT_TURNS: int = Field(default=HISTORY_KEEP_RECENT_TURNS, description="要約せずに残す直近の往復数")
+    HISTORY_SUMMARY_MAX_TOKENS: int = Field(default=HISTORY_SUMMARY_MAX_TOKENS, description="要約の最大トークン数")
+    HISTORY_SUMMARY_CACHE_SIZE: int = Field(default=HISTORY_SUMMARY_CACHE_SIZE, description="要約キャッシュの最大件数")
+    
+    # フロントエンドのアクセスログ設定
+    ACCESS_LOG_FILE: str = Field(default=ACCESS_LOG_FILE, description="アクセスログのファイルパス")
+    ACCESS_LOG_QUEUE_SIZE: int = Field(default=ACCESS_LOG_QUEUE_SIZE, description="書き込み待ちキューの上限（超えた分は破棄）")
+    ACCESS_LOG_BATCH_SIZE: int = Field(default=ACCESS_LOG_BATCH_SIZE, description="1回の書き込みでまとめる最大行数")
+    ACCESS_LOG_FLUSH_INTERVAL: float = Field(default=ACCESS_LOG_FLUSH_INTERVAL, description="書き込み間隔（秒）")
+    ACCESS_LOG_MAX_BYTES: int = Field(default=ACCESS_LOG_MAX_BYTES, description="ローテーションするファイルサイズ（バイト、LOG_ROTATION=sizeの場合）")
+    ACCESS_LOG_BACKUP_COUNT: int = Field(default=ACCESS_LOG_BACKUP_COUNT, description="ローテーション後に残すファイル数")
+    ACCESS_LOG_BATCH_MAX_ENTRIES: int = Field(default=ACCESS_LOG_BATCH_MAX_ENTRIES, description="一括送信1回あたりの最大件数")
+    ACCESS_LOG_BATCH_MAX_BYTES: int = Field(default=ACCESS_LOG_BATCH_MAX_BYTES, description="一括送信1回あたりの最大バイト数（gzip展開後）")
+    
+    # メトリクス設定
+    METRICS_ENABLED: bool = Field(default=METRICS_ENABLED, description="/metricsエンドポイントとリクエスト計測を有効にするか")
+    METRICS_TOKEN: str = Field(default=METRICS_TOKEN, description="/metricsの取得に必要なトークン（Authorization: Bearer、空の場合は/metricsを公開しない）")
+    
+    # トレース設定
+    TRACING_ENABLED: bool = Field(default=TRACING_ENABLED, description="リクエストのトレースを記録するか")
+    TRACING_SAMPLE_RATE: float = Field(default=TRACING_SAMPLE_RATE, description="トレースを記録するリクエストの割合（0.0〜1.0）")
+    TRACING_EXPORTER: str = Field(default=TRACING_EXPORTER, description="スパンの出力先（file/otlp）")
+    TRACING_FILE: str = Field(default=TRACING_FILE, description="file出力時のファイルパス")
+    TRACING_OTLP_ENDPOINT: str = Field(default=TRACING_OTLP_ENDPOINT, description="otlp出力時の送信先（OTLP/HTTP JSON）")
+    TRACING_SERVICE_NAME: str = Field(default=TRACING_SERVICE_NAME, description="スパンに付与するサービス名")
+    
+    # 評価・詳細フィードバック結果のキャッシュ設定
+    RESULT_CACHE_ENABLED: bool = Field(default=RESULT_CACHE_ENABLED, description="評価・詳細フィードバック結果をキャッシュするか")
+    RESULT_CACHE_TTL_SECONDS: float = Field(default=RESULT_CACHE_TTL_SECONDS, description="結果キャッシュの有効期間（秒）")
+    RESULT_CACHE_MAX_ENTRIES: int = Field(default=RESULT_CACHE_MAX_ENTRIES, description="結果キャッシュの最大件数")
+    
+    # イベントループの遅延・ブロッキング検出設定
+    LOOP_MONITOR_ENABLED: bool = Field(default=LOOP_MONITOR_ENABLED, description="イベントループの遅延計測とブロッキング検出を有効にするか")
+    LOOP_MONITOR_INTERVAL: float = Field(default=LOOP_MONITOR_INTERVAL, description="遅延を計測する間隔（秒）")
+    LOOP_MONITOR_BLOCK_THRESHOLD: float = Field(default=LOOP_MONITOR_BLOCK_THRESHOLD, description="ブロッキングとしてスタックトレースを記録する遅延（秒）")
+    LOOP_MONITOR_MAX_EVENTS: int = Field(default=LOOP_MONITOR_MAX_EVENTS, description="保持するブロッキングの記録件数")
+    LOOP_MONITOR_WINDOW: int = Field(default=LOOP_MONITOR_WINDOW, description="パーセンタイルの計算に使う直近の遅延の件数")
+    
+    # 管理用エンドポイント設定
+    ADMIN_API_TOKEN: str = Field(default=ADMIN_API_TOKEN, description="管理用エンドポイントのトークン（X-Admin-Tokenヘッダー、空の場合はエンドポイントを無効にする）")
+    
+    # 起動設定
+    WEB_CONCURRENCY: int = Field(default=WEB_CONCURRENCY, description="サーバーのワーカー数（OPENAI_RPM_LIMIT・OPENAI_TPM_LIMITはワーカー数で分割する）")
+    LOG_ROTATION: str = Field(default=LOG_ROTATION, description="ログファイルのローテーション方法（size: プロセス内 / external: logrotateなど外部）")
+    STARTUP_WARMUP_IN_BACKGROUND: bool = Field(default=STARTUP_WARMUP_IN_BACKGROUND, description="起動時の準備処理をバックグラウンドで行い、完了まで/api/readyで503を返すか")
     
     # フィードバック表示設定
     FREE_DETAILED_FEEDBACK_COUNT: int = Field(default=FREE_DETAILED_FEEDBACK_COUNT, description="無料ユーザーに表示する詳細フィードバックの件数")
+    DETAILED_FEEDBACK_CONCURRENCY: int = Field(default=DETAILED_FEEDBACK_CONCURRENCY, description="詳細フィードバック生成の同時実行数")
+    DETAILED_FEEDBACK_ITEM_TIMEOUT: float = Field(default=DETAILED_FEEDBACK_ITEM_TIMEOUT, description="詳細フィードバック生成のQAごとのタイムアウト（秒）")
+    DETAILED_FEEDBACK_MODE: str = Field(default=DETAILED_FEEDBACK_MODE, description="詳細フィードバックの生成モード（parallel/batched）")
+    FEEDBACK_BATCH_SIZE: int = Field(default=FEEDBACK_BATCH_SIZE, description="batchedモードで1回の呼び出しにまとめる最大QA数")
     
     # ファイルパス設定
     PROMPTS_DIR: str = Field(default=PROMPTS_DIR)
     INTERVIEW_QUESTIONS_PROMPT_PATH: Path = Field(default=INTERVIEW_QUESTIONS_PROMPT_PATH)
+    PROMPT_RELOAD_CHECK_INTERVAL: float = Field(default=PROMPT_RELOAD_CHECK_INTERVAL, description="プロンプトファイルの更新確認間隔（秒）")
     
     model_config = {
         "env_file": ".env",
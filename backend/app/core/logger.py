@@ -1,84 +1,254 @@
 import os
+import json
+import atexit
+import hashlib
 import logging
-from logging.handlers import RotatingFileHandler
+import logging.config
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 import pathlib
-import sys
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.tracing import RequestIdFilter
 
 # ログディレクトリの設定
 LOG_DIR = os.getenv('LOG_DIR', 'logs')
 
+# ログの出力形式（text: 従来のテキスト形式 / json: 1行1JSONの構造化ログ）
+LOG_OUTPUT_FORMAT = os.getenv('LOG_OUTPUT_FORMAT', 'text').lower()
+
+# ペイロード（メッセージ履歴・レスポンス全文など）のログ出力設定
+# full: 全文を出力 / summary: 種類と件数のみ出力し、LOG_PAYLOAD_SAMPLE_RATEの割合で全文も出力
+LOG_PAYLOAD_MODE = os.getenv('LOG_PAYLOAD_MODE', 'summary').lower()
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '0.01'))
+
 # ロギングのフォーマット
-LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+# ログレベル（ルート）と個別ロガーのレベル指定（例: "app.services.openai_service=WARNING,uvicorn.access=WARNING"）
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+
+# OpenAI専用ログ（openai.log）の対象ロガー
+OPENAI_LOGGER_NAME = 'app.services.openai_service'
+
+# バックグラウンドスレッドでハンドラーを実行するリスナー
+_queue_listener: Optional[QueueListener] = None
+# 初期化済みかどうか（setup_loggerを複数回呼んでも再設定しない）
+_configured = False
+_setup_lock = threading.Lock()
+
+# LogRecordの標準属性（これ以外の属性はextraとしてJSONに含める）
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """ログレコードを1行1JSONに整形するフォーマッター"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        # extraで渡された属性を追加
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def log_payload(logger: logging.Logger, label: str, payload: Any, level: int = logging.INFO) -> None:
+    """ペイロードをLOG_PAYLOAD_MODEに従ってログ出力する
+
+    summaryモードではペイロードの種類と件数（文字列は文字数）のみを出力し、
+    LOG_PAYLOAD_SAMPLE_RATEの割合でサンプリングしたものだけ全文を出力する。
+    シリアライズとハッシュの計算は全文を出力する場合にのみ行う。
+    """
+    if not logger.isEnabledFor(level):
+        return
+
+    full = LOG_PAYLOAD_MODE == 'full' or (
+        LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE
+    )
+    summary: Dict[str, Any] = {"payload_type": type(payload).__name__}
+    if isinstance(payload, str):
+        summary["payload_chars"] = len(payload)
+    elif isinstance(payload, (list, tuple, dict)):
+        summary["payload_items"] = len(payload)
+
+    if full:
+        text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+        data = text.encode('utf-8')
+        summary["payload_bytes"] = len(data)
+        summary["payload_sha256"] = hashlib.sha256(data).hexdigest()[:16]
+        logger.log(level, f"{label}: {text}", extra=summary)
+    else:
+        details = ", ".join(f"{key}={value}" for key, value in summary.items())
+        logger.log(level, f"{label}: ({details})", extra=summary)
+
+
+def _parse_logger_levels(value: str) -> Dict[str, str]:
+    """"app.services.openai_service=DEBUG,uvicorn.access=WARNING" 形式の指定を辞書に変換する"""
+    levels = {}
+    for item in value.split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def build_logging_config(log_dir: str = None) -> Dict[str, Any]:
+    """logging.config.dictConfigに渡すロギング設定を組み立てる
+
+    ハンドラーはルートロガーにのみ登録し、各ロガーは伝播でルートへ流す。
+    openai.logにはopenai_serviceロガーの出力だけをフィルターで振り分ける。
+    複数ワーカーが同じファイルに書き込む場合（LOG_ROTATION=external）は、各ワーカーが
+    個別にローテーションすると互いのファイルを移動し合うため、ローテーションは外部（logrotate）に任せ、
+    WatchedFileHandlerでファイルの移動を検知して開き直す。
+    """
+    log_dir = log_dir or LOG_DIR
+    formatter = 'json' if LOG_OUTPUT_FORMAT == 'json' else 'text'
+
+    def rotating_file(filename: str, **extra) -> Dict[str, Any]:
+        if settings.LOG_ROTATION == 'external':
+            rotation = {'class': 'logging.handlers.WatchedFileHandler'}
+        else:
+            rotation = {
+                'class': 'logging.handlers.RotatingFileHandler',
+                'maxBytes': 10*1024*1024,  # 10MB
+                'backupCount': 5,
+            }
+        return {
+            **rotation,
+            'filename': os.path.join(log_dir, filename),
+            'encoding': 'utf-8',
+            'delay': True,
+            'level': 'INFO',
+            'formatter': formatter,
+            **extra,
+        }
+
+    loggers = {
+        OPENAI_LOGGER_NAME: {'level': 'INFO'},
+    }
+    for name, level in _parse_logger_levels(LOG_LEVELS).items():
+        loggers.setdefault(name, {})['level'] = level
+
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'text': {'format': LOG_FORMAT, 'datefmt': DATETIME_FORMAT},
+            'json': {'()': JsonFormatter},
+        },
+        'filters': {
+            'openai_only': {'name': OPENAI_LOGGER_NAME},
+        },
+        'handlers': {
+            'console': {
+                'class': 'logging.StreamHandler',
+                'stream': 'ext://sys.stdout',
+                'level': 'INFO',
+                'formatter': formatter,
+            },
+            'app_file': rotating_file('app.log'),
+            'openai_file': rotating_file('openai.log', filters=['openai_only']),
+        },
+        'loggers': loggers,
+        'root': {
+            'level': LOG_LEVEL,
+            'handlers': ['console', 'app_file', 'openai_file'],
+        },
+    }
+
+
+def _attach_queue_listener() -> None:
+    """ルートロガーのハンドラーをQueueListenerへ移し、ルートにはQueueHandlerだけを残す
+
+    ハンドラーの実行（整形・ファイル書き込み）はリスナーのスレッドで行い、
+    イベントループ上ではキューに積むだけにする。
+    """
+    global _queue_listener
+    root_logger = logging.getLogger()
+    handlers = root_logger.handlers[:]
+    for handler in handlers:
+        root_logger.removeHandler(handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # リクエストIDはログを出したタスクのコンテキストから取得する必要があるため、キューに積む前に付与する
+    queue_handler.addFilter(RequestIdFilter())
+    root_logger.addHandler(queue_handler)
+    _queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+
+
+def shutdown_logger() -> None:
+    """キューに残っているログを書き出してリスナーを停止する"""
+    global _queue_listener, _configured
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+    _configured = False
+
+
 # ロガーの設定
-def setup_logger():
-    try:
-        # ログディレクトリの作成（存在しない場合）
-        pathlib.Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
-        
-        # ルートロガーの設定
-        root_logger = logging.getLogger()
-        root_logger.setLevel(logging.INFO)
-        
-        # 既存のハンドラーをクリア（二重登録防止）
-        for handler in root_logger.handlers[:]:
-            root_logger.removeHandler(handler)
-        
-        # コンソールハンドラー
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(LOG_FORMAT, DATETIME_FORMAT)
-        console_handler.setFormatter(console_formatter)
-        root_logger.addHandler(console_handler)
-        
+def setup_logger(force: bool = False) -> logging.Logger:
+    """ロギングを初期化してルートロガーを返す
+
+    アプリケーション起動時に1度だけ設定し、2回目以降の呼び出しでは何もしない
+    （force=Trueの場合のみ再設定する）。
+    """
+    global _configured
+    with _setup_lock:
+        if _configured and not force:
+            return logging.getLogger()
+        shutdown_logger()
+
         try:
-            # ファイルハンドラー（ローテーション機能付き）
-            file_handler = RotatingFileHandler(
-                os.path.join(LOG_DIR, 'app.log'),
-                maxBytes=10*1024*1024,  # 10MB
-                backupCount=5,
-                encoding='utf-8'
-            )
-            file_handler.setLevel(logging.INFO)
-            file_formatter = logging.Formatter(LOG_FORMAT, DATETIME_FORMAT)
-            file_handler.setFormatter(file_formatter)
-            root_logger.addHandler(file_handler)
-            
-            # OpenAI用のロガー設定
-            openai_logger = logging.getLogger('app.services.openai_service')
-            openai_logger.setLevel(logging.INFO)
-            
-            # OpenAI専用のファイルハンドラー
-            openai_file_handler = RotatingFileHandler(
-                os.path.join(LOG_DIR, 'openai.log'),
-                maxBytes=10*1024*1024,  # 10MB
-                backupCount=5,
-                encoding='utf-8'
-            )
-            openai_file_handler.setLevel(logging.INFO)
-            openai_file_handler.setFormatter(file_formatter)
-            openai_logger.addHandler(openai_file_handler)
-        except (IOError, PermissionError) as e:
-            # ファイルに書き込めない場合はコンソールにエラーを出力
+            # ログディレクトリの作成（存在しない場合）
+            pathlib.Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
+            logging.config.dictConfig(build_logging_config())
+        except (OSError, ValueError) as e:
+            # ファイルに書き込めない場合はコンソールログのみで設定する
             print(f"ログファイルの作成に失敗しました。コンソールログのみ有効: {str(e)}")
-        
-        return root_logger
-        
-    except Exception as e:
-        # ロギング設定に失敗した場合はシンプルなロガーを返す
-        print(f"ロガーの設定中にエラーが発生しました: {str(e)}")
-        simple_logger = logging.getLogger()
-        simple_logger.setLevel(logging.INFO)
-        
-        # 既存のハンドラーをクリア
-        for handler in simple_logger.handlers[:]:
-            simple_logger.removeHandler(handler)
-            
-        # シンプルなコンソールロガー
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.INFO)
-        handler.setFormatter(logging.Formatter(LOG_FORMAT, DATETIME_FORMAT))
-        simple_logger.addHandler(handler)
-        
-        return simple_logger 
\ No newline at end of file
+            config = build_logging_config()
+            for name in ('app_file', 'openai_file'):
+                config['handlers'].pop(name)
+            config['root']['handlers'] = ['console']
+            logging.config.dictConfig(config)
+
+        _attach_queue_listener()
+        _configured = True
+        return logging.getLogger()
+
+
+def _restart_queue_listener_after_fork() -> None:
+    """fork後の子プロセス（gunicornのワーカー）でリスナーのスレッドを起動し直す
+
+    スレッドはforkで引き継がれないため、マスタープロセスで初期化したロギング（preload_app）を
+    そのまま使うとログがキューに溜まるだけになる。
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener = QueueListener(_queue_listener.queue, *_queue_listener.handlers, respect_handler_level=True)
+        _queue_listener.start()
+
+
+# プロセス終了時にキューに残ったログを書き出す
+atexit.register(shutdown_logger)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_queue_listener_after_fork)
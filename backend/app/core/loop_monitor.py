@@ -0,0 +1,178 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds", "イベントループの遅延（コールバックが実行されるまでの時間、秒）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_BLOCKED = metrics.counter(
+    "event_loop_blocked_total", "ブロッキングの閾値を超えてイベントループが止まった回数"
+)
+
+# 記録するスタックトレースの深さ（イベントループ側の直近のフレームから）
+STACK_LIMIT = 30
+
+
+def percentile(values: List[float], q: float) -> float:
+    """線形補間によるパーセンタイル（qは0〜100）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class LoopMonitor:
+    """イベントループの遅延計測とブロッキング検出
+
+    監視スレッドが計測間隔ごとにcall_soon_threadsafeでコールバックを送り、実行されるまでの時間を
+    遅延として記録する。閾値を超えても実行されない場合は、その時点のイベントループのスレッドの
+    スタックトレースを取得し、ブロッキングしている処理として記録する。
+    イベントループ側の負荷は計測間隔ごとに1回のコールバックのみのため、本番でも常時有効にできる。
+    """
+
+    def __init__(self, interval: float = None, block_threshold: float = None, max_events: int = None, window: int = None):
+        self.interval = settings.LOOP_MONITOR_INTERVAL if interval is None else interval
+        self.block_threshold = settings.LOOP_MONITOR_BLOCK_THRESHOLD if block_threshold is None else block_threshold
+        max_events = settings.LOOP_MONITOR_MAX_EVENTS if max_events is None else max_events
+        window = settings.LOOP_MONITOR_WINDOW if window is None else window
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        # 直近の遅延（ミリ秒）とブロッキングの記録
+        self._lags: "deque[float]" = deque(maxlen=window)
+        self._events: "deque[Dict[str, Any]]" = deque(maxlen=max_events)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+        self.blocked_total = 0.0
+
+    def start(self) -> None:
+        """監視を開始する（イベントループのスレッドから呼び出す）"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-monitor", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"イベントループの監視を開始しました（間隔: {self.interval}秒, ブロッキング閾値: {self.block_threshold}秒）"
+        )
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.interval + self.block_threshold + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            done = threading.Event()
+            executed_at: List[float] = []
+
+            def callback() -> None:
+                executed_at.append(time.perf_counter())
+                done.set()
+
+            sent_at = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                # イベントループが閉じられた
+                return
+
+            if not done.wait(self.block_threshold):
+                # 閾値を超えた時点で実行中の処理のスタックを取得し、ループが戻るまで待つ
+                stack = self._capture_stack()
+                while not done.wait(self.interval):
+                    if self._stop.is_set() or self._loop.is_closed():
+                        return
+                self._record_block(executed_at[0] - sent_at, stack)
+
+            self._record_lag(executed_at[0] - sent_at)
+            self._stop.wait(self.interval)
+
+    def _capture_stack(self) -> List[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return []
+        return [line.rstrip() for line in traceback.format_stack(frame, limit=STACK_LIMIT)]
+
+    def _record_lag(self, lag: float) -> None:
+        LOOP_LAG.observe(lag)
+        with self._lock:
+            self._lags.append(lag * 1000)
+            self.samples += 1
+            self.max_lag = max(self.max_lag, lag)
+
+    def _record_block(self, duration: float, stack: List[str]) -> None:
+        LOOP_BLOCKED.inc()
+        with self._lock:
+            self.blocked_count += 1
+            self.blocked_total += duration
+            self._events.append({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                # 監視のコールバックが待たされた時間（ブロッキングの途中から計測するため実際の時間以下になる）
+                "duration_ms": round(duration * 1000, 1),
+                "stack": stack,
+            })
+        logger.warning(
+            f"イベントループが{duration * 1000:.0f}ミリ秒ブロックされました（閾値: {self.block_threshold * 1000:.0f}ミリ秒）:\n"
+            + "\n".join(stack)
+        )
+
+    def reset(self) -> None:
+        """統計とブロッキングの記録を消去する"""
+        with self._lock:
+            self._lags.clear()
+            self._events.clear()
+            self.samples = 0
+            self.max_lag = 0.0
+            self.blocked_count = 0
+            self.blocked_total = 0.0
+
+    def events(self) -> List[Dict[str, Any]]:
+        """直近のブロッキングの記録（新しい順）を返す"""
+        with self._lock:
+            return list(reversed(self._events))
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        with self._lock:
+            lags = list(self._lags)
+            return {
+                "running": self._thread is not None,
+                "interval_seconds": self.interval,
+                "block_threshold_seconds": self.block_threshold,
+                "samples": self.samples,
+                "lag_p50_ms": percentile(lags, 50),
+                "lag_p95_ms": percentile(lags, 95),
+                "lag_p99_ms": percentile(lags, 99),
+                "lag_max_ms": self.max_lag * 1000,
+                "blocked_count": self.blocked_count,
+                "blocked_total_ms": self.blocked_total * 1000,
+            }
+
+
+# アプリケーション全体で共有するモニター
+loop_monitor = LoopMonitor()
@@ -0,0 +1,319 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.tracing import tracer
+
+# メトリクス名の接頭辞
+METRICS_NAMESPACE = "ai_interview"
+
+# 外部API呼び出し・HTTPリクエストのレイテンシ用のバケット（秒）
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label_value(str(value))}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """ラベル付きメトリクスの基底クラス"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}のラベルが一致しません: {sorted(labels)} != {sorted(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """単調増加するカウンター"""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """増減する値（同時実行数など）"""
+
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """値の分布（累積バケット・合計・件数）"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # ラベル -> (バケットごとの件数, 合計, 件数)
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """メトリクスを登録し、Prometheusのテキスト形式で出力するレジストリ
+
+    各サービスが持つstats()の数値はscrapeのたびに読み取り、ゲージとして出力する。
+    """
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._stats_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets))
+
+    def register_stats(self, prefix: str, stats_fn: Callable[[], Dict[str, Any]]) -> None:
+        """stats()の数値項目を {namespace}_{prefix}_{項目名} のゲージとして出力する"""
+        with self._lock:
+            self._stats_sources[prefix] = stats_fn
+
+    def _render_stats(self) -> List[str]:
+        blocks = []
+        for prefix, stats_fn in list(self._stats_sources.items()):
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                # boolはintのサブクラスなので0/1として出力される
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.namespace}_{prefix}_{key}"
+                blocks.append(f"# TYPE {name} gauge\n{name} {_format_value(value)}")
+        return blocks
+
+    def render(self) -> str:
+        """Prometheusのテキスト形式（version 0.0.4）で出力する"""
+        blocks = [metric.render() for metric in list(self._metrics.values())]
+        blocks.extend(self._render_stats())
+        return "\n".join(blocks) + "\n"
+
+
+# アプリケーション全体で共有するレジストリ
+metrics = MetricsRegistry()
+
+UPSTREAM_LATENCY = metrics.histogram(
+    "upstream_request_duration_seconds", "外部API呼び出しのレイテンシ（秒）", ("service", "operation", "status")
+)
+UPSTREAM_IN_FLIGHT = metrics.gauge(
+    "upstream_requests_in_flight", "実行中の外部API呼び出し数", ("service", "operation")
+)
+OPENAI_TOKENS = metrics.counter(
+    "openai_tokens_total", "OpenAIのトークン使用量（response.usage）", ("operation", "type")
+)
+AUDIO_BYTES = metrics.counter(
+    "audio_bytes_total", "音声データのバイト数（in: 音声認識の入力 / upload: 前処理後に音声認識APIへ送った量 / out: 音声合成の出力）", ("service", "direction")
+)
+CACHE_REQUESTS = metrics.counter(
+    "cache_requests_total", "キャッシュの参照回数", ("cache", "result")
+)
+HTTP_LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "HTTPリクエストの処理時間（秒）", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "処理中のHTTPリクエスト数", ("method",)
+)
+
+
+@contextmanager
+def track_upstream(service: str, operation: str) -> Iterator[None]:
+    """外部API呼び出しの実行中件数とレイテンシを記録する（トレース有効時はスパンも作成する）"""
+    UPSTREAM_IN_FLIGHT.inc(service=service, operation=operation)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with tracer.span(f"{service}.{operation}", **{"upstream.service": service, "upstream.operation": operation}):
+            yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(service=service, operation=operation)
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, service=service, operation=operation, status=status)
+
+
+def record_token_usage(operation: str, usage: Any) -> None:
+    """チャット補完のresponse.usageからトークン数を記録する"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens:
+        OPENAI_TOKENS.inc(prompt_tokens, operation=operation, type="prompt")
+    if completion_tokens:
+        OPENAI_TOKENS.inc(completion_tokens, operation=operation, type="completion")
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """ルート単位のHTTPリクエスト処理時間を記録するASGIミドルウェア
+
+    ラベルにはURLそのものではなくルートのパステンプレート（/api/interview/sessions/{session_id}など）を使う。
+    ストリーミングレスポンスは最後のチャンクを送信し終えるまでを処理時間とする。
+    """
+
+    def __init__(self, app, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # ルートはアプリ側でマッチした後に決まるため、実行中件数はメソッド単位で数える
+        HTTP_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method=method)
+            route = scope.get("route")
+            # 未定義のパスはラベルの種類が増えないようまとめる
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start, method=method, route=route_path, status=str(status_code)
+            )
@@ -0,0 +1,152 @@
+import json
+from typing import Dict, List, Optional, Tuple, Iterable
+
+
+class PartialJSONFieldExtractor:
+    """ストリーミング中の不完全なJSONオブジェクトから文字列フィールドを逐次取り出す
+
+    トップレベルのオブジェクトの指定キーについて、文字列値を受信した分だけ返す。
+    エスケープシーケンス（\\uXXXX やサロゲートペアを含む）がチャンク境界で
+    分割されていても正しく復元する。
+
+    使用例:
+        extractor = PartialJSONFieldExtractor(["reaction", "question"])
+        for field, delta, done in extractor.feed('{"reaction": "Gre'):
+            ...
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = set(fields)
+        self.values: Dict[str, str] = {}
+        self.completed: List[str] = []
+
+        self._state = "start"
+        self._key_chars: List[str] = []
+        self._current_key: Optional[str] = None
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[str] = None
+        # ネストした値を読み飛ばすための状態
+        self._nested_depth = 0
+        self._nested_in_string = False
+        self._nested_escape = False
+
+    def _decode_escape(self, sequence: str) -> str:
+        """完結したエスケープシーケンスを文字に変換する（サロゲートペアは結合する）"""
+        char = json.loads(f'"{sequence}"')
+        if self._high_surrogate is not None:
+            high, self._high_surrogate = self._high_surrogate, None
+            if "\udc00" <= char <= "\udfff":
+                return (high + char).encode("utf-16", "surrogatepass").decode("utf-16")
+            # 対になる下位サロゲートがない場合は置換文字にする
+            return "�" + self._decode_escape(sequence)
+        if "\ud800" <= char <= "\udbff":
+            self._high_surrogate = char
+            return ""
+        if "\udc00" <= char <= "\udfff":
+            return "�"
+        return char
+
+    def feed(self, text: str) -> List[Tuple[str, str, bool]]:
+        """受信したテキストを処理し、(フィールド名, 追加された文字列, 値が完結したか) のリストを返す"""
+        events: Dict[str, List] = {}
+        order: List[str] = []
+
+        def emit(key: str, delta: str, done: bool) -> None:
+            if key not in events:
+                events[key] = ["", False]
+                order.append(key)
+            events[key][0] += delta
+            events[key][1] = events[key][1] or done
+
+        for ch in text:
+            state = self._state
+            if state == "start":
+                if ch == "{":
+                    self._state = "seek_key"
+            elif state == "seek_key":
+                if ch == '"':
+                    self._key_chars = []
+                    self._state = "key"
+                elif ch == "}":
+                    self._state = "end"
+            elif state == "key":
+                if self._escape is not None:
+                    self._key_chars.append(ch)
+                    self._escape = None
+                elif ch == "\\":
+                    self._escape = "\\"
+                elif ch == '"':
+                    self._current_key = "".join(self._key_chars)
+                    self._state = "colon"
+                else:
+                    self._key_chars.append(ch)
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value"
+            elif state == "value":
+                if ch.isspace():
+                    continue
+                if ch == '"':
+                    self._state = "string"
+                    if self._current_key in self.fields:
+                        self.values.setdefault(self._current_key, "")
+                elif ch in "{[":
+                    self._nested_depth = 1
+                    self._nested_in_string = False
+                    self._nested_escape = False
+                    self._state = "nested"
+                else:
+                    self._state = "scalar"
+            elif state == "string":
+                key = self._current_key
+                capture = key in self.fields
+                if self._escape is not None:
+                    self._escape += ch
+                    # \uXXXX は6文字、それ以外は2文字で完結する
+                    if self._escape.startswith("\\u") and len(self._escape) < 6:
+                        continue
+                    decoded = self._decode_escape(self._escape)
+                    self._escape = None
+                elif ch == "\\":
+                    self._escape = "\\"
+                    continue
+                elif ch == '"':
+                    decoded = "�" if self._high_surrogate is not None else ""
+                    self._high_surrogate = None
+                    self._state = "seek_key"
+                    if capture:
+                        self.values[key] += decoded
+                        self.completed.append(key)
+                        emit(key, decoded, True)
+                    continue
+                else:
+                    decoded = ch
+                    if self._high_surrogate is not None:
+                        decoded = "�" + ch
+                        self._high_surrogate = None
+                if capture and decoded:
+                    self.values[key] += decoded
+                    emit(key, decoded, False)
+            elif state == "nested":
+                if self._nested_in_string:
+                    if self._nested_escape:
+                        self._nested_escape = False
+                    elif ch == "\\":
+                        self._nested_escape = True
+                    elif ch == '"':
+                        self._nested_in_string = False
+                elif ch == '"':
+                    self._nested_in_string = True
+                elif ch in "{[":
+                    self._nested_depth += 1
+                elif ch in "}]":
+                    self._nested_depth -= 1
+                    if self._nested_depth == 0:
+                        self._state = "seek_key"
+            elif state == "scalar":
+                if ch == ",":
+                    self._state = "seek_key"
+                elif ch == "}":
+                    self._state = "end"
+
+        return [(key, events[key][0], events[key][1]) for key in order]
@@ -0,0 +1,185 @@
+import os
+import json
+import hashlib
+import logging
+import string
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import yaml
+from jinja2 import Template
+
+from app.core.config import settings
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class CompiledPrompt:
+    """コンパイル済みプロンプト
+
+    Jinja2テンプレート（{{ }} / {% %} を含むもの）、str.formatテンプレート（{name} を含むもの）、
+    プレーンテキストのいずれかとして一度だけ解析し、レンダリング時は解析結果を再利用する。
+    """
+
+    JINJA = "jinja"
+    FORMAT = "format"
+    TEXT = "text"
+
+    def __init__(self, text: str):
+        self.text = text
+        self._template: Optional[Template] = None
+        self.fields: tuple[str, ...] = ()
+
+        if "{{" in text or "{%" in text:
+            self.kind = self.JINJA
+            self._template = Template(text)
+        else:
+            fields = self._parse_format_fields(text)
+            if fields:
+                self.kind = self.FORMAT
+                self.fields = fields
+            else:
+                self.kind = self.TEXT
+
+    @staticmethod
+    def _parse_format_fields(text: str) -> tuple[str, ...]:
+        """str.format用のフィールド名を抽出する（JSON例などを含む場合は空を返す）"""
+        try:
+            names = [name for _, name, _, _ in string.Formatter().parse(text) if name is not None]
+        except ValueError:
+            return ()
+        if not names or not all(name.isidentifier() for name in names):
+            return ()
+        return tuple(dict.fromkeys(names))
+
+    def render(self, **kwargs) -> str:
+        """プロンプトを値で埋め込んで返す"""
+        if self.kind == self.JINJA:
+            return self._template.render(**kwargs)
+        if self.kind == self.FORMAT:
+            return self.text.format(**kwargs)
+        return self.text
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class PromptRegistry:
+    """プロンプトファイルを起動時に一度だけ読み込み・コンパイルしてメモリから提供するレジストリ
+
+    ファイルの更新時刻（mtime）が変わった場合のみ再読み込みする。
+    mtimeの確認はPROMPT_RELOAD_CHECK_INTERVAL秒ごとに間引く。
+    """
+
+    def __init__(self, path: Path, check_interval: float = None):
+        self.path = Path(path)
+        self.check_interval = settings.PROMPT_RELOAD_CHECK_INTERVAL if check_interval is None else check_interval
+        self._prompts: Dict[str, Dict[str, CompiledPrompt]] = {}
+        self._versions: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def _read_file(self) -> Dict[str, Any]:
+        """プロンプトファイル（JSONまたはYAML）を読み込む"""
+        path_str = str(self.path)
+        with open(self.path, mode='r', encoding='utf-8') as f:
+            content = f.read()
+
+        # ファイル拡張子で処理を分ける
+        if path_str.endswith('.json'):
+            return json.loads(content)
+        elif path_str.endswith('.yaml') or path_str.endswith('.yml'):
+            return yaml.safe_load(content) or {}
+        else:
+            raise ValueError(f"サポートされていないファイル形式です: {self.path}")
+
+    def load(self) -> None:
+        """プロンプトファイルを読み込み、全プロンプトをコンパイルする"""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                raw = self._read_file()
+                compiled = {
+                    section: {
+                        key: CompiledPrompt(value)
+                        for key, value in (entries or {}).items()
+                        if isinstance(value, str)
+                    }
+                    for section, entries in raw.items()
+                    if isinstance(entries, dict)
+                }
+                versions = {
+                    section: hashlib.sha256(
+                        json.dumps(entries, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+                    ).hexdigest()[:12]
+                    for section, entries in raw.items()
+                    if isinstance(entries, dict)
+                }
+            except Exception as e:
+                self.reload_errors += 1
+                if self._prompts:
+                    # 既に読み込み済みの場合は旧プロンプトを使い続ける
+                    logger.error(f"プロンプトファイルの再読み込みに失敗しました（旧版を継続使用）: {str(e)}")
+                    return
+                raise ValueError(f"プロンプトファイルの読み込みに失敗しました: {str(e)}")
+
+            self._prompts = compiled
+            self._versions = versions
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+            self.reloads += 1
+            logger.info(f"プロンプトファイルを読み込みました: {self.path} (セクション数: {len(compiled)})")
+
+    def _reload_if_changed(self) -> None:
+        """mtimeが変わっていれば再読み込みする"""
+        if self._mtime is None:
+            self.load()
+            return
+
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            logger.error(f"プロンプトファイルの確認に失敗しました: {str(e)}")
+            return
+        if mtime != self._mtime:
+            self.load()
+
+    def get_section(self, section: str) -> Dict[str, CompiledPrompt]:
+        """セクション（interview_question / evaluation / detailed_feedback など）を取得する"""
+        self._reload_if_changed()
+        self.hits += 1
+        return self._prompts.get(section, {})
+
+    def get(self, section: str, key: str) -> Optional[CompiledPrompt]:
+        """セクション内の個別プロンプトを取得する"""
+        return self.get_section(section).get(key)
+
+    def version(self, section: str) -> str:
+        """セクションの内容から求めたバージョン（プロンプトを変更すると変わる）"""
+        self._reload_if_changed()
+        return self._versions.get(section, "")
+
+    def stats(self) -> Dict[str, Any]:
+        """メトリクス用の統計情報を返す"""
+        return {
+            "hits": self.hits,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "sections": len(self._prompts),
+        }
+
+
+# 面接プロンプト用のレジストリインスタンス
+prompt_registry = PromptRegistry(settings.INTERVIEW_QUESTIONS_PROMPT_PATH)
@@ -0,0 +1,58 @@
+import time
+import logging
+import importlib
+from typing import Dict, Any
+
+from uvicorn_worker import UvicornWorker
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# アプリのインポート時には読み込まず、最初のクライアント作成時に読み込む外部APIのSDK
+DEFERRED_SDK_MODULES = ("openai", "google.cloud.speech_v1")
+
+
+def preload_sdks() -> None:
+    """外部APIのSDKをマスタープロセスで読み込む（gunicornのpreload_app時、fork前に呼び出す）
+
+    読み込み済みのモジュールはfork後の各ワーカーで共有されるため、ワーカーの準備処理が速くなる。
+    接続（gRPCチャネル・コネクションプール）はfork後に各ワーカーで作成する。
+    """
+    started = time.perf_counter()
+    for name in DEFERRED_SDK_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"SDKの事前読み込みに失敗しました（{name}）: {str(e)}")
+    logger.info(f"外部APIのSDKを事前に読み込みました: {time.perf_counter() - started:.2f}秒")
+
+
+def _event_loop_settings() -> Dict[str, Any]:
+    """uvloop・httptoolsがインストールされていれば使い、なければ標準のasyncio・h11にする"""
+    options = {}
+    try:
+        import uvloop  # noqa: F401
+        options["loop"] = "uvloop"
+    except ImportError:
+        options["loop"] = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        options["http"] = "httptools"
+    except ImportError:
+        options["http"] = "h11"
+    return options
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """本番用のgunicornワーカー（gunicorn.conf.pyのworker_classで指定する）
+
+    uvloop・httptoolsを使い、終了時はgunicornのgraceful_timeoutの範囲で
+    実行中のリクエスト（音声合成・音声認識など）の完了を待ってからlifespanの終了処理を行う。
+    """
+
+    CONFIG_KWARGS: Dict[str, Any] = _event_loop_settings()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # gunicornが強制終了する前にlifespanの終了処理（ログの書き出しなど）を行えるよう、数秒の余裕を残す
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - 5)
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import secrets
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+from app.core.config import settings
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# リクエストIDと実行中のスパン（非同期タスクごとに引き継がれる）
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+current_span_var: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """ログレコードに現在のリクエストIDとトレースIDを付与するフィルター
+
+    QueueHandler側（ログを出したスレッド・タスク）で実行する必要がある。
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        span = current_span_var.get()
+        record.trace_id = span.trace_id if span is not None else "-"
+        return True
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """トレースの1区間（OpenTelemetryのスパンと同じ項目を持つ）"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "events", "status", "status_message")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[tuple[str, int, Dict[str, Any]]] = []
+        self.status = "UNSET"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append((name, time.time_ns(), attributes))
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = "ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSONのSpan表現に変換する"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 2 if self.parent_span_id is None else 1,  # SERVER / INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "events": [
+                {
+                    "name": name,
+                    "timeUnixNano": str(timestamp),
+                    "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+                }
+                for name, timestamp, attributes in self.events
+            ],
+            "status": {"code": {"UNSET": 0, "OK": 1, "ERROR": 2}[self.status], "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class SpanExporter:
+    """終了したスパンをバックグラウンドスレッドでまとめて出力する
+
+    file: OTLP/JSON形式（1行1リクエスト分のresourceSpans）でファイルに追記する
+    otlp: OTLP/HTTPのJSONエンコーディングでコレクターへ送信する
+    """
+
+    def __init__(self, exporter: str, file_path: str, endpoint: str, service_name: str, batch_size: int = 256, flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.file_path = file_path
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+        self.export_errors = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def export(self, span: Span) -> None:
+        self.start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            spans: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(spans) < self.batch_size:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                spans.append(span)
+            if spans:
+                self._write(spans)
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+
+    def _write(self, spans: List[Span]) -> None:
+        payload = self._payload(spans)
+        try:
+            if self.exporter == "otlp":
+                import httpx
+                response = httpx.post(self.endpoint, json=payload, timeout=5.0)
+                response.raise_for_status()
+            else:
+                directory = os.path.dirname(self.file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            self.exported += len(spans)
+        except Exception as e:
+            self.export_errors += 1
+            logger.warning(f"スパンの出力に失敗しました: {str(e)}")
+
+
+class Tracer:
+    """リクエスト単位のトレースを作成するトレーサー
+
+    TRACING_ENABLEDがfalseの場合、spanは何も記録しない。
+    """
+
+    def __init__(self):
+        self.enabled = settings.TRACING_ENABLED
+        self.sample_rate = settings.TRACING_SAMPLE_RATE
+        self.exporter = SpanExporter(
+            exporter=settings.TRACING_EXPORTER.lower(),
+            file_path=settings.TRACING_FILE,
+            endpoint=settings.TRACING_OTLP_ENDPOINT,
+            service_name=settings.TRACING_SERVICE_NAME,
+        )
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """現在のスパンの子スパンを作成する（トレース外・無効時は何もしない）"""
+        parent = current_span_var.get()
+        if not self.enabled or parent is None:
+            yield None
+            return
+        span = Span(name, parent.trace_id, parent.span_id, attributes)
+        current_span_var.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            # ストリーミングレスポンスでは別のコンテキストで終了することがあるため、tokenではなく値で戻す
+            current_span_var.set(parent)
+            self.exporter.export(span)
+
+    @contextmanager
+    def root_span(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+        """リクエストのルートスパンを作成する（traceparentヘッダーがあればそのトレースを引き継ぐ）"""
+        trace_id, parent_span_id = None, None
+        if traceparent:
+            parts = traceparent.split("-")
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                trace_id, parent_span_id = parts[1], parts[2]
+        if not self.enabled or (trace_id is None and secrets.randbelow(10**6) >= self.sample_rate * 10**6):
+            yield None
+            return
+        span = Span(name, trace_id or secrets.token_hex(16), parent_span_id, attributes)
+        previous = current_span_var.get()
+        current_span_var.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            current_span_var.set(previous)
+            self.exporter.export(span)
+
+    def shutdown(self) -> None:
+        self.exporter.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        return {
+            "enabled": self.enabled,
+            "exported_spans": self.exporter.exported,
+            "dropped_spans": self.exporter.dropped,
+            "export_errors": self.exporter.export_errors,
+        }
+
+
+# アプリケーション全体で共有するトレーサー
+tracer = Tracer()
+atexit.register(tracer.shutdown)
+
+
+def traced(name: str) -> Callable:
+    """非同期関数の実行をスパンとして記録するデコレーター"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """リクエストIDの付与とルートスパンの作成を行うASGIミドルウェア
+
+    X-Request-IDヘッダーがあればその値を、なければ新しいIDを使い、レスポンスヘッダーにも返す。
+    リクエストIDはトレースの有効・無効にかかわらずすべてのログ行に付与される。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        request_id = headers.get("x-request-id") or uuid.uuid4().hex
+        request_id_var.set(request_id)
+        method = scope.get("method", "WEBSOCKET")
+
+        with tracer.root_span(
+            f"{method} {scope.get('path', '')}",
+            traceparent=headers.get("traceparent"),
+            **{"http.method": method, "http.target": scope.get("path", ""), "request.id": request_id}
+        ) as span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    if span is not None:
+                        # ハンドラー終了からここまでがレスポンスのシリアライズ時間
+                        span.add_event("response.start")
+                        span.set_attribute("http.status_code", message["status"])
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if span is not None and getattr(route, "path", None):
+                    span.name = f"{method} {route.path}"
+                    span.set_attribute("http.route", route.path)
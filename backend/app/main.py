@@ -1,24 +1,84 @@
+import asyncio
 import logging
 import os
-from fastapi import FastAPI, APIRouter
+import time
+import secrets
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+from fastapi import FastAPI, APIRouter, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+# ロギングの初期化（ルータやサービスのインポートより前に1度だけ行う）
+from app.core.logger import setup_logger
+logger = setup_logger()
+
+from app.core.config import settings
+from app.core.metrics import metrics, MetricsMiddleware
+from app.core.tracing import TracingMiddleware
 
 # APIルータのインポート
 try:
     from app.api.routes import interview
-    from app.core.logger import setup_logger
     from app.api.routes import logs
-    
-    # ロガーの初期化（try内で例外を捕捉できるようにする）
-    logger = setup_logger()
+    from app.api.routes import admin
+    from app.api.dependencies import get_openai_service, get_google_cloud_service, get_session_store
+    from app.core.access_log import access_log_writer
+    from app.core.loop_monitor import loop_monitor
 except Exception as e:
     print(f"アプリケーションの初期化中にエラーが発生しました: {str(e)}")
-    logger = logging.getLogger()
+
+async def warm_up(app: FastAPI) -> None:
+    """外部APIのSDKの読み込み・クライアントの作成・事前接続を行い、完了したら準備完了にする"""
+    started = time.perf_counter()
+    # OpenAI APIクライアントの作成と事前接続、Speech-to-Text APIクライアントの作成
+    # （gunicornのpreload_appではfork後の各ワーカーで実行される）
+    try:
+        await asyncio.gather(get_openai_service().start(), get_google_cloud_service().start())
+    except Exception as e:
+        # 準備ができていない状態（/api/readyが503）のまま起動を続ける
+        logger.error(f"起動時の準備処理に失敗しました: {str(e)}", exc_info=True)
+        return
+    app.state.ready = True
+    logger.info(f"起動時の準備処理が完了しました: {time.perf_counter() - started:.2f}秒")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """アプリケーションの起動・終了処理"""
+    app.state.ready = False
+    # イベントループの遅延計測・ブロッキング検出を開始
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    # アクセスログの書き込みタスクを開始
+    access_log_writer.start()
+    # サービスを作成する（SDKの読み込みとクライアントの作成は準備処理で行う）
+    get_openai_service()
+    get_google_cloud_service()
+    get_session_store()
+    # 準備処理をバックグラウンドで行う場合は、完了を待たずにリクエストの受け付け（/api/health）を始める
+    warmup_task = asyncio.create_task(warm_up(app))
+    if not settings.STARTUP_WARMUP_IN_BACKGROUND:
+        await warmup_task
+    yield
+    app.state.ready = False
+    # 準備処理が終わる前に終了する場合は中断する
+    if not warmup_task.done():
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    # 実行中のリクエストはサーバー側で完了を待った後にここへ来る。残っている音声認識のスレッドの完了を待つ
+    await get_google_cloud_service().close()
+    # OpenAI APIクライアントのコネクションプールを閉じる
+    await get_openai_service().close()
+    # 書き込み待ちのアクセスログを書き出してから終了
+    await access_log_writer.stop()
+    loop_monitor.stop()
 
 app = FastAPI(
     title="AI面接システム",
     description="AI面接を行うためのAPIサービス",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定
@@ -35,9 +95,27 @@ try:
     # 直接ルーターを追加（interview.py内のprefixが既に/api/interviewなので、追加のprefixは不要）
     app.include_router(interview.router)
     app.include_router(logs.router)
+    # 管理用エンドポイントはトークンが設定されている場合のみ公開する
+    if settings.ADMIN_API_TOKEN:
+        app.include_router(admin.router)
 except Exception as e:
     print(f"APIルーターの統合中にエラーが発生しました: {str(e)}")
 
+# メトリクス（ルートごとの処理時間の計測と/metricsエンドポイント）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    # 内部の統計情報を含むため、トークンが設定されている場合のみ公開する
+    if settings.METRICS_TOKEN:
+        @app.get("/metrics", include_in_schema=False)
+        async def get_metrics(authorization: Optional[str] = Header(None)):
+            if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+                raise HTTPException(status_code=401, detail="メトリクスのトークンが正しくありません")
+            return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# リクエストIDの付与とトレース（最も外側で実行し、他のミドルウェアのログにもリクエストIDを付ける）
+app.add_middleware(TracingMiddleware)
+
 @app.get("/")
 async def root():
     try:
@@ -48,4 +126,22 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    """プロセスが応答できるか（liveness）"""
+    return {"status": "healthy"}
+
+@app.get("/api/ready")
+async def readiness_check():
+    """リクエストを受け付けられるか（readiness）
+    
+    起動時の準備処理が完了し、外部APIのクライアントが準備できている場合のみ200を返す。
+    準備処理中・終了処理中・クライアントの作成に失敗した場合は503を返す。
+    """
+    checks = {
+        "openai": get_openai_service().readiness(),
+        "google_speech": get_google_cloud_service().readiness(),
+    }
+    ready = getattr(app.state, "ready", False) and all(check["ready"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "pid": os.getpid(), "checks": checks}
+    )
\ No newline at end of file
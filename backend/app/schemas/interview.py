@@ -106,4 +106,31 @@ class FeedbackEvaluation(BaseModel):
 # 詳細フィードバックレスポンス
 class DetailedFeedbackResponse(BaseModel):
     """詳細フィードバックレスポンス"""
-    feedbacks: List[Optional[FeedbackEvaluation]] = Field(..., description="各QAの評価結果、未評価の場合はNull") 
\ No newline at end of file
+    feedbacks: List[Optional[FeedbackEvaluation]] = Field(..., description="各QAの評価結果、未評価の場合はNull")
+
+
+# 面接セッション作成リクエスト
+class SessionCreateRequest(BaseModel):
+    """面接セッション作成リクエスト"""
+    mode: InterviewMode = Field(default=InterviewMode.GENERAL, description="面接モード")
+    resume: Optional[str] = Field(default=None, description="応募者の履歴書（personalizedモードのみ）")
+    job_description: Optional[str] = Field(default=None, description="求人情報（personalizedモードのみ）")
+
+
+# 面接セッション作成レスポンス
+class SessionCreateResponse(BaseModel):
+    """面接セッション作成レスポンス"""
+    session_id: str = Field(..., description="セッションID")
+
+
+# 面接セッションのターン送信リクエスト
+class SessionTurnRequest(BaseModel):
+    """面接セッションに新しいターンを追加して次の質問を生成するリクエスト"""
+    messages: List[MessageHistory] = Field(default=[], description="前回から追加されたメッセージ（通常は応募者の回答のみ）")
+
+
+# 面接セッションの評価リクエスト
+class SessionEvaluationRequest(BaseModel):
+    """面接セッションの対話履歴を評価するリクエスト"""
+    messages: List[MessageHistory] = Field(default=[], description="前回の質問生成以降に追加され、まだ保存されていないメッセージ（最後の回答など）")
+    language: str = Field(default="en", description="言語設定（en/ja）")
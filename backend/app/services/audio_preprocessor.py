@@ -0,0 +1,449 @@
+import io
+import math
+import time
+import struct
+import logging
+import operator
+import warnings
+import threading
+import importlib.util
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    # Python 3.13で削除されたため、使える場合のみフレームごとのRMSの計算に使う
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:
+    audioop = None
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# Opusでエンコードできるサンプルレート（それ以外はFLACで再エンコードする）
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+# Opusエンコーダーの計算量（0〜10、既定の10より下げてもサイズはほぼ変わらずCPU時間が3割ほど減る）
+OPUS_COMPRESSION_LEVEL = "5"
+# 変換後のサイズが小さくならなくても、音声がこの割合以上短くなれば変換後の音声を使う
+MIN_TRIM_RATIO = 0.1
+# 元の音声のビットレートが再エンコード後の何倍以下なら、短くならない場合に再エンコードを省くか
+MAX_PASSTHROUGH_BITRATE_RATIO = 2.0
+
+# WebM（Matroska）の要素ID
+_EBML_HEADER = 0x1A45DFA3
+_EBML_SEGMENT = 0x18538067
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_AUDIO = 0xE1
+_EBML_CLUSTER = 0x1F43B675
+_EBML_CODEC_ID = 0x86
+_EBML_SAMPLING_FREQUENCY = 0xB5
+_EBML_CHANNELS = 0x9F
+# 中身を読み進める（子要素を持つ）要素
+_EBML_MASTERS = (_EBML_HEADER, _EBML_SEGMENT, _EBML_TRACKS, _EBML_TRACK_ENTRY, _EBML_AUDIO)
+
+
+class AudioFormat:
+    """音声データの形式
+
+    encodingはSpeech-to-TextのRecognitionConfig.AudioEncodingの名前。
+    APIがそのまま受け付けない形式（MP4/AACなど）の場合はNone。
+    """
+
+    def __init__(self, container: str, encoding: Optional[str], sample_rate: Optional[int], channels: Optional[int] = None):
+        self.container = container
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "container": self.container,
+            "encoding": self.encoding,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+        }
+
+    def __repr__(self) -> str:
+        return f"AudioFormat({self.container}, {self.encoding}, {self.sample_rate}Hz, {self.channels}ch)"
+
+
+def _read_vint(data: bytes, pos: int, keep_marker: bool) -> Tuple[int, int, bool]:
+    """EBMLの可変長整数を読み、(値, バイト数, 全ビットが1か（サイズ不明）) を返す"""
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise ValueError("不正なEBMLの可変長整数です")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for i in range(1, length):
+        value = (value << 8) | data[pos + i]
+        all_ones = all_ones and data[pos + i] == 0xFF
+    return value, length, all_ones
+
+
+def _detect_webm(data: bytes) -> AudioFormat:
+    """WebMのトラック情報から音声のコーデック・サンプルレート・チャンネル数を読む
+
+    MediaRecorderが出力するWebMはSegmentのサイズが不明のため、子要素を持つ要素は
+    サイズで読み飛ばさずに中へ進み、最初のClusterに達した時点で終える。
+    """
+    codec = sample_rate = channels = None
+    pos = 0
+    try:
+        while pos < len(data):
+            element_id, length, _ = _read_vint(data, pos, keep_marker=True)
+            pos += length
+            size, length, unknown_size = _read_vint(data, pos, keep_marker=False)
+            pos += length
+            if element_id == _EBML_CLUSTER:
+                break
+            if element_id in _EBML_MASTERS:
+                continue
+            value = data[pos:pos + size]
+            if element_id == _EBML_CODEC_ID and codec is None:
+                name = value.decode("ascii", errors="replace")
+                # 映像トラックのコーデックは無視する
+                if name.startswith("A_"):
+                    codec = name
+            elif element_id == _EBML_SAMPLING_FREQUENCY and sample_rate is None and size in (4, 8):
+                sample_rate = int(struct.unpack(">f" if size == 4 else ">d", value)[0])
+            elif element_id == _EBML_CHANNELS and channels is None:
+                channels = int.from_bytes(value, "big")
+            if unknown_size:
+                break
+            pos += size
+    except (ValueError, IndexError, struct.error):
+        pass
+    encoding = "WEBM_OPUS" if codec in (None, "A_OPUS") else None
+    return AudioFormat("webm", encoding, sample_rate, channels)
+
+
+def _detect_ogg(data: bytes) -> AudioFormat:
+    # 最初のページの最初のパケットがコーデックのヘッダー
+    header_size = 27 + data[26]
+    packet = data[header_size:header_size + 19]
+    if packet.startswith(b"OpusHead") and len(packet) >= 16:
+        channels = packet[9]
+        input_rate = struct.unpack("<I", packet[12:16])[0]
+        # Opusは内部的に48kHzで復号するため、元のサンプルレートが対応外の場合は48kHzとする
+        sample_rate = input_rate if input_rate in OPUS_SAMPLE_RATES else 48000
+        return AudioFormat("ogg", "OGG_OPUS", sample_rate, channels)
+    return AudioFormat("ogg", None, None)
+
+
+def _detect_wav(data: bytes) -> AudioFormat:
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack("<I", data[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", data[pos + 8:pos + 24])
+            if audio_format == 1 and bits == 16:
+                encoding = "LINEAR16"
+            elif audio_format == 7 and bits == 8:
+                encoding = "MULAW"
+            else:
+                encoding = None
+            return AudioFormat("wav", encoding, sample_rate, channels)
+        pos += 8 + chunk_size + (chunk_size & 1)
+    return AudioFormat("wav", None, None)
+
+
+def _detect_flac(data: bytes) -> AudioFormat:
+    # STREAMINFOブロック（メタデータの先頭）の10バイト目からサンプルレート20ビット・チャンネル数3ビット
+    info = data[8:8 + 13]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    channels = ((info[12] >> 1) & 0x07) + 1
+    return AudioFormat("flac", "FLAC", sample_rate, channels)
+
+
+def detect_audio_format(data: bytes) -> Optional[AudioFormat]:
+    """ヘッダーから音声の形式を判定する（判定できない場合はNone）"""
+    try:
+        if data[:4] == b"\x1a\x45\xdf\xa3":
+            return _detect_webm(data)
+        if data[:4] == b"OggS" and len(data) > 27:
+            return _detect_ogg(data)
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+            return _detect_wav(data)
+        if data[:4] == b"fLaC" and len(data) >= 21:
+            return _detect_flac(data)
+        if data[4:8] == b"ftyp":
+            # Safariなどが録音するMP4（AAC）はAPIが直接受け付けない
+            return AudioFormat("mp4", None, None)
+    except (IndexError, struct.error):
+        pass
+    return None
+
+
+class PreprocessedAudio:
+    """前処理後の音声データと形式"""
+
+    def __init__(
+        self,
+        content: bytes,
+        audio_format: Optional[AudioFormat],
+        original_size: int,
+        original_duration_ms: Optional[float] = None,
+        duration_ms: Optional[float] = None,
+        transcoded: bool = False,
+    ):
+        self.content = content
+        self.audio_format = audio_format
+        self.original_size = original_size
+        self.original_duration_ms = original_duration_ms
+        self.duration_ms = duration_ms
+        self.transcoded = transcoded
+
+    @property
+    def is_silent(self) -> bool:
+        """復号した結果、発話が含まれていなかったか"""
+        return self.duration_ms == 0
+
+
+def _frame_rms(pcm: bytes, frame_samples: int) -> List[float]:
+    """16bitのPCMをframe_samplesサンプルごとに区切り、各フレームのRMSを返す（最後のフレームは端数のみ）
+
+    numpyまたはaudioopがあればまとめて計算し、どちらもない場合のみサンプルごとにPythonで計算する。
+    """
+    frame_bytes = frame_samples * 2
+    if numpy is not None:
+        samples = numpy.frombuffer(pcm, dtype=numpy.int16).astype(numpy.float64)
+        starts = numpy.arange(0, len(samples), frame_samples)
+        if not len(starts):
+            return []
+        sums = numpy.add.reduceat(samples * samples, starts)
+        lengths = numpy.diff(numpy.append(starts, len(samples)))
+        return numpy.sqrt(sums / lengths).tolist()
+    if audioop is not None:
+        return [audioop.rms(pcm[offset:offset + frame_bytes], 2) for offset in range(0, len(pcm), frame_bytes)]
+    samples = array("h")
+    samples.frombytes(pcm)
+    return [
+        math.sqrt(sum(map(operator.mul, frame, frame)) / len(frame))
+        for frame in (samples[offset:offset + frame_samples] for offset in range(0, len(samples), frame_samples))
+    ]
+
+
+class AudioPreprocessor:
+    """音声認識に送る前の音声の前処理
+
+    ヘッダーから形式（エンコーディング・サンプルレート・チャンネル数）を判定し、
+    PyAV（任意の依存パッケージ）があれば音声を復号して以下を行う。
+    - モノラル化と、音声認識に十分なサンプルレート（既定16kHz）へのリサンプリング
+    - フレームごとの音量による無音判定で、発話の前後と発話間の長い無音を除去
+    - Opus（Ogg）での再エンコード（対応外のサンプルレートの場合はFLAC）
+    変換後の音声が元より小さくも短くもならない場合や、復号に失敗した場合は元の音声をそのまま使う。
+    PyAVがない場合は形式の判定のみ行う。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = None,
+        downmix: bool = None,
+        bitrate: int = None,
+        vad_enabled: bool = None,
+        vad_threshold_dbfs: float = None,
+        vad_frame_ms: int = None,
+        vad_padding_ms: int = None,
+    ):
+        self.sample_rate = settings.STT_PREPROCESS_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.downmix = settings.STT_PREPROCESS_DOWNMIX if downmix is None else downmix
+        self.bitrate = settings.STT_PREPROCESS_BITRATE if bitrate is None else bitrate
+        self.vad_enabled = settings.STT_VAD_ENABLED if vad_enabled is None else vad_enabled
+        self.vad_threshold_dbfs = settings.STT_VAD_THRESHOLD_DBFS if vad_threshold_dbfs is None else vad_threshold_dbfs
+        self.vad_frame_ms = max(10, settings.STT_VAD_FRAME_MS if vad_frame_ms is None else vad_frame_ms)
+        self.vad_padding_ms = settings.STT_VAD_PADDING_MS if vad_padding_ms is None else vad_padding_ms
+
+        # PyAVの読み込みには時間がかかるため、有無だけ確認してインポートはload()か最初の利用時に行う
+        self.available = importlib.util.find_spec("av") is not None
+        if not self.available:
+            logger.warning("PyAV（av）がインストールされていないため、音声の無音除去・変換を行わず形式の判定のみ行います")
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.transcoded = 0
+        self.passthrough = 0
+        self.silent = 0
+        self.errors = 0
+        self.undetected = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.audio_ms_in = 0.0
+        self.audio_ms_out = 0.0
+        self.processing_ms = 0.0
+
+    def load(self) -> None:
+        """PyAVを読み込んでおく（起動時の準備処理でスレッドから呼び出す）"""
+        if self.available:
+            import av  # noqa: F401
+
+    def process(self, data: bytes) -> PreprocessedAudio:
+        """音声を前処理する（CPUを使うため、イベントループではなくスレッドで呼び出す）"""
+        started = time.perf_counter()
+        audio_format = detect_audio_format(data)
+        result = None
+        if self.available:
+            try:
+                result = self._transcode(data, audio_format)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning(f"音声の前処理に失敗したため元の音声を使います（{audio_format}）: {str(e)}")
+        if result is None:
+            result = PreprocessedAudio(data, audio_format, len(data))
+
+        with self._lock:
+            self.requests += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(result.content)
+            self.processing_ms += (time.perf_counter() - started) * 1000
+            if audio_format is None:
+                self.undetected += 1
+            if result.is_silent:
+                self.silent += 1
+            elif result.transcoded:
+                self.transcoded += 1
+            else:
+                self.passthrough += 1
+            if result.original_duration_ms is not None:
+                self.audio_ms_in += result.original_duration_ms
+                self.audio_ms_out += result.duration_ms if result.transcoded else result.original_duration_ms
+        return result
+
+    # --- 復号・無音除去・再エンコード（PyAV） ---
+
+    def _transcode(self, data: bytes, audio_format: Optional[AudioFormat]) -> PreprocessedAudio:
+        pcm, sample_rate, channels = self._decode(data)
+        bytes_per_ms = sample_rate * channels * 2 / 1000
+        original_duration_ms = len(pcm) / bytes_per_ms if bytes_per_ms else 0.0
+
+        if self.vad_enabled:
+            pcm = self._trim_silence(pcm, sample_rate, channels)
+        duration_ms = len(pcm) / bytes_per_ms if bytes_per_ms else 0.0
+        if not pcm:
+            return PreprocessedAudio(b"", audio_format, len(data), original_duration_ms, 0.0, transcoded=True)
+
+        # 元の形式のままAPIに送れる場合は、小さくも短くもならなければ元の音声を使う
+        supported = audio_format is not None and audio_format.encoding is not None
+        trimmed = duration_ms <= original_duration_ms * (1 - MIN_TRIM_RATIO)
+        original_bitrate = len(data) * 8000 / original_duration_ms if original_duration_ms else 0.0
+        passthrough = PreprocessedAudio(data, audio_format, len(data), original_duration_ms, original_duration_ms)
+        if supported and not trimmed and original_bitrate <= self.bitrate * MAX_PASSTHROUGH_BITRATE_RATIO:
+            # 再エンコードしてもほとんど小さくならないため、エンコードを省く
+            return passthrough
+        content, output_format = self._encode(pcm, sample_rate, channels)
+        if supported and not trimmed and len(content) >= len(data):
+            return passthrough
+        return PreprocessedAudio(content, output_format, len(data), original_duration_ms, duration_ms, transcoded=True)
+
+    def _decode(self, data: bytes) -> Tuple[bytes, int, int]:
+        """音声を16bitのPCM（インターリーブ）に復号し、(PCM, サンプルレート, チャンネル数) を返す"""
+        import av
+
+        with av.open(io.BytesIO(data), mode="r") as container:
+            stream = container.streams.audio[0]
+            sample_rate = self.sample_rate or stream.rate
+            layout = "mono" if self.downmix else stream.layout.name
+            resampler = av.AudioResampler(format="s16", layout=layout, rate=sample_rate)
+            chunks: List[bytes] = []
+            channels = 1
+
+            def append(frames) -> None:
+                nonlocal channels
+                for frame in frames:
+                    channels = len(frame.layout.channels)
+                    # 平面のバッファには末尾に余白があるため、サンプル数分だけ取り出す
+                    chunks.append(bytes(frame.planes[0])[:frame.samples * channels * 2])
+
+            for frame in container.decode(stream):
+                append(resampler.resample(frame))
+            append(resampler.resample(None))
+        return b"".join(chunks), sample_rate, channels
+
+    def _trim_silence(self, pcm: bytes, sample_rate: int, channels: int) -> bytes:
+        """音量がしきい値未満のフレームを無音とし、発話の前後パディング分を残して除去する
+
+        発話間の無音もパディングの2倍を超える分は除去される。
+        """
+        pcm = pcm[:len(pcm) // 2 * 2]
+        frame_samples = max(1, sample_rate * self.vad_frame_ms // 1000) * channels
+        frame_count = math.ceil(len(pcm) // 2 / frame_samples)
+        threshold = 32768 * 10 ** (self.vad_threshold_dbfs / 20)
+
+        speech = [rms >= threshold for rms in _frame_rms(pcm, frame_samples)]
+        if not any(speech):
+            return b""
+
+        # 直近の発話フレームからの距離がパディング以内のフレームを残す
+        padding = math.ceil(self.vad_padding_ms / self.vad_frame_ms)
+        keep = [False] * frame_count
+        last = -padding - 1
+        for i in range(frame_count):
+            if speech[i]:
+                last = i
+            keep[i] = i - last <= padding
+        last = frame_count + padding + 1
+        for i in reversed(range(frame_count)):
+            if speech[i]:
+                last = i
+            keep[i] = keep[i] or last - i <= padding
+
+        frame_bytes = frame_samples * 2
+        return b"".join(pcm[i * frame_bytes:(i + 1) * frame_bytes] for i in range(frame_count) if keep[i])
+
+    def _encode(self, pcm: bytes, sample_rate: int, channels: int) -> Tuple[bytes, AudioFormat]:
+        """PCMをOpus（Ogg）またはFLACにエンコードする"""
+        import av
+
+        opus = sample_rate in OPUS_SAMPLE_RATES
+        layout = "mono" if channels == 1 else "stereo" if channels == 2 else f"{channels}c"
+        buffer = io.BytesIO()
+        with av.open(buffer, mode="w", format="ogg" if opus else "flac") as container:
+            options = {"compression_level": OPUS_COMPRESSION_LEVEL} if opus else {}
+            stream = container.add_stream("libopus" if opus else "flac", rate=sample_rate, layout=layout, options=options)
+            if opus:
+                stream.bit_rate = self.bitrate
+            frame = av.AudioFrame(format="s16", layout=layout, samples=len(pcm) // (2 * channels))
+            frame.planes[0].update(pcm)
+            frame.sample_rate = sample_rate
+            frame.pts = 0
+            for packet in stream.encode(frame):
+                container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+        if opus:
+            return buffer.getvalue(), AudioFormat("ogg", "OGG_OPUS", sample_rate, channels)
+        return buffer.getvalue(), AudioFormat("flac", "FLAC", sample_rate, channels)
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        with self._lock:
+            return {
+                "available": self.available,
+                "requests": self.requests,
+                "transcoded": self.transcoded,
+                "passthrough": self.passthrough,
+                "silent": self.silent,
+                "errors": self.errors,
+                "undetected": self.undetected,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved_ratio": 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+                "audio_ms_in": self.audio_ms_in,
+                "audio_ms_out": self.audio_ms_out,
+                "processing_ms": self.processing_ms,
+            }
@@ -1,22 +1,193 @@
 import os
 import logging
 import io
-from google.cloud import speech_v1 as speech
-from google.api_core.exceptions import GoogleAPIError
-from typing import Optional
+import asyncio
+import functools
+import contextvars
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncIterator
 
 from app.core.config import settings
+from app.core.metrics import AUDIO_BYTES, track_upstream
+from app.core.tracing import tracer
+from app.services.audio_preprocessor import AudioFormat, AudioPreprocessor, PreprocessedAudio, detect_audio_format
+
+if TYPE_CHECKING:
+    from google.cloud import speech_v1 as speech
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+
+def create_speech_client() -> "speech.SpeechClient":
+    """Speech-to-Text APIクライアントを作成する
+
+    GOOGLE_SPEECH_EMULATOR_HOSTが設定されている場合は、認証なしのgRPCチャネルでエミュレーターに接続する。
+    google-cloud-speech（gRPC・protobuf）の読み込みには時間がかかるため、インポートはクライアントの作成時に行う。
+    """
+    from google.cloud import speech_v1 as speech
+
+    if settings.GOOGLE_SPEECH_EMULATOR_HOST:
+        import grpc
+        from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+
+        logger.info(f"Speech-to-Textエミュレーターに接続します: {settings.GOOGLE_SPEECH_EMULATOR_HOST}")
+        channel = grpc.insecure_channel(settings.GOOGLE_SPEECH_EMULATOR_HOST)
+        return speech.SpeechClient(transport=SpeechGrpcTransport(channel=channel))
+    # 環境変数から認証情報を読み取り（GOOGLE_APPLICATION_CREDENTIALS）
+    return speech.SpeechClient()
+
+
 class GoogleCloudService:
     """Google Cloudのサービスを扱うクラス"""
     
     def __init__(self):
-        """Google Cloud Speech-to-Text APIクライアントの初期化"""
-        # 環境変数から認証情報を読み取り（GOOGLE_APPLICATION_CREDENTIALS）
-        self.speech_client = speech.SpeechClient()
+        """Google Cloud Speech-to-Text APIクライアントの初期化
+        
+        gRPCのチャネルはforkをまたいで使えないため、クライアントはワーカーのlifespanでstart()により作成する。
+        start()前に使用された場合は最初のアクセス時に作成する。
+        """
+        self._speech_client: Optional["speech.SpeechClient"] = None
+        self._client_error: Optional[str] = None
+        
+        # 同期APIのrecognizeはイベントループを塞がないよう専用スレッドプールで実行する
+        self.max_concurrency = max(1, settings.STT_MAX_CONCURRENCY)
+        self.max_queue_size = settings.STT_MAX_QUEUE_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="stt")
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # ストリーミング認識は発話中ずっとスレッドを占有するため別のスレッドプールで実行する
+        self.max_streaming_sessions = max(1, settings.STT_STREAMING_MAX_SESSIONS)
+        self._streaming_executor = ThreadPoolExecutor(
+            max_workers=self.max_streaming_sessions, thread_name_prefix="stt-stream"
+        )
+        self.streaming_sessions = 0
+        
+        # 音声認識前の無音除去・変換（無効の場合も形式の判定は行う）
+        # CPUを使う処理のため、認識とは別の小さいスレッドプールで実行する
+        self.preprocessor = AudioPreprocessor() if settings.STT_PREPROCESS_ENABLED else None
+        self._preprocess_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.STT_PREPROCESS_CONCURRENCY), thread_name_prefix="stt-preprocess"
+        )
+        
+        # キュー深度などのメトリクス
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.total_requests = 0
+        self.rejected_requests = 0
+    
+    @property
+    def speech_client(self) -> "speech.SpeechClient":
+        if self._speech_client is None:
+            self._speech_client = create_speech_client()
+        return self._speech_client
+    
+    async def start(self) -> None:
+        """クライアントを作成する（認証情報の読み込みを含むためスレッドで実行する。lifespanから呼び出す）"""
+        if self.preprocessor is not None:
+            try:
+                await asyncio.to_thread(self.preprocessor.load)
+            except Exception as e:
+                logger.warning(f"音声の前処理の準備に失敗しました: {str(e)}")
+        if self._speech_client is not None:
+            return
+        try:
+            self._speech_client = await asyncio.to_thread(create_speech_client)
+            self._client_error = None
+        except Exception as e:
+            # 認証情報がない場合なども起動は続け、準備状態（readiness）で知らせる
+            self._client_error = str(e)
+            logger.error(f"Speech-to-Text APIクライアントの作成に失敗しました: {str(e)}")
+    
+    async def close(self) -> None:
+        """実行中の音声認識の完了を待ってスレッドプールを停止する"""
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+        await asyncio.to_thread(self._streaming_executor.shutdown, wait=True)
+        await asyncio.to_thread(self._preprocess_executor.shutdown, wait=True)
+    
+    def readiness(self) -> Dict[str, Any]:
+        """準備状態（クライアントが作成済みか）を返す"""
+        return {"ready": self._speech_client is not None, "error": self._client_error}
+    
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "total_requests": self.total_requests,
+            "rejected_requests": self.rejected_requests,
+            "max_streaming_sessions": self.max_streaming_sessions,
+            "streaming_sessions": self.streaming_sessions,
+        }
+    
+    async def _preprocess(self, audio_content: bytes) -> PreprocessedAudio:
+        """音声を前処理する（無効の場合は形式の判定のみ行う）"""
+        if self.preprocessor is None:
+            return PreprocessedAudio(audio_content, detect_audio_format(audio_content), len(audio_content))
+        with tracer.span("google.stt.preprocess"):
+            loop = asyncio.get_running_loop()
+            # ログにリクエストIDが付くよう、コンテキストを引き継いでスレッドで実行する
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self._preprocess_executor, functools.partial(context.run, self.preprocessor.process, audio_content)
+            )
+    
+    @staticmethod
+    def _recognition_config(audio_format: Optional[AudioFormat], language_code: str) -> "speech.RecognitionConfig":
+        """判定した音声形式に合わせた認識設定を作成する（判定できない場合は既定の形式とする）"""
+        from google.cloud import speech_v1 as speech
+        
+        if audio_format is not None and audio_format.encoding is None:
+            raise ValueError(f"対応していない音声形式です（{audio_format.container}）")
+        encoding = audio_format.encoding if audio_format is not None else settings.STT_DEFAULT_ENCODING
+        sample_rate = audio_format.sample_rate if audio_format is not None and audio_format.sample_rate else settings.STT_DEFAULT_SAMPLE_RATE
+        options = {}
+        if audio_format is not None and audio_format.channels:
+            options["audio_channel_count"] = audio_format.channels
+        return speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding[encoding],
+            sample_rate_hertz=sample_rate,
+            language_code=language_code,
+            enable_automatic_punctuation=True,
+            **options,
+        )
+    
+    async def _recognize(self, config: "speech.RecognitionConfig", audio: "speech.RecognitionAudio"):
+        """同時実行数の上限内でrecognizeをスレッドプール上で実行する"""
+        if self.max_queue_size > 0 and self.queued >= self.max_queue_size:
+            self.rejected_requests += 1
+            raise RuntimeError(f"音声認識の待機キューが上限に達しています（{self.max_queue_size}件）")
+        
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        try:
+            with tracer.span("google.stt.queue_wait"):
+                await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        
+        self.in_flight += 1
+        self.total_requests += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with track_upstream("google", "stt"):
+                return await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(
+                        self.speech_client.recognize,
+                        config=config,
+                        audio=audio,
+                        timeout=settings.STT_TIMEOUT
+                    )
+                )
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
     
     async def speech_to_text(self, audio_content: bytes, language_code: str = "en-US") -> tuple[str, Optional[str]]:
         """音声データをテキストに変換する
@@ -28,22 +199,30 @@ class GoogleCloudService:
         Returns:
             tuple: (認識テキスト, エラーメッセージ)
         """
+        from google.cloud import speech_v1 as speech
+        from google.api_core.exceptions import GoogleAPIError
+        
         try:
             logger.info(f"音声認識リクエスト - データサイズ: {len(audio_content)}バイト, 言語: {language_code}")
+            AUDIO_BYTES.inc(len(audio_content), service="stt", direction="in")
             
-            # 音声データの設定
-            audio = speech.RecognitionAudio(content=audio_content)
-            
-            # 認識設定
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
-                sample_rate_hertz=48000,  # 必要に応じて調整
-                language_code=language_code,
-                enable_automatic_punctuation=True,
+            # 無音除去・変換と形式の判定
+            processed = await self._preprocess(audio_content)
+            if processed.is_silent:
+                logger.info("発話が含まれていないため音声認識を省略しました")
+                return "", None
+            logger.info(
+                f"音声の前処理: {processed.original_size}バイト -> {len(processed.content)}バイト, "
+                f"形式: {processed.audio_format}"
             )
+            AUDIO_BYTES.inc(len(processed.content), service="stt", direction="upload")
+            
+            # 音声データと認識設定
+            audio = speech.RecognitionAudio(content=processed.content)
+            config = self._recognition_config(processed.audio_format, language_code)
             
             # 音声認識の実行
-            response = self.speech_client.recognize(config=config, audio=audio)
+            response = await self._recognize(config=config, audio=audio)
             
             # 結果の処理
             transcript = ""
@@ -63,4 +242,131 @@ class GoogleCloudService:
         except Exception as e:
             error_msg = f"音声認識中に予期せぬエラーが発生しました: {str(e)}"
             logger.error(error_msg, exc_info=True)
-            return "", error_msg 
\ No newline at end of file
+            return "", error_msg
+
+    async def streaming_speech_to_text(
+        self, audio_chunks: AsyncIterator[bytes], language_code: str = "en-US"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """音声チャンクを逐次受け取りながらストリーミング認識を行う
+        
+        音声形式は最初のチャンク（WebMなどのヘッダーを含む）から判定する。
+        逐次送信のため無音除去・変換は行わない。
+        
+        Args:
+            audio_chunks: 音声チャンク（WEBM/Opusなど）の非同期イテレータ（終了で音声送信完了）
+            language_code: 音声の言語コード（デフォルト: en-US）
+            
+        Yields:
+            Dict[str, Any]: {"transcript": 認識テキスト, "is_final": 確定結果かどうか}
+        """
+        # 上限の確認とカウントはawaitを挟まずに行い、同時に開始したセッションが上限を超えないようにする
+        if self.streaming_sessions >= self.max_streaming_sessions:
+            raise RuntimeError(f"ストリーミング音声認識の同時セッション数が上限に達しています（{self.max_streaming_sessions}件）")
+        self.streaming_sessions += 1
+        feeder: Optional[asyncio.Task] = None
+        # 認識が音声の受信に追いつかない場合に未送信の音声が溜まり続けないよう上限を設ける
+        audio_queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max(1, settings.STT_STREAMING_QUEUE_SIZE))
+        
+        async def put_audio(chunk: Optional[bytes]) -> None:
+            # キューが満杯の間はイベントループを止めずに空きを待つ
+            while True:
+                try:
+                    audio_queue.put_nowait(chunk)
+                    return
+                except queue.Full:
+                    await asyncio.sleep(0.01)
+        
+        def close_audio() -> None:
+            # 途中終了時は未送信の音声を破棄してでも終端を送り、gRPCストリームを終わらせる
+            while True:
+                try:
+                    audio_queue.put_nowait(None)
+                    return
+                except queue.Full:
+                    try:
+                        audio_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+        
+        try:
+            logger.info(f"ストリーミング音声認識開始 - 言語: {language_code}")
+            
+            from google.cloud import speech_v1 as speech
+            
+            first_chunk = b""
+            async for chunk in audio_chunks:
+                if chunk:
+                    first_chunk = chunk
+                    break
+            audio_format = detect_audio_format(first_chunk) if first_chunk else None
+            logger.info(f"ストリーミング音声認識の音声形式: {audio_format}")
+            streaming_config = speech.StreamingRecognitionConfig(
+                config=self._recognition_config(audio_format, language_code),
+                interim_results=True,
+            )
+            
+            loop = asyncio.get_running_loop()
+            result_queue: asyncio.Queue = asyncio.Queue()
+            end_of_results = object()
+            # StreamingRecognizeRequestの音声は1リクエストあたり25KBまで
+            max_request_bytes = 25 * 1024
+            
+            def request_generator():
+                while True:
+                    chunk = audio_queue.get()
+                    if chunk is None:
+                        return
+                    for offset in range(0, len(chunk), max_request_bytes):
+                        yield speech.StreamingRecognizeRequest(audio_content=chunk[offset:offset + max_request_bytes])
+            
+            def run_recognition():
+                # スレッド上でgRPCストリームを読み、結果をイベントループ側のキューへ渡す
+                try:
+                    responses = self.speech_client.streaming_recognize(
+                        config=streaming_config,
+                        requests=request_generator(),
+                        timeout=settings.STT_STREAMING_TIMEOUT
+                    )
+                    for response in responses:
+                        for result in response.results:
+                            if not result.alternatives:
+                                continue
+                            item = {"transcript": result.alternatives[0].transcript, "is_final": result.is_final}
+                            loop.call_soon_threadsafe(result_queue.put_nowait, item)
+                except Exception as e:
+                    loop.call_soon_threadsafe(result_queue.put_nowait, e)
+                finally:
+                    loop.call_soon_threadsafe(result_queue.put_nowait, end_of_results)
+            
+            async def feed_audio():
+                try:
+                    if first_chunk:
+                        AUDIO_BYTES.inc(len(first_chunk), service="stt", direction="in")
+                        await put_audio(first_chunk)
+                    async for chunk in audio_chunks:
+                        if chunk:
+                            AUDIO_BYTES.inc(len(chunk), service="stt", direction="in")
+                            await put_audio(chunk)
+                    await put_audio(None)
+                except BaseException:
+                    close_audio()
+                    raise
+            
+            feeder = asyncio.create_task(feed_audio())
+            recognition = loop.run_in_executor(self._streaming_executor, run_recognition)
+            with track_upstream("google", "stt_stream"):
+                while True:
+                    item = await result_queue.get()
+                    if item is end_of_results:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                await recognition
+            logger.info("ストリーミング音声認識完了")
+        finally:
+            self.streaming_sessions -= 1
+            if feeder is not None and not feeder.done():
+                feeder.cancel()
+            # 途中終了時もgRPCストリームが終わるよう終端を送る
+            close_audio()
@@ -0,0 +1,197 @@
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.core.prompt_registry import prompt_registry
+from app.core.metrics import track_upstream, record_token_usage
+from app.services.rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 1メッセージあたりのロール・区切りなどのオーバーヘッド（トークン）
+MESSAGE_TOKEN_OVERHEAD = 4
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: str = "") -> int:
+    """テキストのトークン数を数える
+
+    tiktokenがインストールされていれば正確に数え、なければ
+    ASCII文字は4文字で1トークン、それ以外（日本語など）は1文字1トークンとして概算する。
+    """
+    if not text:
+        return 0
+    if tiktoken is not None:
+        return len(_get_encoding(model).encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+class CompactedHistory:
+    """圧縮後の対話履歴（古いターンの要約と直近のメッセージ）"""
+
+    def __init__(self, summary: Optional[str], messages: List[Dict[str, Any]], summarized_count: int = 0):
+        self.summary = summary
+        self.messages = messages
+        self.summarized_count = summarized_count
+
+
+class HistoryCompactor:
+    """トークン予算に基づいて対話履歴を圧縮する
+
+    履歴のトークン数が予算を超えた場合、直近K往復はそのまま残し、それより古いターンを
+    要約に置き換える。要約はセッションごとにキャッシュし、次のターンでは
+    新たに古くなったメッセージだけを既存の要約に追加して更新する。
+    """
+
+    def __init__(self, client, model: str, scheduler=None):
+        self.client = client
+        self.model = model
+        # レート制限・再試行を行うスケジューラ（任意）
+        self.scheduler = scheduler
+        self.keep_recent_turns = settings.HISTORY_KEEP_RECENT_TURNS
+        self.cache_size = settings.HISTORY_SUMMARY_CACHE_SIZE
+        # キャッシュキー -> (要約済みメッセージ数, 要約済み部分のハッシュ, 要約)
+        self._summaries: "OrderedDict[str, tuple[int, str, str]]" = OrderedDict()
+        self.summary_calls = 0
+        self.summary_cache_hits = 0
+
+    def count_message_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(count_tokens(str(msg.get("content", "")), self.model) + MESSAGE_TOKEN_OVERHEAD for msg in messages)
+
+    @staticmethod
+    def _hash_messages(messages: List[Dict[str, Any]]) -> str:
+        payload = json.dumps(
+            [[msg.get("role", ""), msg.get("content", "")] for msg in messages], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_key(self, messages: List[Dict[str, Any]], session_key: Optional[str], namespace: str) -> str:
+        # セッションIDがない場合は、面接ごとに異なる冒頭のやり取りで識別する
+        return f"{namespace}:{session_key or self._hash_messages(messages[:2])}"
+
+    async def _summarize(
+        self, previous_summary: Optional[str], messages: List[Dict[str, Any]], priority: int = PRIORITY_INTERACTIVE
+    ) -> str:
+        """既存の要約に新しいメッセージを反映した要約を生成する"""
+        system_prompt = prompt_registry.get("history_summary", "system")
+        user_template = prompt_registry.get("history_summary", "user_prompt")
+        if not system_prompt or not user_template:
+            raise ValueError("history_summaryプロンプトが見つかりません")
+
+        prompt_messages = [
+            {"role": "system", "content": str(system_prompt)},
+            {"role": "user", "content": user_template.render(
+                previous_summary=previous_summary or "",
+                messages=messages
+            ).strip()}
+        ]
+        
+        def call():
+            return self.client.chat.completions.create(
+                model=self.model,
+                messages=prompt_messages,
+                temperature=0.3,
+                max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS
+            )
+        
+        self.summary_calls += 1
+        with track_upstream("openai", "history_summary"):
+            if self.scheduler is None:
+                response = await call()
+            else:
+                tokens = self.count_message_tokens(prompt_messages) + settings.HISTORY_SUMMARY_MAX_TOKENS
+                response = await self.scheduler.run(call, priority=priority, tokens=tokens)
+        record_token_usage("history_summary", response.usage)
+        return (response.choices[0].message.content or "").strip()
+
+    async def compact(
+        self,
+        messages: List[Dict[str, Any]],
+        token_budget: int,
+        session_key: Optional[str] = None,
+        namespace: str = "question"
+    ) -> CompactedHistory:
+        """対話履歴をトークン予算内に圧縮する
+
+        Args:
+            messages: 対話履歴（role・contentを持つ辞書のリスト）
+            token_budget: 履歴に使えるトークン数
+            session_key: 要約キャッシュのキー（セッションID）。省略時は冒頭のやり取りから決める
+            namespace: 予算の異なる用途（質問生成・評価）で要約キャッシュを分けるための名前
+
+        Returns:
+            CompactedHistory: 要約（不要ならNone）と直近のメッセージ
+        """
+        if not settings.HISTORY_COMPACTION_ENABLED or self.count_message_tokens(messages) <= token_budget:
+            return CompactedHistory(None, messages)
+
+        keep = min(len(messages), max(1, self.keep_recent_turns * 2))
+        older, recent = messages[:-keep], messages[-keep:]
+        # 直近のメッセージだけで予算を超える場合は、最新のメッセージを残してさらに要約側へ回す
+        while len(recent) > 1 and self.count_message_tokens(recent) > token_budget:
+            older.append(recent.pop(0))
+        if not older:
+            return CompactedHistory(None, recent)
+
+        key = self._cache_key(messages, session_key, namespace)
+        previous_summary = None
+        summarized_count = 0
+        cached = self._summaries.get(key)
+        if cached is not None:
+            cached_count, cached_hash, cached_summary = cached
+            # キャッシュした要約が今回の古いターンの先頭部分と一致する場合のみ再利用する
+            if cached_count <= len(older) and cached_hash == self._hash_messages(older[:cached_count]):
+                previous_summary, summarized_count = cached_summary, cached_count
+                self._summaries.move_to_end(key)
+
+        # 既存の要約と未要約のメッセージで予算に収まる場合は、要約を更新せずにそのまま使う
+        if previous_summary is not None:
+            remaining = older[summarized_count:] + recent
+            summary_tokens = count_tokens(previous_summary, self.model) + MESSAGE_TOKEN_OVERHEAD
+            if summary_tokens + self.count_message_tokens(remaining) <= token_budget:
+                self.summary_cache_hits += 1
+                return CompactedHistory(previous_summary, remaining, summarized_count=summarized_count)
+
+        if summarized_count == len(older):
+            self.summary_cache_hits += 1
+            summary = previous_summary
+        else:
+            new_messages = older[summarized_count:]
+            logger.info(f"対話履歴を要約します: 既要約={summarized_count}件, 追加={len(new_messages)}件, 直近={len(recent)}件")
+            # 質問生成はユーザーが応答を待っているため優先し、評価用の要約は後回しにする
+            summary = await self._summarize(
+                previous_summary, new_messages, priority=PRIORITY_INTERACTIVE if namespace == "question" else PRIORITY_BACKGROUND
+            )
+            self._summaries[key] = (len(older), self._hash_messages(older), summary)
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.cache_size:
+                self._summaries.popitem(last=False)
+
+        return CompactedHistory(summary, recent, summarized_count=len(older))
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        return {
+            "summary_calls": self.summary_calls,
+            "summary_cache_hits": self.summary_cache_hits,
+            "cached_summaries": len(self._summaries),
+        }
@@ -1,134 +1,411 @@
 import os
 import json
-import aiofiles
+import asyncio
+import contextlib
+import base64
 import logging
-import yaml
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, AsyncIterator
 import io
-from jinja2 import Template
 
-from openai import AsyncOpenAI
-from openai.types.chat import ChatCompletion
+import httpx
 
 from app.core.config import settings, InterviewMode
-from app.schemas.interview import InterviewQuestionRequest
+from app.core.logger import log_payload
+from app.core.metrics import AUDIO_BYTES, track_upstream, record_token_usage, record_cache_lookup
+from app.core.tracing import tracer
+from app.core.prompt_registry import prompt_registry
+from app.core.partial_json import PartialJSONFieldExtractor
+from app.schemas.interview import InterviewQuestionRequest, FeedbackEvaluation
+from app.services.tts_cache import TTSCache
+from app.services.history_compactor import HistoryCompactor
+from app.services.result_cache import ResultCache
+from app.services.rate_limiter import openai_scheduler, UpstreamRateLimitError, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+
+def request_timeout(seconds: float) -> httpx.Timeout:
+    """処理時間の上限を操作ごとに変え、接続・プール待ちのタイムアウトは共通にする"""
+    return httpx.Timeout(seconds, connect=settings.OPENAI_CONNECT_TIMEOUT, pool=settings.OPENAI_POOL_TIMEOUT)
+
+
+def create_openai_client() -> "AsyncOpenAI":
+    """コネクションプール・タイムアウトを設定したOpenAI APIクライアントを作成する
+
+    openaiパッケージの読み込みには時間がかかるため、インポートはクライアントの作成時に行う。
+    """
+    from openai import AsyncOpenAI
+
+    http2 = settings.OPENAI_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("h2パッケージがないためHTTP/1.1で接続します（OPENAI_HTTP2=true）")
+            http2 = False
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=request_timeout(settings.OPENAI_CHAT_TIMEOUT),
+        http2=http2,
+        # レート制限ヘッダーをスケジューラに取り込む
+        event_hooks={"response": [openai_scheduler.on_response]} if settings.OPENAI_SCHEDULER_ENABLED else None,
+    )
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        http_client=http_client,
+        timeout=request_timeout(settings.OPENAI_CHAT_TIMEOUT),
+        # スケジューラ使用時は再試行をスケジューラ側で行う
+        max_retries=0 if settings.OPENAI_SCHEDULER_ENABLED else settings.OPENAI_MAX_RETRIES,
+    )
+
+
 class OpenAIService:
-    def __init__(self):
-        """OpenAI APIサービスの初期化"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, client: Optional["AsyncOpenAI"] = None):
+        """OpenAI APIサービスの初期化
+        
+        クライアントは通常アプリケーションのlifespanでstart()により作成する。
+        start()前に使用された場合は最初のアクセス時に作成する。
+        """
+        self._client: Optional["AsyncOpenAI"] = None
         self.model = settings.OPENAI_MODEL
         self.temperature = settings.OPENAI_TEMPERATURE
+        # プロンプトは起動時に一度だけ読み込み・コンパイルしておく
+        self.prompts = prompt_registry
+        self.prompts.load()
+        # 音声合成結果のキャッシュ
+        self.tts_cache = TTSCache() if settings.TTS_CACHE_ENABLED else None
+        # レート制限・優先度付きキュー・再試行（全てのOpenAI API呼び出しで共有する）
+        self.scheduler = openai_scheduler if settings.OPENAI_SCHEDULER_ENABLED else None
+        # 長い対話履歴をトークン予算内に圧縮する
+        self.history_compactor = HistoryCompactor(None, self.model, scheduler=self.scheduler)
+        if client is not None:
+            self.client = client
+        # 評価・詳細フィードバック結果のキャッシュ
+        self.result_cache = ResultCache() if settings.RESULT_CACHE_ENABLED else None
+        # 事前接続の結果（準備状態の確認用）
+        self.warmed_connections = 0
+        self.warmup_error: Optional[str] = None
     
-    async def _load_prompt(self, path: str) -> Dict[str, Any]:
-        """プロンプトファイル（JSONまたはYAML）を読み込む"""
-        try:
-            # Pathオブジェクトを文字列に変換
-            path_str = str(path)
-            
-            async with aiofiles.open(path, mode='r', encoding='utf-8') as f:
-                content = await f.read()
-                
-                # ファイル拡張子で処理を分ける
-                if path_str.endswith('.json'):
-                    return json.loads(content)
-                elif path_str.endswith('.yaml') or path_str.endswith('.yml'):
-                    return yaml.safe_load(content)
-                else:
-                    raise ValueError(f"サポートされていないファイル形式です: {path}")
-        except Exception as e:
-            raise ValueError(f"プロンプトファイルの読み込みに失敗しました: {str(e)}")
+    @property
+    def client(self) -> "AsyncOpenAI":
+        if self._client is None:
+            self.client = create_openai_client()
+        return self._client
+    
+    @client.setter
+    def client(self, client: "AsyncOpenAI") -> None:
+        self._client = client
+        self.history_compactor.client = client
+    
+    async def start(self) -> None:
+        """クライアントを作成し、接続を事前に確立しておく（lifespanから呼び出す）
+
+        SDKの読み込みでイベントループを塞がないよう、クライアントの作成はスレッドで行う。
+        """
+        if self._client is None:
+            client = await asyncio.to_thread(create_openai_client)
+            if self._client is None:
+                self.client = client
+            else:
+                # 作成中に最初のリクエストでクライアントが作成された場合はそちらを使う
+                await client.close()
+        await self.warmup()
+    
+    async def warmup(self, connections: int = None) -> None:
+        """軽量なAPI呼び出しで接続（TLSハンドシェイク）を事前に確立し、プールに保持させる"""
+        connections = settings.OPENAI_WARMUP_CONNECTIONS if connections is None else connections
+        if connections <= 0 or not settings.OPENAI_API_KEY:
+            return
+        
+        async def warm_one() -> None:
+            await self.client.with_options(max_retries=0).models.retrieve(
+                self.model, timeout=settings.OPENAI_CONNECT_TIMEOUT * 2
+            )
+        
+        results = await asyncio.gather(*(warm_one() for _ in range(connections)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        self.warmed_connections = connections - len(errors)
+        self.warmup_error = str(errors[0]) if errors else None
+        if errors:
+            logger.warning(f"OpenAI APIへの事前接続に失敗しました（{len(errors)}/{connections}件）: {str(errors[0])}")
+        else:
+            logger.info(f"OpenAI APIへの接続を事前に確立しました: {connections}件")
+    
+    async def close(self) -> None:
+        """クライアント（コネクションプール）を閉じる"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self.history_compactor.client = None
+    
+    def readiness(self) -> Dict[str, Any]:
+        """準備状態（クライアントが作成済みか・事前接続の結果）を返す
+        
+        事前接続の失敗は外部API側の一時的な障害の可能性があるため、準備状態には含めず情報として返す。
+        """
+        return {
+            "ready": self._client is not None,
+            "warmed_connections": self.warmed_connections,
+            "warmup_error": self.warmup_error,
+        }
+    
+    def _estimate_tokens(self, messages: List[Dict[str, Any]], max_tokens: int) -> int:
+        """レート制限用の推定トークン数（プロンプト＋最大生成トークン数）"""
+        return self.history_compactor.count_message_tokens(messages) + max_tokens
+    
+    async def _call_upstream(self, call, priority: int = PRIORITY_INTERACTIVE, tokens: int = 0):
+        """レート制限・再試行付きでOpenAI APIを呼び出す"""
+        if self.scheduler is None:
+            return await call()
+        return await self.scheduler.run(call, priority=priority, tokens=tokens)
     
     # def _format_prompt_template(self, template: str, **kwargs) -> str:
     #     """テンプレートを値で置換する"""
     #     return template.format(**kwargs)
     
-    async def generate_interview_question(self, request: InterviewQuestionRequest) -> str:
-        """面接質問を生成する"""
-        try:
-            # プロンプトファイルの読み込み
-            prompt_path = settings.INTERVIEW_QUESTIONS_PROMPT_PATH
-            prompt_data = await self._load_prompt(prompt_path)
-            
-            # 統合プロンプトを取得
-            prompt_config = prompt_data.get("interview_question")
-            if not prompt_config:
-                raise ValueError("interview_questionプロンプトが見つかりません")
+    async def _build_question_messages(
+        self, request: InterviewQuestionRequest, session_id: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """面接質問生成用のメッセージリストを構築する
+        
+        対話履歴がHISTORY_TOKEN_BUDGETを超える場合は、古いターンを要約に置き換える。
+        """
+        # コンパイル済みの統合プロンプトを取得
+        system_template = self.prompts.get("interview_question", "system")
+        if not system_template:
+            raise ValueError("interview_questionプロンプトが見つかりません")
 
-            # Jinja2テンプレートとして埋め込み
-            system_template = Template(prompt_config["system"])
+        # Jinja2テンプレートとして埋め込み
+        with tracer.span("prompt.render", **{"prompt.name": "interview_question"}):
             system_prompt = system_template.render(
                 resume=request.resume or '',
                 job_description=request.job_description or ''
             )
 
-            # メッセージ履歴を構築
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # 対話履歴がある場合は追加
-            if request.message_history and len(request.message_history) > 0:
-                for msg in request.message_history:
-                    if isinstance(msg, dict):
-                        role = msg.get("role", "")
-                        content = msg.get("content", "")
-                    else:
-                        role = msg.role
-                        content = msg.content
-                    messages.append({
-                        "role": role,
-                        "content": content
-                    })
+        # メッセージ履歴を構築
+        messages = [{"role": "system", "content": system_prompt}]
+        
+        # 対話履歴がある場合は追加
+        if request.message_history and len(request.message_history) > 0:
+            history = []
+            for msg in request.message_history:
+                if isinstance(msg, dict):
+                    role = msg.get("role", "")
+                    content = msg.get("content", "")
+                else:
+                    role = msg.role
+                    content = msg.content
+                history.append({
+                    "role": role,
+                    "content": content
+                })
+            
+            # トークン予算を超える古いターンは要約に置き換える
+            with tracer.span("history.compact", **{"history.messages": len(history)}):
+                compacted = await self.history_compactor.compact(
+                    history, settings.HISTORY_TOKEN_BUDGET, session_key=session_id
+                )
+            if compacted.summary:
+                messages.append({"role": "system", "content": f"これまでの面接の要約:\n{compacted.summary}"})
+            messages.extend(compacted.messages)
+        
+        # リクエスト前にモデルとメッセージの内容をログ出力
+        logger.info(f"OpenAI API リクエスト - モード: {request.mode.value}")
+        logger.info(f"使用モデル: {self.model}")
+        logger.info(f"メッセージ数: {len(messages)}")
+        logger.info(f"対話履歴数: {len(request.message_history) if request.message_history else 0}")
+        log_payload(logger, "メッセージ内容", messages)
+        
+        return messages
+    
+    def _parse_question_response(self, content: str) -> str:
+        """質問生成のレスポンス（JSON）をリアクション＋質問の文字列に変換する"""
+        try:
+            response_data = json.loads(content)
             
-            # リクエスト前にモデルとメッセージの内容をログ出力
-            logger.info(f"OpenAI API リクエスト - モード: {request.mode.value}")
-            logger.info(f"使用モデル: {self.model}")
-            logger.info(f"メッセージ数: {len(messages)}")
-            logger.info(f"対話履歴数: {len(request.message_history) if request.message_history else 0}")
-            logger.info(f"メッセージ内容: {json.dumps(messages, ensure_ascii=False, indent=2)}")
+            # interview_questionフィールドがあれば、questionフィールドに変換
+            if 'interview_question' in response_data:
+                response_data['question'] = response_data.pop('interview_question')
+                
+            # スキーマに合わせて必要なフィールドが存在するか確認
+            if 'question' not in response_data:
+                # questionフィールドがなければ追加（フォールバック）
+                response_data['question'] = response_data.get('raw_response', 
+                                          "Sorry, please try again.")
+                
+            if 'reaction' in response_data:
+                return_data = response_data['reaction']+' '+response_data['question']
+            else:
+                return_data = response_data['question']
+            return return_data
+        
+        except json.JSONDecodeError:
+            # JSON形式でない場合はそのまま返す
+            return content
+    
+    async def generate_interview_question(self, request: InterviewQuestionRequest, session_id: Optional[str] = None) -> str:
+        """面接質問を生成する"""
+        try:
+            messages = await self._build_question_messages(request, session_id=session_id)
             
             # OpenAI APIを呼び出して質問を生成
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=50,
-                response_format={"type": "json_object"}
-            )
+            with track_upstream("openai", "question"):
+                response = await self._call_upstream(
+                    lambda: self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=50,
+                        response_format={"type": "json_object"}
+                    ),
+                    priority=PRIORITY_INTERACTIVE,
+                    tokens=self._estimate_tokens(messages, 50)
+                )
+            record_token_usage("question", response.usage)
             
             # レスポンスの処理
             content = response.choices[0].message.content
-            logger.info(f"OpenAI API レスポンス: {content}")
+            log_payload(logger, "OpenAI API レスポンス", content)
             
-            try:
-                response_data = json.loads(content)
+            return self._parse_question_response(content)
                 
-                # interview_questionフィールドがあれば、questionフィールドに変換
-                if 'interview_question' in response_data:
-                    response_data['question'] = response_data.pop('interview_question')
-                    
-                # スキーマに合わせて必要なフィールドが存在するか確認
-                if 'question' not in response_data:
-                    # questionフィールドがなければ追加（フォールバック）
-                    response_data['question'] = response_data.get('raw_response', 
-                                              "Sorry, please try again.")
-                    
-                if 'reaction' in response_data:
-                    return_data = response_data['reaction']+' '+response_data['question']
-                else:
-                    return_data = response_data['question']
-                return return_data
-            
-            except json.JSONDecodeError:
-                # JSON形式でない場合はそのまま返す
-                return content
+        except UpstreamRateLimitError:
+            raise
+        except Exception as e:
+            raise Exception(f"質問生成中にエラーが発生しました: {str(e)}")
+    
+    async def stream_interview_question(
+        self, request: InterviewQuestionRequest, session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """面接質問をトークン単位でストリーミング生成する
+        
+        生成途中のJSONからreaction・questionフィールドを逐次取り出し、イベントとして返す。
+        
+        Yields:
+            Dict[str, Any]: {"event": イベント名, "data": データ}
+                - reaction / question: {"delta": 追加されたテキスト}
+                - reaction_done / question_done: {"text": 確定したテキスト}
+                - done: {"question": リアクション＋質問（非ストリーミング版と同じ形式）}
+        """
+        try:
+            messages = await self._build_question_messages(request, session_id=session_id)
+            
+            with track_upstream("openai", "question_stream"):
+                stream = await self._call_upstream(
+                    lambda: self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=50,
+                        response_format={"type": "json_object"},
+                        stream=True,
+                        # 最後のチャンクでトークン使用量を受け取る
+                        stream_options={"include_usage": True}
+                    ),
+                    priority=PRIORITY_INTERACTIVE,
+                    tokens=self._estimate_tokens(messages, 50)
+                )
+                
+                extractor = PartialJSONFieldExtractor(["reaction", "question", "interview_question"])
+                content_parts = []
+                async for chunk in stream:
+                    if getattr(chunk, "usage", None) is not None:
+                        record_token_usage("question_stream", chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    content_parts.append(delta)
+                    for field, text, done in extractor.feed(delta):
+                        # interview_questionフィールドはquestionとして扱う
+                        name = "question" if field == "interview_question" else field
+                        if text:
+                            yield {"event": name, "data": {"delta": text}}
+                        if done:
+                            yield {"event": f"{name}_done", "data": {"text": extractor.values[field]}}
+            
+            content = "".join(content_parts)
+            log_payload(logger, "OpenAI API レスポンス（ストリーミング）", content)
+            
+            yield {"event": "done", "data": {"question": self._parse_question_response(content)}}
                 
+        except UpstreamRateLimitError:
+            raise
         except Exception as e:
             raise Exception(f"質問生成中にエラーが発生しました: {str(e)}")
     
+    async def stream_interview_question_with_speech(
+        self, request: InterviewQuestionRequest, voice: str = None, session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """面接質問の生成と音声合成をパイプライン化して実行する
+        
+        reactionが確定した時点でその音声合成を開始し、questionの生成と並行して進める。
+        テキストのイベントはstream_interview_questionと同じで、加えて音声が完成した順
+        （reaction → question）にaudioイベントを返す。
+        session_idを指定した場合は、対話履歴の要約キャッシュにセッション単位のキーを使う。
+        
+        Yields:
+            Dict[str, Any]: {"event": イベント名, "data": データ}
+                - audio: {"segment": "reaction" | "question", "text": 読み上げテキスト,
+                          "format": 音声フォーマット, "audio": Base64エンコードした音声}
+        """
+        audio_tasks: List[tuple[str, str, asyncio.Task]] = []
+        
+        def start_speech(segment: str, text: str) -> None:
+            if text.strip():
+                task = asyncio.create_task(self.text_to_speech(text=text, voice=voice))
+                audio_tasks.append((segment, text, task))
+        
+        def audio_event(segment: str, text: str, audio: bytes) -> Dict[str, Any]:
+            return {
+                "event": "audio",
+                "data": {
+                    "segment": segment,
+                    "text": text,
+                    "format": settings.OPENAI_TTS_RESPONSE_FORMAT,
+                    "audio": base64.b64encode(audio).decode("ascii")
+                }
+            }
+        
+        emitted = 0
+        try:
+            async for item in self.stream_interview_question(request, session_id=session_id):
+                if item["event"] == "reaction_done":
+                    start_speech("reaction", item["data"]["text"])
+                elif item["event"] == "question_done":
+                    start_speech("question", item["data"]["text"])
+                elif item["event"] == "done" and not audio_tasks:
+                    # JSONからフィールドを取り出せなかった場合は全文を読み上げる
+                    start_speech("question", item["data"]["question"])
+                yield item
+                
+                # 完成済みの音声は順序を保ったまま即座に返す
+                while emitted < len(audio_tasks) and audio_tasks[emitted][2].done():
+                    segment, text, task = audio_tasks[emitted]
+                    emitted += 1
+                    yield audio_event(segment, text, task.result())
+            
+            # 残りの音声を順番に待って返す
+            while emitted < len(audio_tasks):
+                segment, text, task = audio_tasks[emitted]
+                emitted += 1
+                yield audio_event(segment, text, await task)
+        finally:
+            for _, _, task in audio_tasks:
+                if not task.done():
+                    task.cancel()
+    
     async def text_to_speech(self, text: str, voice: str = None) -> bytes:
         """テキストを音声に変換する
         
@@ -145,50 +422,178 @@ class OpenAIService:
             
             logger.info(f"音声合成リクエスト - テキスト長: {len(text)}, 音声: {selected_voice}")
             
-            response = await self.client.audio.speech.create(
-                model=settings.OPENAI_TTS_MODEL,
-                voice=selected_voice,
-                input=text,
-                response_format=settings.OPENAI_TTS_RESPONSE_FORMAT
-            )
+            # キャッシュに同じ音声があればそのまま返す
+            cache_key = None
+            if self.tts_cache is not None:
+                cache_key = TTSCache.make_key(
+                    text, selected_voice, settings.OPENAI_TTS_MODEL, settings.OPENAI_TTS_RESPONSE_FORMAT
+                )
+                cached = await self.tts_cache.get(cache_key)
+                record_cache_lookup("tts", cached is not None)
+                if cached is not None:
+                    logger.info(f"音声合成キャッシュヒット - 出力サイズ: {len(cached)} bytes")
+                    return cached
+            
+            with track_upstream("openai", "tts"):
+                response = await self._call_upstream(
+                    lambda: self.client.audio.speech.create(
+                        model=settings.OPENAI_TTS_MODEL,
+                        voice=selected_voice,
+                        input=text,
+                        response_format=settings.OPENAI_TTS_RESPONSE_FORMAT,
+                        timeout=request_timeout(settings.OPENAI_TTS_TIMEOUT)
+                    ),
+                    priority=PRIORITY_INTERACTIVE
+                )
             
             # レスポンスからバイナリデータを取得
             audio_data = io.BytesIO()
             for chunk in response.iter_bytes(chunk_size=4096):
                 audio_data.write(chunk)
             audio_data.seek(0)
+            AUDIO_BYTES.inc(audio_data.getbuffer().nbytes, service="tts", direction="out")
             
             # バイナリデータを返す
             logger.info(f"音声合成成功 - 出力サイズ: {audio_data.getbuffer().nbytes} bytes")
-            return audio_data.getvalue()
+            audio_bytes = audio_data.getvalue()
+            if cache_key is not None and audio_bytes:
+                await self.tts_cache.put(cache_key, audio_bytes)
+            return audio_bytes
             
+        except UpstreamRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"音声合成中にエラーが発生しました: {str(e)}", exc_info=True)
             raise Exception(f"音声合成エラー: {str(e)}")
     
-    async def evaluate_interview(self, message_history: List[Dict[str, Any]], language: str = "en") -> Dict[str, Any]:
+    async def stream_text_to_speech(self, text: str, voice: str = None) -> AsyncIterator[bytes]:
+        """テキストを音声に変換し、生成された音声チャンクを到着順に返す
+        
+        OpenAIのストリーミングAPIから受け取ったチャンクをバッファリングせずにそのまま転送する。
+        キャッシュにヒットした場合はキャッシュ済みの音声を1チャンクで返す。
+        
+        Args:
+            text: 音声に変換するテキスト
+            voice: 使用する音声タイプ (alloy, echo, fable, onyx, nova, shimmer)
+            
+        Yields:
+            bytes: 音声データのチャンク
+        """
+        # 指定された音声タイプが利用可能かチェック
+        selected_voice = voice if voice in settings.OPENAI_TTS_AVAILABLE_VOICES else settings.OPENAI_TTS_VOICE
+        
+        logger.info(f"音声合成ストリーミングリクエスト - テキスト長: {len(text)}, 音声: {selected_voice}")
+        
+        cache_key = None
+        if self.tts_cache is not None:
+            cache_key = TTSCache.make_key(
+                text, selected_voice, settings.OPENAI_TTS_MODEL, settings.OPENAI_TTS_RESPONSE_FORMAT
+            )
+            cached = await self.tts_cache.get(cache_key)
+            record_cache_lookup("tts", cached is not None)
+            if cached is not None:
+                logger.info(f"音声合成キャッシュヒット - 出力サイズ: {len(cached)} bytes")
+                yield cached
+                return
+        
+        # キャッシュ保存用にのみチャンクを保持する（1件あたりの上限を超えた時点で破棄する）
+        chunks: Optional[List[bytes]] = [] if cache_key is not None else None
+        total_bytes = 0
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                async def open_stream():
+                    try:
+                        response = await stack.enter_async_context(
+                            self.client.audio.speech.with_streaming_response.create(
+                                model=settings.OPENAI_TTS_MODEL,
+                                voice=selected_voice,
+                                input=text,
+                                response_format=settings.OPENAI_TTS_RESPONSE_FORMAT,
+                                timeout=request_timeout(settings.OPENAI_TTS_TIMEOUT)
+                            )
+                        )
+                    except Exception as e:
+                        # 429などのエラーレスポンスのレート制限ヘッダーも予算に反映する
+                        error_response = getattr(e, "response", None)
+                        if self.scheduler is not None and isinstance(error_response, httpx.Response):
+                            self.scheduler.observe_response(error_response.headers)
+                        raise
+                    if self.scheduler is not None:
+                        # レスポンスフックのないクライアントを渡された場合も予算に反映する
+                        self.scheduler.observe_response(response.headers)
+                    return response
+                
+                with track_upstream("openai", "tts_stream"):
+                    # ストリーミングは途中から再試行できないため、音声の受信を始める前（レスポンスヘッダーまで）のみ再試行する
+                    response = await self._call_upstream(open_stream)
+                    async for chunk in response.iter_bytes(chunk_size=settings.OPENAI_TTS_STREAM_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        total_bytes += len(chunk)
+                        AUDIO_BYTES.inc(len(chunk), service="tts", direction="out")
+                        if chunks is not None:
+                            if total_bytes > self.tts_cache.max_item_bytes:
+                                chunks = None
+                                self.tts_cache.skipped_too_large += 1
+                            else:
+                                chunks.append(chunk)
+                        yield chunk
+        except UpstreamRateLimitError:
+            raise
+        except Exception as e:
+            logger.error(f"音声合成ストリーミング中にエラーが発生しました: {str(e)}", exc_info=True)
+            raise Exception(f"音声合成エラー: {str(e)}")
+        
+        logger.info(f"音声合成ストリーミング完了 - 出力サイズ: {total_bytes} bytes")
+        if chunks is not None and total_bytes:
+            await self.tts_cache.put(cache_key, b"".join(chunks))
+    
+    async def evaluate_interview(
+        self, message_history: List[Dict[str, Any]], language: str = "en", session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """面接の対話履歴を評価する（同じ対話履歴の評価結果はキャッシュから返す）
+        
+        キャッシュキーは言語・モデル・評価プロンプトのバージョン・正規化した対話履歴から求める。
+        同じ履歴の評価が実行中の場合は、その結果を共有する。
+        """
+        if self.result_cache is None:
+            return await self._evaluate_interview(message_history, language, session_id)
+        
+        key = ResultCache.make_key(
+            "evaluation",
+            language=language.lower(),
+            model=self.model,
+            prompt_version=self.prompts.version("evaluation"),
+            history=[[msg.get("role", ""), msg.get("content", "")] for msg in message_history]
+        )
+        return await self.result_cache.get_or_compute(
+            key, lambda: self._evaluate_interview(message_history, language, session_id)
+        )
+    
+    async def _evaluate_interview(
+        self, message_history: List[Dict[str, Any]], language: str = "en", session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """面接の対話履歴を評価する
         
+        対話履歴がHISTORY_EVALUATION_TOKEN_BUDGETを超える場合は、古いターンを要約に置き換える。
+        
         Args:
             message_history: 面接の対話履歴
             language: 言語設定（en/ja）
+            session_id: 要約キャッシュに使うセッションID（任意）
             
         Returns:
             Dict[str, Any]: 評価結果
         """
         try:
-            # プロンプトファイルの読み込み
-            prompt_path = settings.INTERVIEW_QUESTIONS_PROMPT_PATH
-            prompt_data = await self._load_prompt(prompt_path)
-            
             # 評価用のプロンプト設定を取得
-            evaluation_config = prompt_data.get("evaluation", {})
+            evaluation_config = self.prompts.get_section("evaluation")
             
             # 言語に応じたプロンプト選択
             if language.lower() == "ja":
-                system_prompt = evaluation_config.get("system_ja", "")
+                system_prompt = str(evaluation_config.get("system_ja", ""))
             else:
-                system_prompt = evaluation_config.get("system_en", "")
+                system_prompt = str(evaluation_config.get("system_en", ""))
             
             # プロンプトが空の場合はエラー
             if not system_prompt:
@@ -199,15 +604,27 @@ class OpenAIService:
             
             # 対話履歴を追加
             if language.lower() == "ja":
-                user_prompt = evaluation_config.get("user_prompt_ja", "以下の面接対話履歴を評価してください。必ず指定されたJSONフォーマットでレスポンスを返してください。")
+                user_prompt = str(evaluation_config.get("user_prompt_ja", "以下の面接対話履歴を評価してください。必ず指定されたJSONフォーマットでレスポンスを返してください。"))
                 user_prompt += "\n\n対話履歴:\n"
             else:
-                user_prompt = evaluation_config.get("user_prompt_en", "Please evaluate the following interview conversation. Make sure to respond using the specified JSON format.")
+                user_prompt = str(evaluation_config.get("user_prompt_en", "Please evaluate the following interview conversation. Make sure to respond using the specified JSON format."))
                 user_prompt += "\n\nConversation history:\n"
             
+            # トークン予算を超える古いターンは要約に置き換える
+            with tracer.span("history.compact", **{"history.messages": len(message_history)}):
+                compacted = await self.history_compactor.compact(
+                    message_history, settings.HISTORY_EVALUATION_TOKEN_BUDGET,
+                    session_key=session_id, namespace="evaluation"
+                )
+            if compacted.summary:
+                if language.lower() == "ja":
+                    user_prompt += f"（1〜{compacted.summarized_count}件目の要約）\n{compacted.summary}\n\n"
+                else:
+                    user_prompt += f"(Summary of messages 1-{compacted.summarized_count})\n{compacted.summary}\n\n"
+            
             # 対話履歴をフォーマット
             formatted_history = []
-            for i, msg in enumerate(message_history):
+            for i, msg in enumerate(compacted.messages, start=compacted.summarized_count):
                 role = msg.get("role", "")
                 content = msg.get("content", "")
                 if language.lower() == "ja":
@@ -223,16 +640,22 @@ class OpenAIService:
             logger.info(f"面接評価リクエスト（言語: {language}）")
             logger.info(f"使用モデル: {self.model}")
             logger.info(f"メッセージ数: {len(messages)}")
-            logger.info(f"メッセージ内容: {json.dumps(messages, ensure_ascii=False, indent=2)}")
+            log_payload(logger, "メッセージ内容", messages)
             
             # OpenAI APIを呼び出して評価を生成
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.3,  # 評価なので低めの温度設定
-                max_tokens=1000,
-                response_format={"type": "json_object"}
-            )
+            with track_upstream("openai", "evaluation"):
+                response = await self._call_upstream(
+                    lambda: self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0.3,  # 評価なので低めの温度設定
+                        max_tokens=1000,
+                        response_format={"type": "json_object"}
+                    ),
+                    priority=PRIORITY_BACKGROUND,
+                    tokens=self._estimate_tokens(messages, 1000)
+                )
+            record_token_usage("evaluation", response.usage)
             
             # レスポンスの処理
             content = response.choices[0].message.content
@@ -261,7 +684,7 @@ class OpenAIService:
                 evaluation["language"] = language
                 
                 # サマリー部分のログ出力（改行の確認用）
-                logger.info(f"評価結果（サマリー）: {evaluation['summary']}")
+                log_payload(logger, "評価結果（サマリー）", evaluation['summary'])
                 
                 return evaluation
                 
@@ -270,20 +693,175 @@ class OpenAIService:
                 logger.error(f"OpenAIレスポンス全文: {content}")
                 raise ValueError(f"評価結果のJSONパースに失敗しました: {str(e)}")
                 
+        except UpstreamRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"面接評価中にエラーが発生しました: {str(e)}", exc_info=True)
             raise Exception(f"面接評価エラー: {str(e)}")
 
+    async def _generate_single_feedback(
+        self, index: int, qa: Dict[str, str], system_prompt: str, user_prompt_template, language: str
+    ) -> Optional[Dict[str, str]]:
+        """1つのQAペアに対する詳細フィードバックを生成する（失敗時はNone）"""
+        question = qa.get("question", "")
+        answer = qa.get("answer", "")
+        
+        # 質問または回答が空の場合はスキップ
+        if not question or not answer:
+            logger.warning(f"質問または回答が空です: index={index}")
+            return None
+        
+        # ユーザープロンプトの作成
+        user_prompt = user_prompt_template.render(
+            question=question,
+            answer=answer
+        )
+        
+        # APIリクエストの準備
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        
+        # リクエスト前にログ出力
+        logger.info(f"詳細フィードバック生成リクエスト（言語: {language}, QA index: {index}）")
+        log_payload(logger, "メッセージ内容", messages)
+        # OpenAI APIを呼び出してフィードバックを生成
+        with track_upstream("openai", "feedback"):
+            response = await self._call_upstream(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=300,
+                    response_format={"type": "json_object"}
+                ),
+                priority=PRIORITY_BACKGROUND,
+                tokens=self._estimate_tokens(messages, 300)
+            )
+        record_token_usage("feedback", response.usage)
+        
+        # レスポンスの処理
+        content = response.choices[0].message.content
+        log_payload(logger, "OpenAIレスポンス全文", content)
+        
+        try:
+            # JSONパース
+            feedback = json.loads(content)
+            log_payload(logger, "QA", qa)
+            log_payload(logger, "フィードバック結果", feedback)
+            
+            # 必要なフィールドが存在するか確認
+            required_fields = ["englishFeedback", "interviewFeedback", "idealAnswer"]
+            for field in required_fields:
+                if field not in feedback:
+                    raise ValueError(f"フィードバック結果に{field}フィールドがありません")
+            
+            return feedback
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"フィードバック結果のJSONパースに失敗しました: {str(e)}")
+            return None
+
+    async def _generate_batched_feedback(
+        self, items: List[Dict[str, Any]], detailed_feedback_config: Dict[str, Any], system_prompt: str, language: str
+    ) -> Dict[int, Dict[str, str]]:
+        """複数のQAペアを1回のチャット補完でまとめて評価する
+        
+        Args:
+            items: index・question・answerを持つQAのリスト（FEEDBACK_BATCH_SIZE件以下）
+            detailed_feedback_config: 詳細フィードバック用のプロンプト設定
+            system_prompt: 単体評価用のシステムプロンプト
+            language: 言語設定（en/ja）
+            
+        Returns:
+            Dict[int, Dict[str, str]]: FeedbackEvaluationとして検証できたQAのindexと評価結果
+        """
+        suffix = "ja" if language.lower() == "ja" else "en"
+        batch_system_prompt = detailed_feedback_config.get(f"batch_system_{suffix}")
+        batch_user_template = detailed_feedback_config.get(f"batch_user_prompt_{suffix}")
+        if not batch_system_prompt or not batch_user_template:
+            raise ValueError(f"一括フィードバック用のプロンプトが設定されていません（言語: {language}）")
+        
+        messages = [
+            {"role": "system", "content": system_prompt + "\n" + str(batch_system_prompt)},
+            {"role": "user", "content": batch_user_template.render(items=items)}
+        ]
+        
+        # 1件あたり300トークンとし、呼び出し1回の上限はFEEDBACK_BATCH_SIZE件分までとする
+        max_tokens = 300 * min(len(items), max(1, settings.FEEDBACK_BATCH_SIZE))
+        
+        logger.info(f"一括詳細フィードバック生成リクエスト（言語: {language}, QA数: {len(items)}）")
+        log_payload(logger, "メッセージ内容", messages)
+        with track_upstream("openai", "feedback_batch"):
+            response = await self._call_upstream(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"}
+                ),
+                priority=PRIORITY_BACKGROUND,
+                tokens=self._estimate_tokens(messages, max_tokens)
+            )
+        record_token_usage("feedback_batch", response.usage)
+        
+        content = response.choices[0].message.content
+        log_payload(logger, "OpenAIレスポンス全文", content)
+        
+        try:
+            response_data = json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"一括フィードバック結果のJSONパースに失敗しました: {str(e)}")
+            return {}
+        
+        elements = response_data.get("feedbacks") if isinstance(response_data, dict) else response_data
+        if not isinstance(elements, list):
+            logger.error("一括フィードバック結果にfeedbacks配列がありません")
+            return {}
+        
+        # 要素ごとにFeedbackEvaluationとして検証し、検証できたものだけを採用する
+        valid_indices = {item["index"] for item in items}
+        results: Dict[int, Dict[str, str]] = {}
+        for position, element in enumerate(elements):
+            if not isinstance(element, dict):
+                continue
+            index = element.get("index")
+            if index not in valid_indices:
+                # indexが欠けている場合は並び順で対応付ける
+                index = items[position]["index"] if position < len(items) else None
+            if index is None or index in results:
+                continue
+            try:
+                results[index] = FeedbackEvaluation.model_validate(element).model_dump()
+            except ValueError as e:
+                logger.warning(f"一括フィードバック結果の検証に失敗しました: index={index}, error={str(e)}")
+        
+        return results
+
     async def generate_detailed_feedback(
-        self, qa_list: List[Dict[str, str]], max_feedback_count: int = 1, language: str = "en"
+        self,
+        qa_list: List[Dict[str, str]],
+        max_feedback_count: int = 1,
+        language: str = "en",
+        mode: Optional[str] = None
     ) -> List[Optional[Dict[str, str]]]:
         """
         面接のQ&Aごとに詳細なフィードバックを生成する
         
+        parallelモードでは各QAの生成を同時実行数（DETAILED_FEEDBACK_CONCURRENCY）を上限に
+        並列で行い、QAごとにタイムアウト（DETAILED_FEEDBACK_ITEM_TIMEOUT秒）を設ける。
+        batchedモードではQAをFEEDBACK_BATCH_SIZE件ずつのバッチに分け、バッチごとに1回の
+        チャット補完でまとめて評価し（同時実行数はparallelモードと共通）、
+        検証に失敗したQAのみ個別に再生成する。
+        結果は元の順序で返し、失敗・タイムアウトしたQAはNoneとする。
+        
         Args:
             qa_list: 質問と回答のリスト
             max_feedback_count: フィードバックを生成する最大QA数
             language: 言語設定（en/ja）
+            mode: 生成モード（parallel/batched）。省略時はDETAILED_FEEDBACK_MODE
             
         Returns:
             各QAの評価結果のリスト（英語力フィードバック、面接対応力フィードバック、理想的な回答）
@@ -293,92 +871,124 @@ class OpenAIService:
             if not qa_list:
                 logger.error("QAリストが空です")
                 return []
-                
-            # 評価結果を格納するリスト
-            results = []
-            
-            # プロンプトファイルの読み込み
-            prompt_path = settings.INTERVIEW_QUESTIONS_PROMPT_PATH
-            prompt_data = await self._load_prompt(prompt_path)
             
             # 詳細フィードバック用のプロンプト設定を取得
-            detailed_feedback_config = prompt_data.get("detailed_feedback", {})
+            detailed_feedback_config = self.prompts.get_section("detailed_feedback")
             
             # 言語に応じたシステムプロンプト選択
             if language.lower() == "ja":
-                system_prompt = detailed_feedback_config.get("system_ja", "")
-                user_prompt_template = detailed_feedback_config.get("user_prompt_ja", "")
+                system_prompt = str(detailed_feedback_config.get("system_ja", ""))
+                user_prompt_template = detailed_feedback_config.get("user_prompt_ja")
             else:
-                system_prompt = detailed_feedback_config.get("system_en", "")
-                user_prompt_template = detailed_feedback_config.get("user_prompt_en", "")
+                system_prompt = str(detailed_feedback_config.get("system_en", ""))
+                user_prompt_template = detailed_feedback_config.get("user_prompt_en")
             
             # プロンプトが空の場合はエラー
-            if not system_prompt:
+            if not system_prompt or not user_prompt_template:
                 raise ValueError(f"詳細フィードバック用のシステムプロンプトが設定されていません（言語: {language}）")
             
-            # 各QAペアを評価
+            # 各QAペアを並列に評価
             logger.info(f"詳細フィードバック生成リクエスト（言語: {language}, QA数: {len(qa_list)}）")
-            for i, qa in enumerate(qa_list):
-                # 最大フィードバック数を超えた場合はNoneを追加
-                if i >= max_feedback_count:
-                    results.append(None)
-                    continue
-                    
-                question = qa.get("question", "")
-                answer = qa.get("answer", "")
-                
-                # 質問または回答が空の場合はスキップ
-                if not question or not answer:
-                    logger.warning(f"質問または回答が空です: index={i}")
-                    results.append(None)
-                    continue
-                
-                # ユーザープロンプトの作成
-                user_prompt = user_prompt_template.format(
-                    question=question,
-                    answer=answer
-                )
-                
-                # APIリクエストの準備
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-                
-                # リクエスト前にログ出力
-                logger.info(f"詳細フィードバック生成リクエスト（言語: {language}, QA index: {i}）")
-                logger.info(f"メッセージ内容: {json.dumps(messages, ensure_ascii=False, indent=2)}") 
-                # OpenAI APIを呼び出してフィードバックを生成
-                response = await self.client.chat.completions.create(
+            semaphore = asyncio.Semaphore(max(1, settings.DETAILED_FEEDBACK_CONCURRENCY))
+            timeout = settings.DETAILED_FEEDBACK_ITEM_TIMEOUT
+            
+            prompt_version = self.prompts.version("detailed_feedback")
+            
+            def feedback_key(qa: Dict[str, str]) -> str:
+                return ResultCache.make_key(
+                    "detailed_feedback",
+                    language=language.lower(),
                     model=self.model,
-                    messages=messages,
-                    temperature=0.3,
-                    max_tokens=300,
-                    response_format={"type": "json_object"}
+                    prompt_version=prompt_version,
+                    question=qa.get("question", ""),
+                    answer=qa.get("answer", "")
                 )
+            
+            def generate_single(index: int, qa: Dict[str, str]):
+                # 同じQAのフィードバックはキャッシュから返し、生成中のものは結果を共有する
+                if self.result_cache is None:
+                    return self._generate_single_feedback(index, qa, system_prompt, user_prompt_template, language)
+                return self.result_cache.get_or_compute(
+                    feedback_key(qa),
+                    lambda: self._generate_single_feedback(index, qa, system_prompt, user_prompt_template, language)
+                )
+            
+            async def evaluate(index: int, qa: Dict[str, str]) -> Optional[Dict[str, str]]:
+                async with semaphore:
+                    try:
+                        return await asyncio.wait_for(generate_single(index, qa), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        logger.error(f"詳細フィードバック生成がタイムアウトしました: index={index}, timeout={timeout}秒")
+                    except Exception as e:
+                        logger.error(f"詳細フィードバック生成に失敗しました: index={index}, error={str(e)}", exc_info=True)
+                    return None
+            
+            # 最大フィードバック数を超えたQAはNoneのまま
+            results: List[Optional[Dict[str, str]]] = [None] * len(qa_list)
+            target_indices = list(range(min(max_feedback_count, len(qa_list))))
+            
+            mode = (mode or settings.DETAILED_FEEDBACK_MODE).lower()
+            if mode == "batched" and len(target_indices) > 1:
+                items = []
+                for i in target_indices:
+                    question = qa_list[i].get("question", "")
+                    answer = qa_list[i].get("answer", "")
+                    if not question or not answer:
+                        logger.warning(f"質問または回答が空です: index={i}")
+                        continue
+                    # キャッシュ済みのQAは一括生成の対象から外す
+                    cached = self.result_cache.get(feedback_key(qa_list[i])) if self.result_cache is not None else None
+                    if cached is not None:
+                        results[i] = cached
+                        continue
+                    items.append({"index": i, "question": question, "answer": answer})
                 
-                # レスポンスの処理
-                content = response.choices[0].message.content
-                logger.info(f"OpenAIレスポンス全文: {content}")
-                
-                try:
-                    # JSONパース
-                    feedback = json.loads(content)
-                    logger.info(f"QA: {qa}")
-                    logger.info(f"フィードバック結果: {feedback}")
-                    
-                    # 必要なフィールドが存在するか確認
-                    required_fields = ["englishFeedback", "interviewFeedback", "idealAnswer"]
-                    for field in required_fields:
-                        if field not in feedback:
-                            raise ValueError(f"フィードバック結果に{field}フィールドがありません")
-                    
-                    # 結果を追加
-                    results.append(feedback)
+                async def evaluate_batch(batch: List[Dict[str, Any]]) -> Dict[int, Dict[str, str]]:
+                    def generate_batch():
+                        return self._generate_batched_feedback(batch, detailed_feedback_config, system_prompt, language)
                     
-                except json.JSONDecodeError as e:
-                    logger.error(f"フィードバック結果のJSONパースに失敗しました: {str(e)}")
-                    results.append(None)
+                    async with semaphore:
+                        try:
+                            if self.result_cache is None:
+                                return await asyncio.wait_for(generate_batch(), timeout=timeout * 2)
+                            # 同じQAの組み合わせの一括生成が実行中であれば結果を共有する
+                            batch_key = ResultCache.make_key(
+                                "detailed_feedback_batch",
+                                language=language.lower(),
+                                model=self.model,
+                                prompt_version=prompt_version,
+                                items=batch
+                            )
+                            generated = await asyncio.wait_for(
+                                self.result_cache.get_or_compute(batch_key, generate_batch, should_cache=bool),
+                                timeout=timeout * 2
+                            )
+                            for i, feedback in generated.items():
+                                self.result_cache.put(feedback_key(qa_list[i]), feedback)
+                            return generated
+                        except asyncio.TimeoutError:
+                            logger.error(f"一括詳細フィードバック生成がタイムアウトしました: timeout={timeout * 2}秒")
+                        except Exception as e:
+                            logger.error(f"一括詳細フィードバック生成に失敗しました: {str(e)}", exc_info=True)
+                        return {}
+                
+                # 1回の呼び出しの生成トークン数が際限なく増えないよう、一定件数ごとに分割する
+                batch_size = max(1, settings.FEEDBACK_BATCH_SIZE)
+                batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+                batched: Dict[int, Dict[str, str]] = {}
+                for generated in await asyncio.gather(*(evaluate_batch(batch) for batch in batches)):
+                    batched.update(generated)
+                for i, feedback in batched.items():
+                    results[i] = feedback
+                
+                # 一括生成で得られなかったQAのみ個別に再生成する
+                target_indices = [item["index"] for item in items if item["index"] not in batched]
+                if target_indices:
+                    logger.info(f"一括生成に失敗したQAを個別に再生成します: indices={target_indices}")
+            
+            feedbacks = await asyncio.gather(*(evaluate(i, qa_list[i]) for i in target_indices))
+            for i, feedback in zip(target_indices, feedbacks):
+                results[i] = feedback
             
             return results
                 
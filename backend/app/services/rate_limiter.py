@@ -0,0 +1,300 @@
+import re
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 優先度（値が小さいほど先に実行する）
+PRIORITY_INTERACTIVE = 0  # 質問生成・音声合成など、ユーザーが応答を待っている呼び出し
+PRIORITY_BACKGROUND = 1   # 評価・詳細フィードバックなど、多少遅れても問題ない呼び出し
+
+QUEUE_WAIT = metrics.histogram(
+    "upstream_queue_wait_seconds", "レート制限による外部API呼び出しの待ち時間（秒）", ("service", "priority"),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+RETRIES = metrics.counter(
+    "upstream_retries_total", "外部API呼び出しの再試行回数", ("service", "reason")
+)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """x-ratelimit-reset-* ヘッダーの値（"1s", "6m0s", "20ms" など）を秒に変換する"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _retry_after(headers: Optional[httpx.Headers]) -> Optional[float]:
+    if headers is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+class UpstreamRateLimitError(Exception):
+    """再試行しても外部APIのレート制限が解消しなかった場合の例外"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Budget:
+    """1分あたりの上限に対するトークンバケット（上限0は無制限）
+
+    上限はAPIキー単位で全ワーカーが共有するため、shareで割った分をこのプロセスの予算とする。
+    """
+
+    def __init__(self, limit_per_minute: float, share: int = 1):
+        self.share = max(1, share)
+        self.limit = float(limit_per_minute) / self.share
+        self.available = self.limit
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.limit > 0:
+            self.available = min(self.limit, self.available + (now - self.updated) * self.limit / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.limit <= 0:
+            return 0.0
+        # 1回で上限を超える量は上限まで貯まれば実行する
+        amount = min(amount, self.limit)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) * 60.0 / self.limit
+
+    def consume(self, amount: float) -> None:
+        if self.limit > 0:
+            self.available -= min(amount, self.limit)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float], now: float) -> None:
+        """レスポンスヘッダーの上限・残量に合わせる（他のプロセスとの共有分も反映される）"""
+        self.refill(now)
+        if limit is not None and limit > 0:
+            limit /= self.share
+            if self.limit <= 0:
+                self.available = limit
+            self.limit = limit
+        if remaining is not None and self.limit > 0:
+            self.available = min(self.available, remaining / self.share)
+
+
+class UpstreamScheduler:
+    """外部API呼び出しのレート制限・優先度付きキュー・再試行を管理するスケジューラ
+
+    1分あたりのリクエスト数とトークン数をトークンバケットで管理し、上限に達した場合は
+    優先度順（同じ優先度では到着順）に待たせる。上限はレスポンスの
+    x-ratelimit-* ヘッダーから学習し、ワーカー数（WEB_CONCURRENCY）で等分する。429・5xx・接続エラーは
+    ジッター付き指数バックオフで再試行し、429の場合は全呼び出しを一時停止する。
+    """
+
+    def __init__(
+        self,
+        service: str = "openai",
+        requests_per_minute: float = None,
+        tokens_per_minute: float = None,
+        max_retries: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        workers: int = None,
+    ):
+        self.service = service
+        workers = settings.WEB_CONCURRENCY if workers is None else workers
+        self.requests = _Budget(settings.OPENAI_RPM_LIMIT if requests_per_minute is None else requests_per_minute, workers)
+        self.tokens = _Budget(settings.OPENAI_TPM_LIMIT if tokens_per_minute is None else tokens_per_minute, workers)
+        self.max_retries = settings.OPENAI_RETRY_MAX_ATTEMPTS if max_retries is None else max_retries
+        self.base_delay = settings.OPENAI_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.OPENAI_RETRY_MAX_DELAY if max_delay is None else max_delay
+
+        # (優先度, 到着順, 推定トークン数, Future)
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._paused_until = 0.0
+
+        self.granted = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.exhausted = 0
+        self.max_queue_depth = 0
+
+    # --- レート制限 ---
+
+    def _dispatch(self) -> None:
+        """待機中の呼び出しを優先度順に、予算の範囲で実行可能にする"""
+        self._timer = None
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        while self._waiters:
+            priority, sequence, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            wait = max(self._paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.granted += 1
+            future.set_result(None)
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, tokens: float = 0) -> None:
+        """予算が空くまで待つ（優先度の高い呼び出しから順に実行する）"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+        if future.done():
+            return
+        start = time.monotonic()
+        try:
+            await future
+        finally:
+            QUEUE_WAIT.observe(time.monotonic() - start, service=self.service, priority=str(priority))
+            if not future.done():
+                future.cancel()
+
+    def observe_response(self, headers: httpx.Headers) -> None:
+        """レスポンスのx-ratelimit-*ヘッダーから上限と残量を取り込む"""
+        def number(name: str) -> Optional[float]:
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        if "x-ratelimit-limit-requests" not in headers and "x-ratelimit-limit-tokens" not in headers:
+            return
+        now = time.monotonic()
+        self.requests.sync(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"), now)
+        self.tokens.sync(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"), now)
+        # 残量がなくなった場合はリセットまで停止する
+        if number("x-ratelimit-remaining-requests") == 0:
+            reset = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self._paused_until = max(self._paused_until, now + reset)
+
+    async def on_response(self, response: httpx.Response) -> None:
+        """httpxのレスポンスフック（全呼び出しのヘッダーを取り込む）"""
+        self.observe_response(response.headers)
+
+    # --- 再試行 ---
+
+    @staticmethod
+    def _classify(error: Exception) -> Tuple[Optional[str], Optional[float]]:
+        """再試行すべきエラーなら理由とRetry-Afterを返す（再試行しない場合は理由None）"""
+        # openaiはクライアントの作成時に読み込み済みのため、ここでのインポートは辞書の参照のみ
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            # クォータ不足は待っても解消しない
+            if getattr(error, "code", None) == "insufficient_quota":
+                return None, None
+            return "rate_limit", _retry_after(error.response.headers)
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code >= 500 or error.status_code == 408:
+                return "server_error", _retry_after(error.response.headers)
+            return None, None
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return "connection", None
+        return None, None
+
+    def _backoff(self, attempt: int) -> float:
+        """ジッター付き指数バックオフ（0〜上限の一様乱数）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: int = PRIORITY_INTERACTIVE,
+        tokens: float = 0,
+    ) -> T:
+        """予算を確保してから呼び出し、一時的なエラーは再試行する
+
+        Args:
+            call: 外部APIを呼び出すコルーチン関数（再試行のたびに呼び出す）
+            priority: 優先度（PRIORITY_INTERACTIVE / PRIORITY_BACKGROUND）
+            tokens: 推定トークン数（プロンプト＋最大生成トークン数）
+        """
+        attempt = 0
+        while True:
+            await self.acquire(priority, tokens)
+            try:
+                return await call()
+            except Exception as e:
+                reason, retry_after = self._classify(e)
+                if reason == "rate_limit":
+                    self.rate_limited += 1
+                if reason is None or attempt >= self.max_retries:
+                    if reason == "rate_limit":
+                        self.exhausted += 1
+                        raise UpstreamRateLimitError(
+                            f"外部APIのレート制限により処理できませんでした: {str(e)}",
+                            retry_after=retry_after or self.max_delay
+                        ) from e
+                    raise
+                delay = min(self.max_delay, retry_after) if retry_after is not None else self._backoff(attempt)
+                if reason == "rate_limit":
+                    # 他の呼び出しも同じ上限に当たるため、全体を停止して待つ
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                attempt += 1
+                self.retries += 1
+                RETRIES.inc(service=self.service, reason=reason)
+                logger.warning(f"外部API呼び出しを再試行します（{attempt}/{self.max_retries}回目, {delay:.2f}秒後）: {reason}")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        return {
+            "queue_depth": sum(1 for _, _, _, future in self._waiters if not future.done()),
+            "max_queue_depth": self.max_queue_depth,
+            "granted": self.granted,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "exhausted": self.exhausted,
+            "workers": self.requests.share,
+            "requests_limit": self.requests.limit,
+            "requests_available": self.requests.available,
+            "tokens_limit": self.tokens.limit,
+            "tokens_available": self.tokens.available,
+            "paused_seconds": max(0.0, self._paused_until - time.monotonic()),
+        }
+
+
+# OpenAI API呼び出しで共有するスケジューラ
+openai_scheduler = UpstreamScheduler("openai")
@@ -0,0 +1,134 @@
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: Any) -> str:
+    """キャッシュキー用にテキストを正規化する（NFKC・連続する空白の畳み込み・前後の空白除去）"""
+    return " ".join(unicodedata.normalize("NFKC", str(text or "")).split())
+
+
+class ResultCache:
+    """評価・フィードバック結果のキャッシュ（TTL・最大件数付きLRU）
+
+    キーは (種別, 言語, モデル, プロンプトのバージョン, 正規化した対話内容) のハッシュ。
+    同じキーの計算が実行中の場合は新たに呼び出さず、実行中の結果を共有する（single-flight）。
+    値は取り出し時にコピーして返すため、呼び出し側で変更してもキャッシュには影響しない。
+    """
+
+    def __init__(self, ttl_seconds: float = None, max_entries: int = None):
+        self.ttl_seconds = settings.RESULT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        # キー -> (有効期限, 値)
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(kind: str, **parts: Any) -> str:
+        """キャッシュキーを生成する（文字列は正規化してからハッシュする）"""
+        def normalize(value: Any) -> Any:
+            if isinstance(value, str):
+                return normalize_text(value)
+            if isinstance(value, dict):
+                return {key: normalize(item) for key, item in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [normalize(item) for item in value]
+            return value
+
+        payload = json.dumps({"kind": kind, **normalize(parts)}, ensure_ascii=False, sort_keys=True)
+        return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: value is not None
+    ) -> Any:
+        """キャッシュにあれば返し、なければfactoryで計算して保存する
+
+        Args:
+            key: キャッシュキー
+            factory: 結果を計算するコルーチン関数
+            should_cache: 結果を保存するかどうかの判定（既定ではNone以外を保存）
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.misses += 1
+
+            async def compute() -> Any:
+                try:
+                    value = await factory()
+                    if should_cache(value):
+                        self.put(key, value)
+                    return value
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = asyncio.ensure_future(compute())
+            # 待機側がすべてキャンセルされた場合も例外が未取得のまま残らないようにする
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+
+        # 待機側のタイムアウト・キャンセルで共有中の計算が中断されないようにする
+        value = await asyncio.shield(task)
+        return copy.deepcopy(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        lookups = self.hits + self.misses + self.shared
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "hit_ratio": (self.hits + self.shared) / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+        }
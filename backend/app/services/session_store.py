@@ -0,0 +1,231 @@
+import json
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """面接セッション（メタデータと対話履歴）を保持するストアの基底クラス
+
+    セッションはsession_idで識別し、クライアントは新しいターンのみを送信する。
+    1セッションあたりのメモリは最大メッセージ数と1メッセージあたりの最大文字数で制限する。
+    """
+
+    def __init__(self, ttl_seconds: int = None, max_messages: int = None, max_message_chars: int = None):
+        self.ttl_seconds = settings.SESSION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_messages = settings.SESSION_MAX_MESSAGES if max_messages is None else max_messages
+        self.max_message_chars = settings.SESSION_MAX_MESSAGE_CHARS if max_message_chars is None else max_message_chars
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def _normalize_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """保存用にroleとcontentのみを取り出し、長すぎる内容を切り詰める"""
+        normalized = []
+        for msg in messages:
+            content = str(msg.get("content", ""))
+            if len(content) > self.max_message_chars:
+                content = content[:self.max_message_chars]
+            normalized.append({"role": str(msg.get("role", "")), "content": content})
+        return normalized
+
+    async def create(self, metadata: Dict[str, Any]) -> str:
+        """セッションを作成してsession_idを返す"""
+        raise NotImplementedError
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """セッションを取得する（{"metadata": ..., "history": [...]}、存在しない場合はNone）"""
+        raise NotImplementedError
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        """対話履歴にメッセージを追加する（セッションが存在しない場合はFalse）"""
+        raise NotImplementedError
+
+    async def update_metadata(self, session_id: str, values: Dict[str, Any]) -> bool:
+        """メタデータを更新する（セッションが存在しない場合はFalse）"""
+        raise NotImplementedError
+
+    async def delete(self, session_id: str) -> None:
+        """セッションを削除する"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        return {}
+
+
+class InMemorySessionStore(SessionStore):
+    """プロセス内メモリのセッションストア（TTL・最大セッション数付きLRU）"""
+
+    def __init__(self, max_sessions: int = None, **kwargs):
+        super().__init__(**kwargs)
+        self.max_sessions = settings.SESSION_MAX_SESSIONS if max_sessions is None else max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.expired_sessions = 0
+        self.evicted_sessions = 0
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        # 最終アクセス順に並んでいるため、先頭から期限切れを削除する
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session["last_access"] <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.expired_sessions += 1
+
+    def _touch(self, session_id: str) -> Optional[Dict[str, Any]]:
+        self._purge_expired()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        session["last_access"] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def create(self, metadata: Dict[str, Any]) -> str:
+        self._purge_expired()
+        while len(self._sessions) >= self.max_sessions and self._sessions:
+            self._sessions.popitem(last=False)
+            self.evicted_sessions += 1
+        session_id = self.new_session_id()
+        self._sessions[session_id] = {
+            "metadata": dict(metadata),
+            "history": [],
+            "last_access": time.monotonic(),
+        }
+        return session_id
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self._touch(session_id)
+        if session is None:
+            return None
+        return {"metadata": dict(session["metadata"]), "history": list(session["history"])}
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        session = self._touch(session_id)
+        if session is None:
+            return False
+        history = session["history"]
+        history.extend(self._normalize_messages(messages))
+        if len(history) > self.max_messages:
+            del history[:len(history) - self.max_messages]
+        return True
+
+    async def update_metadata(self, session_id: str, values: Dict[str, Any]) -> bool:
+        session = self._touch(session_id)
+        if session is None:
+            return False
+        session["metadata"].update(values)
+        return True
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "expired_sessions": self.expired_sessions,
+            "evicted_sessions": self.evicted_sessions,
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """Redis互換サーバーを使うセッションストア（複数ワーカー間で共有する場合に使用）
+
+    対話履歴はリスト、メタデータはJSON文字列として保存し、アクセスのたびにTTLを延長する。
+    """
+
+    def __init__(self, url: str = None, key_prefix: str = "interview:session:", **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE_BACKEND=redis を使用するには redis パッケージが必要です") from e
+        self.client = redis.from_url(url or settings.SESSION_REDIS_URL, decode_responses=True)
+        self.key_prefix = key_prefix
+
+    def _keys(self, session_id: str) -> tuple[str, str]:
+        base = f"{self.key_prefix}{session_id}"
+        return f"{base}:meta", f"{base}:history"
+
+    async def _exists(self, session_id: str) -> bool:
+        meta_key, history_key = self._keys(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.expire(meta_key, self.ttl_seconds)
+            pipe.expire(history_key, self.ttl_seconds)
+            meta_exists, _ = await pipe.execute()
+        return bool(meta_exists)
+
+    async def create(self, metadata: Dict[str, Any]) -> str:
+        session_id = self.new_session_id()
+        meta_key, _ = self._keys(session_id)
+        await self.client.set(meta_key, json.dumps(metadata, ensure_ascii=False), ex=self.ttl_seconds)
+        return session_id
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        meta_key, history_key = self._keys(session_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(meta_key)
+            pipe.lrange(history_key, 0, -1)
+            pipe.expire(meta_key, self.ttl_seconds)
+            pipe.expire(history_key, self.ttl_seconds)
+            metadata, history, _, _ = await pipe.execute()
+        if metadata is None:
+            return None
+        return {"metadata": json.loads(metadata), "history": [json.loads(item) for item in history]}
+
+    async def append(self, session_id: str, messages: List[Dict[str, Any]]) -> bool:
+        if not await self._exists(session_id):
+            return False
+        _, history_key = self._keys(session_id)
+        normalized = self._normalize_messages(messages)
+        if not normalized:
+            return True
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(history_key, *[json.dumps(msg, ensure_ascii=False) for msg in normalized])
+            pipe.ltrim(history_key, -self.max_messages, -1)
+            pipe.expire(history_key, self.ttl_seconds)
+            await pipe.execute()
+        return True
+
+    async def update_metadata(self, session_id: str, values: Dict[str, Any]) -> bool:
+        meta_key, _ = self._keys(session_id)
+        metadata = await self.client.get(meta_key)
+        if metadata is None:
+            return False
+        merged = {**json.loads(metadata), **values}
+        await self.client.set(meta_key, json.dumps(merged, ensure_ascii=False), ex=self.ttl_seconds)
+        return True
+
+    async def delete(self, session_id: str) -> None:
+        await self.client.delete(*self._keys(session_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+def create_session_store() -> SessionStore:
+    """設定（SESSION_STORE_BACKEND）に応じたセッションストアを作成する"""
+    backend = settings.SESSION_STORE_BACKEND.lower()
+    if backend == "redis":
+        logger.info(f"Redisセッションストアを使用します: {settings.SESSION_REDIS_URL}")
+        return RedisSessionStore()
+    if backend != "memory":
+        logger.warning(f"不明なセッションストア指定のためメモリストアを使用します: {settings.SESSION_STORE_BACKEND}")
+    if settings.WEB_CONCURRENCY > 1:
+        logger.error(
+            f"メモリストアはワーカー間で共有されないため、{settings.WEB_CONCURRENCY}ワーカーでは"
+            "別のワーカーに振り分けられたセッションが見つかりません（SESSION_STORE_BACKEND=redisを設定してください）"
+        )
+    return InMemorySessionStore()
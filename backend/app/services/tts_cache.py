@@ -0,0 +1,204 @@
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """音声合成結果のコンテンツアドレス型キャッシュ
+
+    キーは (text, voice, model, format) のハッシュ。
+    メモリ層はバイト数上限付きのLRU、ディスク層（任意）は
+    キー先頭2文字でシャーディングしたディレクトリにサイズ上限付きで保存する。
+    1件あたりの上限（max_item_bytes）を超える音声はどちらの層にも保存しない。
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = None,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = None,
+        max_item_bytes: int = None,
+    ):
+        self.memory_max_bytes = settings.TTS_CACHE_MEMORY_MAX_BYTES if memory_max_bytes is None else memory_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else (Path(settings.TTS_CACHE_DISK_DIR) if settings.TTS_CACHE_DISK_DIR else None)
+        self.disk_max_bytes = settings.TTS_CACHE_DISK_MAX_BYTES if disk_max_bytes is None else disk_max_bytes
+        self.max_item_bytes = settings.TTS_CACHE_MAX_ITEM_BYTES if max_item_bytes is None else max_item_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # ディスク層のインデックス（キー -> サイズ、LRU順）
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_loaded = False
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.skipped_too_large = 0
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, response_format: str) -> str:
+        """キャッシュキーを生成する"""
+        payload = "\x1f".join([model, voice, response_format, text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # --- メモリ層 ---
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            return data
+
+    def _memory_put(self, key: str, data: bytes) -> None:
+        size = len(data)
+        if size > self.memory_max_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = data
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self.memory_evictions += 1
+
+    # --- ディスク層 ---
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.bin"
+
+    def _load_disk_index(self) -> None:
+        """既存のディスクキャッシュを走査してインデックスを構築する（古い順）"""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.disk_dir.glob("*/*.bin"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+            for _, key, size in sorted(entries):
+                self._disk_index[key] = size
+                self._disk_bytes += size
+            logger.info(f"TTSディスクキャッシュを読み込みました: {len(self._disk_index)}件, {self._disk_bytes}バイト")
+        except OSError as e:
+            logger.error(f"TTSディスクキャッシュの読み込みに失敗しました: {str(e)}")
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        while self._disk_bytes > self.disk_max_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            try:
+                self._disk_path(key).unlink()
+            except OSError:
+                pass
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            self._load_disk_index()
+            if key not in self._disk_index:
+                return None
+            self._disk_index.move_to_end(key)
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except OSError:
+            with self._lock:
+                size = self._disk_index.pop(key, 0)
+                self._disk_bytes -= size
+            return None
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        size = len(data)
+        if size > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"TTSディスクキャッシュへの書き込みに失敗しました: {str(e)}")
+            return
+        with self._lock:
+            self._load_disk_index()
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = size
+            self._disk_bytes += size
+            self._evict_disk()
+
+    # --- 公開API ---
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """キャッシュから音声データを取得する（メモリ層 → ディスク層の順）"""
+        data = self._memory_get(key)
+        if data is not None:
+            self.memory_hits += 1
+            self.bytes_saved += len(data)
+            return data
+
+        if self.disk_dir is not None:
+            data = await asyncio.to_thread(self._disk_get, key)
+            if data is not None:
+                self.disk_hits += 1
+                self.bytes_saved += len(data)
+                self._memory_put(key, data)
+                return data
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes) -> None:
+        """音声データをキャッシュに保存する"""
+        if len(data) > self.max_item_bytes:
+            self.skipped_too_large += 1
+            return
+        self._memory_put(key, data)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._disk_put, key, data)
+
+    def stats(self) -> Dict[str, Any]:
+        """モニタリング用の統計情報を返す"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_evictions": self.memory_evictions,
+            "disk_enabled": self.disk_dir is not None,
+            "disk_entries": len(self._disk_index),
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "max_item_bytes": self.max_item_bytes,
+            "skipped_too_large": self.skipped_too_large,
+        }
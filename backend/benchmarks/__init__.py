@@ -0,0 +1 @@
+"""負荷試験・レイテンシ計測のためのベンチマーク（使い方は benchmarks/run.py を参照）"""
@@ -0,0 +1,43 @@
+"""ベンチマーク対象のバックエンドを起動する
+
+イベントループの遅延はアプリ組み込みの監視（app.core.loop_monitor）で計測し、
+GET /api/admin/loop-monitor で取得する（?reset=true でウォームアップ分を捨てて計測し直す）。
+ベンチマークでは計測間隔を短くし、計測期間中の全サンプルからパーセンタイルを計算する。
+
+使い方（環境変数は benchmarks.run が設定する）:
+    python -m benchmarks.app_server --port 8100
+"""
+import os
+import argparse
+
+import uvicorn
+
+# 計測期間中のサンプルを全て保持できる件数
+LOOP_LAG_WINDOW = 100000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベンチマーク用のバックエンド起動")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--loop-lag-interval", type=float, default=0.05, help="イベントループ遅延の計測間隔（秒）")
+    args = parser.parse_args()
+
+    # 設定はアプリの読み込み時に確定するため、インポートより前に指定する
+    os.environ["LOOP_MONITOR_ENABLED"] = "true"
+    os.environ["LOOP_MONITOR_INTERVAL"] = str(args.loop_lag_interval)
+    os.environ.setdefault("LOOP_MONITOR_WINDOW", str(LOOP_LAG_WINDOW))
+
+    from app.main import app
+
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
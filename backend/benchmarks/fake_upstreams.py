@@ -0,0 +1,286 @@
+"""ベンチマーク用のOpenAI API・Google Speech-to-Text APIの疑似サーバー
+
+OpenAI（/v1/chat/completions・/v1/audio/speech・/v1/models）はHTTP、
+Speech-to-Text（Recognize）はgRPCで応答する。遅延・ゆらぎ・エラー率はプロファイルで指定する。
+
+使い方:
+    python -m benchmarks.fake_upstreams --openai-port 9100 --google-port 9101 --profile realistic
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+from dataclasses import dataclass, asdict, replace
+from typing import Dict, Any, AsyncIterator, Optional
+
+import grpc
+import uvicorn
+from google.cloud import speech_v1 as speech
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+
+@dataclass
+class LatencyProfile:
+    """1種類の外部API呼び出しの応答特性"""
+    latency_ms: float = 0.0          # 最初のバイトまでの遅延
+    jitter_ms: float = 0.0           # 遅延に加えるゆらぎ（0〜jitter_msの一様乱数）
+    chunk_delay_ms: float = 0.0      # ストリーミング時のチャンク間隔
+    error_rate: float = 0.0          # 500を返す割合
+    rate_limit_rate: float = 0.0     # 429を返す割合
+
+    async def wait(self) -> None:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def pick_error(self) -> Optional[int]:
+        value = random.random()
+        if value < self.rate_limit_rate:
+            return 429
+        if value < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+
+@dataclass
+class UpstreamProfile:
+    chat: LatencyProfile
+    tts: LatencyProfile
+    stt: LatencyProfile
+    # 音声認識の遅延に加える音声1KBあたりの処理時間
+    stt_ms_per_kb: float = 0.0
+
+
+PROFILES: Dict[str, UpstreamProfile] = {
+    # 外部APIの遅延をほぼなくし、バックエンド自体のオーバーヘッドを測る
+    "fast": UpstreamProfile(
+        chat=LatencyProfile(latency_ms=5, jitter_ms=5),
+        tts=LatencyProfile(latency_ms=5, jitter_ms=5),
+        stt=LatencyProfile(latency_ms=5, jitter_ms=5),
+    ),
+    # 本番で観測される程度の遅延
+    "realistic": UpstreamProfile(
+        chat=LatencyProfile(latency_ms=400, jitter_ms=400, chunk_delay_ms=15),
+        tts=LatencyProfile(latency_ms=300, jitter_ms=300, chunk_delay_ms=20),
+        stt=LatencyProfile(latency_ms=500, jitter_ms=500),
+        stt_ms_per_kb=2.0,
+    ),
+    # 遅延が大きく、エラー・レート制限が混ざる状態
+    "degraded": UpstreamProfile(
+        chat=LatencyProfile(latency_ms=1500, jitter_ms=2000, chunk_delay_ms=40, error_rate=0.02, rate_limit_rate=0.05),
+        tts=LatencyProfile(latency_ms=1000, jitter_ms=1500, chunk_delay_ms=40, error_rate=0.02, rate_limit_rate=0.05),
+        stt=LatencyProfile(latency_ms=1500, jitter_ms=1500, error_rate=0.02),
+        stt_ms_per_kb=5.0,
+    ),
+}
+
+_sequence = itertools.count(1)
+
+
+def _completion_content(max_tokens: int) -> str:
+    """質問生成・評価・詳細フィードバック・一括フィードバックのいずれのパーサーでも読める応答を返す
+
+    質問は呼び出しごとに変え、音声合成キャッシュにヒットし続けないようにする。
+    """
+    number = next(_sequence)
+    question = {
+        "reaction": "Thank you for sharing that.",
+        "question": f"Could you tell me about a challenging project you worked on? (#{number})",
+    }
+    # 質問生成（max_tokens=50）は実際の応答と同じ程度の長さにする
+    if max_tokens <= 100:
+        return json.dumps(question)
+    feedback = {
+        "englishFeedback": "Clear and mostly accurate English with minor article errors.",
+        "interviewFeedback": "Good structure. Add a concrete metric to support the result.",
+        "idealAnswer": "In my last role I reduced API latency by 40% by introducing caching.",
+    }
+    return json.dumps({
+        **question,
+        "englishSkill": {"overall": 4.0, "vocabulary": 4.0, "grammar": 3.5},
+        "interviewSkill": {"overall": 3.5, "logicalStructure": 4.0, "dataSupport": 3.0},
+        "summary": {
+            "strengths": "Explains the background clearly.",
+            "improvements": "Quantify the impact of the work.",
+            "actions": "Prepare two or three stories with measurable results.",
+        },
+        **feedback,
+        # 一括フィードバックはQA数×300トークンで呼び出される
+        "feedbacks": [{"index": index, **feedback} for index in range(max(1, max_tokens // 300))],
+    })
+
+
+def _usage(content: str) -> Dict[str, int]:
+    completion_tokens = max(1, len(content) // 4)
+    return {"prompt_tokens": 200, "completion_tokens": completion_tokens, "total_tokens": 200 + completion_tokens}
+
+
+def _error_response(status_code: int) -> JSONResponse:
+    if status_code == 429:
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (benchmark)", "type": "requests", "code": "rate_limit_exceeded"}},
+            status_code=429,
+            headers={"retry-after-ms": "200"},
+        )
+    return JSONResponse({"error": {"message": "Internal server error (benchmark)", "type": "server_error"}}, status_code=500)
+
+
+def create_openai_app(profile: UpstreamProfile) -> Starlette:
+    """OpenAI APIの疑似サーバー（ASGIアプリ）を作成する"""
+
+    async def retrieve_model(request: Request) -> JSONResponse:
+        model = request.path_params["model"]
+        return JSONResponse({"id": model, "object": "model", "created": 0, "owned_by": "benchmark"})
+
+    async def chat_completions(request: Request) -> Response:
+        body = await request.json()
+        await profile.chat.wait()
+        error = profile.chat.pick_error()
+        if error is not None:
+            return _error_response(error)
+
+        content = _completion_content(int(body.get("max_tokens") or 300))
+        completion_id = f"chatcmpl-bench-{next(_sequence)}"
+        created = int(time.time())
+        model = body.get("model", "benchmark")
+
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": _usage(content),
+            })
+
+        async def events() -> AsyncIterator[bytes]:
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, usage: Optional[Dict[str, int]] = None) -> bytes:
+                data = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                if usage:
+                    data["usage"] = usage
+                return f"data: {json.dumps(data)}\n\n".encode("utf-8")
+
+            yield chunk({"role": "assistant", "content": ""})
+            # 4文字を1トークンとみなして送る
+            for offset in range(0, len(content), 4):
+                if profile.chat.chunk_delay_ms > 0:
+                    await asyncio.sleep(profile.chat.chunk_delay_ms / 1000)
+                yield chunk({"content": content[offset:offset + 4]})
+            yield chunk({}, finish_reason="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, usage=_usage(content))
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def audio_speech(request: Request) -> Response:
+        body = await request.json()
+        await profile.tts.wait()
+        error = profile.tts.pick_error()
+        if error is not None:
+            return _error_response(error)
+
+        # 1文字あたり約0.06秒・128kbpsのmp3に相当するサイズ
+        size = max(4096, len(body.get("input", "")) * 1000)
+
+        async def audio() -> AsyncIterator[bytes]:
+            for offset in range(0, size, 4096):
+                if profile.tts.chunk_delay_ms > 0 and offset:
+                    await asyncio.sleep(profile.tts.chunk_delay_ms / 1000)
+                yield b"\xff" * min(4096, size - offset)
+
+        return StreamingResponse(audio(), media_type="audio/mpeg")
+
+    return Starlette(routes=[
+        Route("/v1/models/{model:path}", retrieve_model, methods=["GET"]),
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/audio/speech", audio_speech, methods=["POST"]),
+    ])
+
+
+def create_speech_server(profile: UpstreamProfile, port: int) -> grpc.aio.Server:
+    """Speech-to-Text API（Recognize）の疑似gRPCサーバーを作成する"""
+
+    async def recognize(request: speech.RecognizeRequest, context: grpc.aio.ServicerContext) -> speech.RecognizeResponse:
+        await profile.stt.wait()
+        size_kb = len(request.audio.content) / 1024
+        if profile.stt_ms_per_kb > 0:
+            await asyncio.sleep(size_kb * profile.stt_ms_per_kb / 1000)
+        if profile.stt.pick_error() is not None:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "Service unavailable (benchmark)")
+        return speech.RecognizeResponse(results=[
+            speech.SpeechRecognitionResult(alternatives=[
+                speech.SpeechRecognitionAlternative(
+                    transcript="I led the migration of our billing system to a new platform.",
+                    confidence=0.95,
+                )
+            ])
+        ])
+
+    handler = grpc.method_handlers_generic_handler("google.cloud.speech.v1.Speech", {
+        "Recognize": grpc.unary_unary_rpc_method_handler(
+            recognize,
+            request_deserializer=speech.RecognizeRequest.deserialize,
+            response_serializer=speech.RecognizeResponse.serialize,
+        ),
+    })
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((handler,))
+    server.add_insecure_port(f"127.0.0.1:{port}")
+    return server
+
+
+async def serve(profile: UpstreamProfile, openai_port: int, google_port: int) -> None:
+    speech_server = create_speech_server(profile, google_port)
+    await speech_server.start()
+    config = uvicorn.Config(
+        create_openai_app(profile), host="127.0.0.1", port=openai_port,
+        log_level="warning", access_log=False, lifespan="off",
+    )
+    try:
+        await uvicorn.Server(config).serve()
+    finally:
+        await speech_server.stop(grace=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベンチマーク用の外部API疑似サーバー")
+    parser.add_argument("--openai-port", type=int, default=9100)
+    parser.add_argument("--google-port", type=int, default=9101)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--error-rate", type=float, default=None, help="全APIのエラー率を上書きする")
+    parser.add_argument("--rate-limit-rate", type=float, default=None, help="OpenAI APIの429の割合を上書きする")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    if args.error_rate is not None:
+        profile = replace(
+            profile,
+            chat=replace(profile.chat, error_rate=args.error_rate),
+            tts=replace(profile.tts, error_rate=args.error_rate),
+            stt=replace(profile.stt, error_rate=args.error_rate),
+        )
+    if args.rate_limit_rate is not None:
+        profile = replace(
+            profile,
+            chat=replace(profile.chat, rate_limit_rate=args.rate_limit_rate),
+            tts=replace(profile.tts, rate_limit_rate=args.rate_limit_rate),
+        )
+    print(json.dumps({"profile": args.profile, **asdict(profile)}), flush=True)
+    asyncio.run(serve(profile, args.openai_port, args.google_port))
+
+
+if __name__ == "__main__":
+    main()
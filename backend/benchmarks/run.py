@@ -0,0 +1,471 @@
+"""面接フローの負荷試験・レイテンシ計測
+
+外部APIの疑似サーバー（benchmarks.fake_upstreams）とバックエンド（benchmarks.app_server）を
+子プロセスで起動し、仮想ユーザーが面接フローを並行して実行する。
+
+1回の面接:
+    (質問生成 → 音声合成 → 音声認識) × ターン数 → 面接評価 → 詳細フィードバック
+
+ルートごとのp50/p95/p99、スループット、バックエンドのイベントループ遅延をJSONに保存する。
+--baselineに以前の結果を指定すると、p95とスループットを比較して劣化があれば終了コード1で終わる。
+
+使い方（backendディレクトリで実行）:
+    python -m benchmarks.run --users 20 --interviews 100 --turns 3 --profile realistic
+    python -m benchmarks.run --baseline benchmarks/results/before.json --max-regression 0.2
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from app.core.loop_monitor import percentile
+from benchmarks.fake_upstreams import PROFILES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+API_PREFIX = "/api/interview"
+
+# p95の比較で無視する差（ミリ秒）。速いルートのゆらぎで誤検知しないようにする
+MIN_REGRESSION_MS = 5.0
+
+
+class Recorder:
+    """ルートごとのレイテンシとエラーを記録する"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status_codes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.enabled = True
+
+    def record(self, route: str, elapsed: float, status: str, ok: bool) -> None:
+        if not self.enabled:
+            return
+        self.latencies[route].append(elapsed * 1000)
+        self.status_codes[route][status] += 1
+        if not ok:
+            self.errors[route] += 1
+
+    def total_requests(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        routes = {}
+        for route in sorted(self.latencies):
+            values = self.latencies[route]
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "error_rate": self.errors[route] / len(values) if values else 0.0,
+                "mean_ms": sum(values) / len(values) if values else 0.0,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+                "max_ms": max(values, default=0.0),
+                "status_codes": dict(self.status_codes[route]),
+            }
+        return routes
+
+
+def synthetic_answer(seconds: float, sample_rate: int = 48000) -> Optional[bytes]:
+    """ブラウザの録音に近い回答音声（WEBM/Opus）を作成する（PyAVがない場合はNone）
+
+    前後に無音があり、発話（振幅を揺らした正弦波）と短い間が交互に続く。
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+
+    silence = [0.0] * int(sample_rate * 1.0)
+    samples: List[float] = list(silence)
+    speech_seconds = max(0.0, seconds - 2.0)
+    for i in range(int(sample_rate * speech_seconds)):
+        t = i / sample_rate
+        # 1.5秒の発話と0.5秒の間を繰り返す
+        if t % 2.0 < 1.5:
+            envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * t)
+            samples.append(0.3 * envelope * math.sin(2 * math.pi * (180 + 40 * math.sin(2 * math.pi * t)) * t))
+        else:
+            samples.append(0.0)
+    samples.extend(silence)
+    pcm = b"".join(int(value * 32767).to_bytes(2, "little", signed=True) for value in samples)
+
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=sample_rate, layout="mono")
+        stream.bit_rate = 64000
+        frame = av.AudioFrame(format="s16", layout="mono", samples=len(samples))
+        frame.planes[0].update(pcm)
+        frame.sample_rate = sample_rate
+        frame.pts = 0
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+class InterviewClient:
+    """1人の仮想ユーザーとして面接フローを実行する"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args: argparse.Namespace):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.audio = None
+        if args.audio_seconds > 0:
+            self.audio = synthetic_answer(args.audio_seconds)
+            if self.audio is None:
+                print("PyAV（av）がないため、音声認識にはランダムなデータを送ります")
+
+    async def _request(self, route: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, API_PREFIX + path, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(route, time.perf_counter() - start, type(e).__name__, False)
+            return None
+        self.recorder.record(route, time.perf_counter() - start, str(response.status_code), response.is_success)
+        return response if response.is_success else None
+
+    async def ask_question(self, history: List[Dict[str, str]]) -> Optional[str]:
+        if not self.args.stream:
+            response = await self._request(
+                "POST /questions/general", "POST", "/questions/general", json={"message_history": history}
+            )
+            return response.json()["question"] if response is not None else None
+
+        # ストリーミングは最初のイベントまでの時間（体感の待ち時間）も記録する
+        route = "POST /questions/general/stream"
+        start = time.perf_counter()
+        question, first_event, event = None, None, None
+        try:
+            async with self.client.stream(
+                "POST", API_PREFIX + "/questions/general/stream", json={"message_history": history}
+            ) as response:
+                if not response.is_success:
+                    await response.aread()
+                    self.recorder.record(route, time.perf_counter() - start, str(response.status_code), False)
+                    return None
+                async for line in response.aiter_lines():
+                    if first_event is None and line.startswith("event:"):
+                        first_event = time.perf_counter() - start
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:") and event == "done":
+                        question = json.loads(line[len("data:"):])["question"]
+        except httpx.HTTPError as e:
+            self.recorder.record(route, time.perf_counter() - start, type(e).__name__, False)
+            return None
+        self.recorder.record(route, time.perf_counter() - start, "200", question is not None)
+        if first_event is not None:
+            self.recorder.record(f"{route} (first event)", first_event, "200", True)
+        return question
+
+    async def synthesize(self, text: str) -> bool:
+        response = await self._request("POST /text-to-speech", "POST", "/text-to-speech", json={"text": text})
+        return response is not None
+
+    async def recognize(self, audio: bytes) -> Optional[str]:
+        route = "POST /speech-to-text"
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(
+                API_PREFIX + "/speech-to-text", content=audio, params={"language": "en-US"},
+                headers={"Content-Type": "application/octet-stream"},
+            )
+        except httpx.HTTPError as e:
+            self.recorder.record(route, time.perf_counter() - start, type(e).__name__, False)
+            return None
+        # 音声認識のエラーは200でerrorフィールドに入る
+        ok = response.is_success and not response.json().get("error")
+        self.recorder.record(route, time.perf_counter() - start, str(response.status_code), ok)
+        return response.json().get("transcript") if ok else None
+
+    async def run_interview(self, user_id: int, interview_id: int) -> bool:
+        history: List[Dict[str, str]] = []
+        qa_list: List[Dict[str, str]] = []
+        audio = self.audio or random.randbytes(self.args.audio_kb * 1024)
+
+        for turn in range(self.args.turns):
+            question = await self.ask_question(history)
+            if question is None:
+                return False
+            if not await self.synthesize(question):
+                return False
+            await self._think()
+            transcript = await self.recognize(audio)
+            if transcript is None:
+                return False
+            # 回答を面接ごとに変え、評価結果のキャッシュにヒットしないようにする
+            answer = f"{transcript} (user {user_id}, interview {interview_id}, turn {turn})"
+            history += [{"role": "assistant", "content": question}, {"role": "user", "content": answer}]
+            qa_list.append({"question": question, "answer": answer})
+
+        evaluation = await self._request(
+            "POST /evaluation", "POST", "/evaluation", json={"message_history": history, "language": "en"}
+        )
+        feedback = await self._request(
+            "POST /detailed-feedback", "POST", "/detailed-feedback",
+            json={"qa_list": qa_list, "max_feedback_count": len(qa_list), "language": "en"},
+        )
+        return evaluation is not None and feedback is not None
+
+    async def _think(self) -> None:
+        if self.args.think_time > 0:
+            await asyncio.sleep(random.uniform(0, 2 * self.args.think_time))
+
+
+async def _wait_until_ready(url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"プロセスが終了しました（終了コード {process.returncode}）: {url}")
+            try:
+                response = await client.get(url)
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"起動待ちがタイムアウトしました: {url}")
+
+
+def _start_process(module: str, arguments: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log_file = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(
+        [sys.executable, "-m", module, *arguments],
+        cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+
+
+def _stop_process(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _app_env(args: argparse.Namespace, work_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.openai_port}/v1",
+        "GOOGLE_SPEECH_EMULATOR_HOST": f"127.0.0.1:{args.google_port}",
+        "LOG_DIR": os.path.join(work_dir, "logs"),
+        "ACCESS_LOG_FILE": os.path.join(work_dir, "logs", "access.log"),
+        "TRACING_FILE": os.path.join(work_dir, "logs", "traces.jsonl"),
+        # 管理用エンドポイント（ブロッキング検出）はトークンを設定した場合のみ有効になる
+        "ADMIN_API_TOKEN": args.admin_token,
+        "PYTHONPATH": BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+# バックエンド組み込みのイベントループ遅延計測・ブロッキング検出（無効な場合や古いバージョンではNoneになる）
+LOOP_MONITOR_PATH = "/api/admin/loop-monitor"
+# 音声認識前の前処理（無音除去・変換）の統計
+STT_PREPROCESS_PATH = "/api/admin/stt-preprocess"
+
+
+async def _fetch_json(
+    client: httpx.AsyncClient, path: str, reset: bool = False, headers: Optional[Dict[str, str]] = None
+) -> Optional[Dict[str, Any]]:
+    try:
+        response = await client.get(path, params={"reset": "true"} if reset else None, headers=headers)
+        return response.json() if response.is_success else None
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+async def run_load(args: argparse.Namespace, app_url: str) -> Dict[str, Any]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        interview_client = InterviewClient(client, recorder, args)
+
+        # ウォームアップ（記録しない）
+        recorder.enabled = False
+        await asyncio.gather(*(interview_client.run_interview(-1, i) for i in range(args.warmup)))
+        recorder.enabled = True
+        admin_headers = {"X-Admin-Token": args.admin_token}
+        await _fetch_json(client, LOOP_MONITOR_PATH, reset=True, headers=admin_headers)
+
+        counter = iter(range(args.interviews))
+        completed, failed = 0, 0
+
+        async def user(user_id: int) -> None:
+            nonlocal completed, failed
+            for interview_id in counter:
+                if await interview_client.run_interview(user_id, interview_id):
+                    completed += 1
+                else:
+                    failed += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(user_id) for user_id in range(args.users)))
+        duration = time.perf_counter() - start
+        loop_monitor = await _fetch_json(client, LOOP_MONITOR_PATH, headers=admin_headers)
+        stt_preprocess = await _fetch_json(client, STT_PREPROCESS_PATH, headers=admin_headers)
+
+    return {
+        "duration_s": duration,
+        "interviews": {"completed": completed, "failed": failed},
+        "requests": recorder.total_requests(),
+        "throughput_rps": recorder.total_requests() / duration if duration else 0.0,
+        "interviews_per_minute": completed * 60 / duration if duration else 0.0,
+        "routes": recorder.summary(),
+        "loop_monitor": loop_monitor,
+        "stt_preprocess": stt_preprocess,
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> Dict[str, Any]:
+    """p95とスループットを基準の結果と比較する（max_regressionは許容する劣化の割合）"""
+    routes = {}
+    regressions = []
+    for route, current in result["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if previous is None:
+            continue
+        change = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] if previous["p95_ms"] else 0.0
+        routes[route] = {"baseline_p95_ms": previous["p95_ms"], "p95_ms": current["p95_ms"], "change": change}
+        if change > max_regression and current["p95_ms"] - previous["p95_ms"] > MIN_REGRESSION_MS:
+            regressions.append(f"{route}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms ({change:+.0%})")
+
+    throughput_change = 0.0
+    if baseline.get("throughput_rps"):
+        throughput_change = (result["throughput_rps"] - baseline["throughput_rps"]) / baseline["throughput_rps"]
+        if throughput_change < -max_regression:
+            regressions.append(
+                f"throughput: {baseline['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s ({throughput_change:+.0%})"
+            )
+    return {"routes": routes, "throughput_change": throughput_change, "regressions": regressions}
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    print(f"\n面接 {report['interviews']['completed']}件完了 / {report['interviews']['failed']}件失敗, "
+          f"{report['requests']}リクエスト, {report['duration_s']:.1f}秒, "
+          f"{report['throughput_rps']:.1f} req/s, {report['interviews_per_minute']:.1f} 面接/分")
+    print(f"{'route':<44}{'count':>7}{'err':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for route, stats in report["routes"].items():
+        print(f"{route:<44}{stats['count']:>7}{stats['errors']:>6}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    if report.get("loop_monitor"):
+        monitor = report["loop_monitor"]
+        print(f"イベントループ遅延: p50 {monitor['lag_p50_ms']:.1f}ms, p99 {monitor['lag_p99_ms']:.1f}ms, "
+              f"max {monitor['lag_max_ms']:.1f}ms")
+        print(f"ブロッキング検出: {monitor['blocked_count']}回, 合計 {monitor['blocked_total_ms']:.1f}ms"
+              f"（詳細は結果JSONのloop_monitor.blocking_events）")
+    if (report.get("stt_preprocess") or {}).get("enabled"):
+        preprocess = report["stt_preprocess"]
+        print(f"音声の前処理: {preprocess['requests']}件, {preprocess['bytes_in']}バイト -> {preprocess['bytes_out']}バイト, "
+              f"{preprocess['audio_ms_in'] / 1000:.1f}秒 -> {preprocess['audio_ms_out'] / 1000:.1f}秒, "
+              f"処理時間 合計{preprocess['processing_ms']:.0f}ms")
+    comparison = report.get("comparison")
+    if comparison:
+        for line in comparison["regressions"] or ["基準からの劣化はありません"]:
+            print(f"[比較] {line}")
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    processes: List[subprocess.Popen] = []
+    work_dir = tempfile.mkdtemp(prefix="ai-interview-bench-")
+    try:
+        app_url = args.app_url
+        if app_url is None:
+            upstreams = _start_process(
+                "benchmarks.fake_upstreams",
+                ["--openai-port", str(args.openai_port), "--google-port", str(args.google_port), "--profile", args.profile],
+                dict(os.environ, PYTHONPATH=BACKEND_DIR), os.path.join(work_dir, "fake_upstreams.log"),
+            )
+            processes.append(upstreams)
+            await _wait_until_ready(f"http://127.0.0.1:{args.openai_port}/v1/models/ping", 30, upstreams)
+
+            app = _start_process(
+                "benchmarks.app_server", ["--port", str(args.app_port)],
+                _app_env(args, work_dir), os.path.join(work_dir, "app_server.log"),
+            )
+            processes.append(app)
+            app_url = f"http://127.0.0.1:{args.app_port}"
+            # 外部APIのクライアント作成・事前接続はバックグラウンドで行われるため、準備完了まで待つ
+            await _wait_until_ready(f"{app_url}/api/ready", 60, app)
+
+        result = await run_load(args, app_url)
+    finally:
+        for process in reversed(processes):
+            _stop_process(process)
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("baseline", "output")},
+        **result,
+        "logs_dir": work_dir,
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(result, json.load(f), args.max_regression)
+        exit_code = 1 if report["comparison"]["regressions"] else 0
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_summary(report)
+    print(f"結果を保存しました: {output}")
+    return exit_code
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="面接フローの負荷試験")
+    parser.add_argument("--users", type=int, default=10, help="同時に面接を行う仮想ユーザー数")
+    parser.add_argument("--interviews", type=int, default=50, help="実行する面接の総数")
+    parser.add_argument("--turns", type=int, default=3, help="1回の面接の質問数")
+    parser.add_argument("--warmup", type=int, default=2, help="計測前に実行する面接数")
+    parser.add_argument("--think-time", type=float, default=0.0, help="質問を聞いてから回答するまでの平均時間（秒）")
+    parser.add_argument("--audio-seconds", type=float, default=10.0, help="音声認識に送る回答音声（WEBM/Opus、前後に無音あり）の長さ（秒、0でランダムなデータ）")
+    parser.add_argument("--audio-kb", type=int, default=64, help="ランダムなデータを送る場合のサイズ（KB）")
+    parser.add_argument("--stream", action="store_true", help="質問生成にストリーミング版（SSE）を使う")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic", help="疑似外部APIの応答特性")
+    parser.add_argument("--app-url", default=None, help="起動済みのバックエンドを計測する（疑似サーバーも起動しない）")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--admin-token", default="benchmark", help="管理用エンドポイントのトークン（ADMIN_API_TOKEN）")
+    parser.add_argument("--openai-port", type=int, default=9100)
+    parser.add_argument("--google-port", type=int, default=9101)
+    parser.add_argument("--env", action="append", default=[], help="バックエンドに渡す環境変数（KEY=VALUE、複数指定可）")
+    parser.add_argument("--timeout", type=float, default=120.0, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--output", default=None, help="結果のJSONファイル（既定: benchmarks/results/benchmark-日時.json）")
+    parser.add_argument("--baseline", default=None, help="比較する以前の結果のJSONファイル")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="許容するp95・スループットの劣化の割合")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    sys.exit(asyncio.run(main_async(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
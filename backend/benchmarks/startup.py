@@ -0,0 +1,241 @@
+"""ワーカーの起動時間（コールドスタート）の計測
+
+1. インポート時間: python -X importtime で app.main の読み込みにかかる時間と、時間のかかるモジュールを調べる
+2. 起動時間: バックエンド（benchmarks.app_server）を起動してから、/api/health（リクエストの受け付け開始）と
+   /api/ready（外部APIのクライアント作成・事前接続の完了）が応答するまでの時間を計る
+   外部APIには疑似サーバー（benchmarks.fake_upstreams）を使う
+
+それぞれ複数回実行した中央値をJSONに保存する。
+--baselineに以前の結果を指定すると中央値を比較し、劣化があれば終了コード1で終わる。
+--budget-msを指定すると、app.mainのインポート時間が予算を超えた場合も終了コード1で終わる。
+
+使い方（backendディレクトリで実行）:
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --baseline benchmarks/results/startup-before.json --budget-ms 800
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from benchmarks.fake_upstreams import PROFILES
+from benchmarks.run import BACKEND_DIR, RESULTS_DIR, _app_env, _start_process, _stop_process, _wait_until_ready
+
+# 比較で無視する差（ミリ秒）。プロセス起動のゆらぎで誤検知しないようにする
+MIN_REGRESSION_MS = 20.0
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def parse_importtime(output: str) -> Dict[str, Dict[str, Any]]:
+    """-X importtimeの出力をモジュールごとの自身の時間・累計時間（ミリ秒）と親モジュールに変換する
+
+    子モジュールは親より先に出力されるため、親が出力された時点でそれまでの子に親を設定する。
+    """
+    modules: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[int, List[str]] = {}
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        modules[name] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": depth,
+            "parent": None,
+        }
+        for child in pending.pop(depth + 1, []):
+            modules[child]["parent"] = name
+        pending.setdefault(depth, []).append(name)
+    return modules
+
+
+def measure_import(env: Dict[str, str], module: str) -> Dict[str, Dict[str, Any]]:
+    """新しいプロセスでモジュールを読み込み、importtimeの結果を返す"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module}の読み込みに失敗しました:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def summarize_imports(runs: List[Dict[str, Dict[str, Any]]], module: str, top: int) -> Dict[str, Any]:
+    """複数回の結果から、対象モジュールの中央値と時間のかかるモジュール（累計時間の中央値）をまとめる"""
+    total = statistics.median(run[module]["cumulative_ms"] for run in runs if module in run)
+    # 対象モジュールが直接読み込んだモジュールごとに集計する
+    packages: Dict[str, List[float]] = {}
+    for run in runs:
+        for name, item in run.items():
+            if item["parent"] == module:
+                packages.setdefault(name, []).append(item["cumulative_ms"])
+    slowest = sorted(
+        ((name, statistics.median(values)) for name, values in packages.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:top]
+    return {
+        "module": module,
+        "median_ms": total,
+        "runs_ms": [run[module]["cumulative_ms"] for run in runs if module in run],
+        "slowest": [{"module": name, "cumulative_ms": ms} for name, ms in slowest],
+    }
+
+
+async def _wait_for(client: httpx.AsyncClient, url: str, process: subprocess.Popen, timeout: float) -> float:
+    """URLが200を返すまで短い間隔で問い合わせ、到達した時刻を返す"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"プロセスが終了しました（終了コード {process.returncode}）: {url}")
+        try:
+            response = await client.get(url)
+            if response.status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.01)
+    raise RuntimeError(f"起動待ちがタイムアウトしました: {url}")
+
+
+async def measure_cold_start(args: argparse.Namespace, work_dir: str, run: int) -> Dict[str, float]:
+    """バックエンドを起動し、/api/healthと/api/readyが応答するまでの時間（ミリ秒）を返す"""
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    started = time.perf_counter()
+    app = _start_process(
+        "benchmarks.app_server", ["--port", str(args.app_port)],
+        _app_env(args, work_dir), os.path.join(work_dir, f"app_server-{run}.log"),
+    )
+    try:
+        async with httpx.AsyncClient(timeout=1.0) as client:
+            healthy = await _wait_for(client, f"{app_url}/api/health", app, args.timeout)
+            ready = await _wait_for(client, f"{app_url}/api/ready", app, args.timeout)
+    finally:
+        _stop_process(app)
+    return {"health_ms": (healthy - started) * 1000, "ready_ms": (ready - started) * 1000}
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> Dict[str, Any]:
+    """インポート時間・起動時間の中央値を基準の結果と比較する"""
+    metrics = {
+        "import_ms": (result["import"]["median_ms"], baseline.get("import", {}).get("median_ms")),
+        "health_ms": (result["cold_start"]["health_ms"], baseline.get("cold_start", {}).get("health_ms")),
+        "ready_ms": (result["cold_start"]["ready_ms"], baseline.get("cold_start", {}).get("ready_ms")),
+    }
+    changes = {}
+    regressions = []
+    for name, (current, previous) in metrics.items():
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        changes[name] = {"baseline_ms": previous, "ms": current, "change": change}
+        if change > max_regression and current - previous > MIN_REGRESSION_MS:
+            regressions.append(f"{name}: {previous:.0f}ms -> {current:.0f}ms ({change:+.0%})")
+    return {"metrics": changes, "regressions": regressions}
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    imports = report["import"]
+    print(f"\n{imports['module']}のインポート: 中央値 {imports['median_ms']:.0f}ms（{len(imports['runs_ms'])}回）")
+    print(f"{'module':<40}{'cumulative(ms)':>16}")
+    for item in imports["slowest"]:
+        print(f"{item['module']:<40}{item['cumulative_ms']:>16.1f}")
+    cold_start = report["cold_start"]
+    print(f"起動から/api/healthまで: 中央値 {cold_start['health_ms']:.0f}ms, "
+          f"/api/readyまで: 中央値 {cold_start['ready_ms']:.0f}ms（{len(cold_start['runs'])}回）")
+    for line in report.get("budget_violations", []):
+        print(f"[予算] {line}")
+    comparison = report.get("comparison")
+    if comparison:
+        for line in comparison["regressions"] or ["基準からの劣化はありません"]:
+            print(f"[比較] {line}")
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    work_dir = tempfile.mkdtemp(prefix="ai-interview-startup-")
+    env = _app_env(args, work_dir)
+
+    import_runs = [measure_import(env, args.module) for _ in range(args.runs)]
+    imports = summarize_imports(import_runs, args.module, args.top)
+
+    upstreams = _start_process(
+        "benchmarks.fake_upstreams",
+        ["--openai-port", str(args.openai_port), "--google-port", str(args.google_port), "--profile", args.profile],
+        dict(os.environ, PYTHONPATH=BACKEND_DIR), os.path.join(work_dir, "fake_upstreams.log"),
+    )
+    try:
+        await _wait_until_ready(f"http://127.0.0.1:{args.openai_port}/v1/models/ping", 30, upstreams)
+        cold_starts = [await measure_cold_start(args, work_dir, run) for run in range(args.runs)]
+    finally:
+        _stop_process(upstreams)
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("baseline", "output")},
+        "import": imports,
+        "cold_start": {
+            "health_ms": statistics.median(run["health_ms"] for run in cold_starts),
+            "ready_ms": statistics.median(run["ready_ms"] for run in cold_starts),
+            "runs": cold_starts,
+        },
+        "logs_dir": work_dir,
+    }
+    exit_code = 0
+    if args.budget_ms is not None and imports["median_ms"] > args.budget_ms:
+        report["budget_violations"] = [f"{args.module}のインポート {imports['median_ms']:.0f}ms > 予算 {args.budget_ms:.0f}ms"]
+        exit_code = 1
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.max_regression)
+        if report["comparison"]["regressions"]:
+            exit_code = 1
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_summary(report)
+    print(f"結果を保存しました: {output}")
+    return exit_code
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ワーカーの起動時間の計測")
+    parser.add_argument("--runs", type=int, default=5, help="計測の回数（中央値を使う）")
+    parser.add_argument("--module", default="app.main", help="インポート時間を計測するモジュール")
+    parser.add_argument("--top", type=int, default=15, help="表示する時間のかかるモジュールの数")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="fast", help="疑似外部APIの応答特性")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--admin-token", default="benchmark", help="管理用エンドポイントのトークン（ADMIN_API_TOKEN）")
+    parser.add_argument("--openai-port", type=int, default=9100)
+    parser.add_argument("--google-port", type=int, default=9101)
+    parser.add_argument("--env", action="append", default=[], help="バックエンドに渡す環境変数（KEY=VALUE、複数指定可）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="起動待ちのタイムアウト（秒）")
+    parser.add_argument("--budget-ms", type=float, default=None, help="インポート時間の上限（ミリ秒、超えた場合は終了コード1）")
+    parser.add_argument("--output", default=None, help="結果のJSONファイル（既定: benchmarks/results/startup-日時.json）")
+    parser.add_argument("--baseline", default=None, help="比較する以前の結果のJSONファイル")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="許容する起動時間の劣化の割合")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    sys.exit(asyncio.run(main_async(parse_args())))
+
+
+if __name__ == "__main__":
+    main()
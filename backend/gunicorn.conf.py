@@ -0,0 +1,72 @@
+"""本番用のgunicorn設定（uvicornワーカーによるマルチプロセス構成）
+
+使い方:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+環境変数:
+    BIND: 待ち受けアドレス（既定: 0.0.0.0:8000）
+    WEB_CONCURRENCY: ワーカー数（既定: 使用可能なCPUコア数）
+        セッション・キャッシュ・レート制限の予算はワーカーごとに持つため、複数ワーカーでは
+        SESSION_STORE_BACKEND=redis が必要（それ以外の場合はエラーで起動しない）
+    GRACEFUL_TIMEOUT: 終了時に実行中のリクエストを待つ秒数（既定: 60）
+    WORKER_TIMEOUT: 応答のないワーカーを再起動するまでの秒数（既定: 120）
+    KEEPALIVE: keep-alive接続を保持する秒数（既定: 75）
+    MAX_REQUESTS / MAX_REQUESTS_JITTER: 指定件数を処理したワーカーを再起動する（既定: 0 = 無効）
+    PRELOAD_APP: マスタープロセスでアプリを読み込んでからforkするか（既定: true）
+    SERVER_RELOAD: コード変更時に自動再読み込みするか（開発用、既定: false）
+"""
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# アプリと同じ.envを読み込み、ワーカー数の判定に使う
+load_dotenv()
+
+
+def _cpu_count() -> int:
+    # コンテナのCPU割り当て（affinity）を優先する
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# 処理の大半は外部APIの待ちのため、1コアに1つのイベントループ（ワーカー）とする
+workers = int(os.getenv("WEB_CONCURRENCY", str(_cpu_count())))
+# メモリ上のセッションはワーカー間で共有されず、別のワーカーに振り分けられたリクエストが404になるため、
+# 共有ストアなしで複数ワーカーを指定した場合は起動しない
+if workers > 1 and os.getenv("SESSION_STORE_BACKEND", "memory").lower() != "redis":
+    sys.exit(
+        f"[gunicorn.conf] WEB_CONCURRENCY={workers} で起動するには SESSION_STORE_BACKEND=redis が必要です"
+        "（docker-compose.ymlのredisサービスを使うか、WEB_CONCURRENCY=1 を指定してください）"
+    )
+# アプリ側でワーカー数に応じてレート制限の予算を分割する
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "app.core.server.ProductionUvicornWorker"
+
+# 音声認識（STT_TIMEOUT）が完了するまで待てる長さにする
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "60"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+# nginxのupstream keepaliveより長くし、nginx側から接続を閉じるようにする
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+
+reload = os.getenv("SERVER_RELOAD", "false").lower() == "true"
+# アプリの読み込み（プロンプト・SDKのインポート）をfork前に1度だけ行い、ワーカーの起動を速くする
+# 自動再読み込みとは併用できない
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true" and not reload
+
+
+def when_ready(server):
+    # アプリは外部APIのSDKを最初のクライアント作成時に読み込むため、preload時はここでfork前に読み込んでおく
+    if preload_app:
+        from app.core.server import preload_sdks
+        preload_sdks()
+
+# アクセスログはアプリ側のログに任せ、エラーログは標準出力へ出す
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
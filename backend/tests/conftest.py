@@ -0,0 +1,32 @@
+"""テスト共通の設定
+
+アプリの設定はモジュールの読み込み時に確定するため、app配下をインポートする前に環境変数を指定する。
+外部APIには接続せず、ログ・キャッシュは一時ディレクトリに書き出す。
+"""
+import os
+import importlib
+import tempfile
+
+import pytest
+
+_work_dir = tempfile.mkdtemp(prefix="ai-interview-tests-")
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("LOG_DIR", os.path.join(_work_dir, "logs"))
+os.environ.setdefault("ACCESS_LOG_FILE", os.path.join(_work_dir, "logs", "access.log"))
+os.environ.setdefault("TRACING_FILE", os.path.join(_work_dir, "logs", "traces.jsonl"))
+os.environ.setdefault("PROMPTS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "core", "prompts"))
+
+
+@pytest.fixture
+def build_app(monkeypatch):
+    """設定を変更してapp.mainのアプリを作り直す（管理用・/metricsのルートは読み込み時の設定で登録が決まる）"""
+    def build(**values):
+        from app.core.config import settings
+
+        for name, value in values.items():
+            monkeypatch.setattr(settings, name, value)
+        import app.main
+        return importlib.reload(app.main).app
+
+    return build
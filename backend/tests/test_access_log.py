@@ -0,0 +1,125 @@
+import asyncio
+import os
+
+from app.core.access_log import AccessLogWriter
+
+
+def writer(tmp_path, **kwargs) -> AccessLogWriter:
+    options = {
+        "path": str(tmp_path / "logs" / "access.log"),
+        "queue_size": 100,
+        "batch_size": 10,
+        "flush_interval": 0.05,
+        "max_bytes": 0,
+        "backup_count": 2,
+        "rotation": "size",
+    }
+    options.update(kwargs)
+    return AccessLogWriter(**options)
+
+
+def read_lines(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_lines_are_written_in_batches(tmp_path):
+    async def scenario():
+        log = writer(tmp_path, batch_size=4, flush_interval=10)
+        for i in range(8):
+            assert log.enqueue(f"line {i}")
+        # 件数上限に達したバッチは時間間隔を待たずに書き込まれる
+        for _ in range(100):
+            if log.written == 8:
+                break
+            await asyncio.sleep(0.01)
+        stats = log.stats()
+        await log.stop()
+        return log, stats
+
+    log, stats = asyncio.run(scenario())
+    assert read_lines(log.path) == [f"line {i}" for i in range(8)]
+    assert stats["written"] == 8
+    assert stats["flushes"] == 2
+
+
+def test_partial_batch_is_flushed_after_interval(tmp_path):
+    async def scenario():
+        log = writer(tmp_path, batch_size=100, flush_interval=0.02)
+        log.enqueue("only")
+        await asyncio.sleep(0.2)
+        written = read_lines(log.path)
+        await log.stop()
+        return written
+
+    assert asyncio.run(scenario()) == ["only"]
+
+
+def test_enqueue_many_counts_every_line(tmp_path):
+    async def scenario():
+        log = writer(tmp_path)
+        assert log.enqueue_many(["a", "b", "c"])
+        assert log.enqueue_many([])
+        await log.stop()
+        return log
+
+    log = asyncio.run(scenario())
+    assert read_lines(log.path) == ["a", "b", "c"]
+    assert log.stats()["enqueued"] == 3
+    assert log.stats()["written"] == 3
+    assert log.stats()["flushes"] == 1
+
+
+def test_full_queue_drops_lines(tmp_path):
+    async def scenario():
+        log = writer(tmp_path, queue_size=2)
+        # 書き込みタスクが動く前に積むため、キューの上限を超えた分は破棄される
+        results = [log.enqueue("1"), log.enqueue("2"), log.enqueue("3"), log.enqueue_many(["4", "5"])]
+        stats = log.stats()
+        await log.stop()
+        return log, results, stats
+
+    log, results, stats = asyncio.run(scenario())
+    assert results == [True, True, False, False]
+    assert stats["dropped"] == 3
+    assert stats["max_queue_depth"] == 2
+    # 停止時にキューに残っていた行も書き込む
+    assert read_lines(log.path) == ["1", "2"]
+
+
+def test_size_rotation_keeps_backup_count(tmp_path):
+    log = writer(tmp_path, max_bytes=10, backup_count=2)
+    for batch in (["aaaa", "aaaa"], ["bbbb", "bbbb"], ["cccc", "cccc"], ["dddd"]):
+        log._write_batch(batch)
+    log._file.close()
+
+    assert read_lines(log.path) == ["dddd"]
+    assert read_lines(log.path + ".1") == ["cccc", "cccc"]
+    assert read_lines(log.path + ".2") == ["bbbb", "bbbb"]
+    assert not os.path.exists(log.path + ".3")
+    assert log.stats()["written"] == 7
+
+
+def test_external_rotation_reopens_moved_file(tmp_path):
+    log = writer(tmp_path, max_bytes=1, rotation="external")
+    log._write_batch(["before"])
+    # logrotateなどによる移動を検知して新しいファイルに書き込む（自身ではローテーションしない）
+    os.replace(log.path, log.path + ".1")
+    log._write_batch(["after"])
+    log._file.close()
+
+    assert read_lines(log.path + ".1") == ["before"]
+    assert read_lines(log.path) == ["after"]
+    assert not os.path.exists(log.path + ".2")
+
+
+def test_write_errors_are_counted(tmp_path):
+    # ディレクトリを作れない場所を指定する
+    blocker = tmp_path / "file"
+    blocker.write_text("", encoding="utf-8")
+    log = writer(tmp_path, path=str(blocker / "access.log"))
+
+    log._write_batch(["lost"])
+
+    assert log.stats()["write_errors"] == 1
+    assert log.stats()["written"] == 0
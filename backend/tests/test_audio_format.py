@@ -0,0 +1,202 @@
+import io
+import math
+import struct
+import wave
+
+import pytest
+
+from app.services import audio_preprocessor
+from app.services.audio_preprocessor import AudioPreprocessor, detect_audio_format
+
+
+def ebml(element_id: bytes, payload: bytes = b"", unknown_size: bool = False) -> bytes:
+    """EBML要素を組み立てる（サイズ不明の場合は8バイトの全ビット1）"""
+    if unknown_size:
+        return element_id + b"\x01\xff\xff\xff\xff\xff\xff\xff" + payload
+    assert len(payload) < 0x7F
+    return element_id + bytes([0x80 | len(payload)]) + payload
+
+
+def track_entry(codec: str, sample_rate: float = None, channels: int = None) -> bytes:
+    audio = b""
+    if sample_rate is not None:
+        audio += ebml(b"\xb5", struct.pack(">d", sample_rate))
+    if channels is not None:
+        audio += ebml(b"\x9f", bytes([channels]))
+    return ebml(b"\xae", ebml(b"\x86", codec.encode("ascii")) + (ebml(b"\xe1", audio) if audio else b""))
+
+
+def webm(*tracks: bytes) -> bytes:
+    """MediaRecorderと同じく、SegmentとClusterのサイズが不明なWebMを作る"""
+    header = ebml(b"\x1a\x45\xdf\xa3", ebml(b"\x42\x82", b"webm"))
+    info = ebml(b"\x15\x49\xa9\x66", ebml(b"\x2a\xd7\xb1", b"\x0f\x42\x40"))
+    cluster = ebml(b"\x1f\x43\xb6\x75", b"\xe7\x81\x00", unknown_size=True)
+    return header + ebml(b"\x18\x53\x80\x67", info + ebml(b"\x16\x54\xae\x6b", b"".join(tracks)) + cluster, unknown_size=True)
+
+
+def ogg(packet: bytes) -> bytes:
+    page_header = b"OggS" + bytes([0, 2]) + b"\x00" * 8 + b"\x01\x00\x00\x00" + b"\x00" * 8
+    return page_header + bytes([1, len(packet)]) + packet
+
+
+def opus_head(channels: int, input_rate: int) -> bytes:
+    return b"OpusHead" + struct.pack("<BBHIhB", 1, channels, 312, input_rate, 0, 0)
+
+
+def wav(sample_rate: int = 16000, channels: int = 1, audio_format: int = 1, bits: int = 16, leading_chunk: bytes = b"") -> bytes:
+    fmt = struct.pack("<HHIIHH", audio_format, channels, sample_rate, sample_rate * channels * bits // 8, channels * bits // 8, bits)
+    body = leading_chunk + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", 4) + b"\x00" * 4
+    return b"RIFF" + struct.pack("<I", 4 + len(body)) + b"WAVE" + body
+
+
+def flac(sample_rate: int, channels: int, bits: int = 16) -> bytes:
+    packed = (sample_rate << 44) | ((channels - 1) << 41) | ((bits - 1) << 36)
+    streaminfo = struct.pack(">HH", 4096, 4096) + b"\x00" * 6 + packed.to_bytes(8, "big") + b"\x00" * 16
+    return b"fLaC" + bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+
+def test_webm_opus_from_track_entry():
+    detected = detect_audio_format(webm(track_entry("A_OPUS", 48000.0, 1)))
+    assert detected.to_dict() == {"container": "webm", "encoding": "WEBM_OPUS", "sample_rate": 48000, "channels": 1}
+
+
+def test_webm_skips_video_track_codec():
+    detected = detect_audio_format(webm(track_entry("V_VP8"), track_entry("A_OPUS", 48000.0, 2)))
+    assert (detected.encoding, detected.sample_rate, detected.channels) == ("WEBM_OPUS", 48000, 2)
+
+
+def test_webm_with_unsupported_audio_codec():
+    detected = detect_audio_format(webm(track_entry("A_VORBIS", 44100.0, 2)))
+    assert detected.container == "webm"
+    assert detected.encoding is None
+    assert detected.sample_rate == 44100
+
+
+def test_truncated_webm_defaults_to_opus():
+    detected = detect_audio_format(webm(track_entry("A_OPUS", 48000.0, 1))[:10])
+    assert detected.encoding == "WEBM_OPUS"
+    assert detected.sample_rate is None
+
+
+@pytest.mark.parametrize("input_rate, expected_rate", [(16000, 16000), (48000, 48000), (44100, 48000)])
+def test_ogg_opus(input_rate, expected_rate):
+    detected = detect_audio_format(ogg(opus_head(1, input_rate)))
+    assert detected.to_dict() == {"container": "ogg", "encoding": "OGG_OPUS", "sample_rate": expected_rate, "channels": 1}
+
+
+def test_ogg_with_other_codec():
+    detected = detect_audio_format(ogg(b"\x01vorbis" + b"\x00" * 23))
+    assert (detected.container, detected.encoding) == ("ogg", None)
+
+
+def test_wav_linear16_from_stdlib_writer():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(22050)
+        writer.writeframes(b"\x00\x00" * 2 * 100)
+    detected = detect_audio_format(buffer.getvalue())
+    assert detected.to_dict() == {"container": "wav", "encoding": "LINEAR16", "sample_rate": 22050, "channels": 2}
+
+
+def test_wav_finds_fmt_after_other_chunks():
+    # 奇数長のチャンクはパディングされる
+    detected = detect_audio_format(wav(8000, leading_chunk=b"LIST" + struct.pack("<I", 3) + b"abc\x00"))
+    assert (detected.encoding, detected.sample_rate) == ("LINEAR16", 8000)
+
+
+@pytest.mark.parametrize("audio_format, bits, encoding", [(7, 8, "MULAW"), (3, 32, None), (1, 24, None)])
+def test_wav_encodings(audio_format, bits, encoding):
+    detected = detect_audio_format(wav(8000, audio_format=audio_format, bits=bits))
+    assert detected.container == "wav"
+    assert detected.encoding == encoding
+
+
+@pytest.mark.parametrize("sample_rate, channels", [(16000, 1), (44100, 2), (96000, 6)])
+def test_flac_streaminfo(sample_rate, channels):
+    detected = detect_audio_format(flac(sample_rate, channels))
+    assert detected.to_dict() == {"container": "flac", "encoding": "FLAC", "sample_rate": sample_rate, "channels": channels}
+
+
+@pytest.mark.parametrize("brand", [b"M4A ", b"isom", b"mp42"])
+def test_mp4_is_detected_but_not_supported_directly(brand):
+    detected = detect_audio_format(b"\x00\x00\x00\x20ftyp" + brand + b"\x00" * 20)
+    assert (detected.container, detected.encoding) == ("mp4", None)
+
+
+@pytest.mark.parametrize("data", [b"", b"RIFF", b"OggS", b"fLaC\x00", b"ID3\x04\x00" + b"\x00" * 20, bytes(range(64))])
+def test_unknown_or_truncated_data(data):
+    assert detect_audio_format(data) is None
+
+
+@pytest.mark.parametrize("container, codec, expected", [
+    ("webm", "libopus", ("webm", "WEBM_OPUS")),
+    ("ogg", "libopus", ("ogg", "OGG_OPUS")),
+    ("wav", "pcm_s16le", ("wav", "LINEAR16")),
+    ("flac", "flac", ("flac", "FLAC")),
+])
+def test_detects_files_written_by_pyav(container, codec, expected):
+    av = pytest.importorskip("av")
+
+    sample_rate = 48000 if codec == "libopus" else 16000
+    count = sample_rate // 10
+    pcm = b"".join(
+        int(8000 * math.sin(2 * math.pi * 440 * i / sample_rate)).to_bytes(2, "little", signed=True) for i in range(count)
+    )
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format=container) as output:
+        stream = output.add_stream(codec, rate=sample_rate, layout="mono")
+        frame = av.AudioFrame(format="s16", layout="mono", samples=count)
+        frame.planes[0].update(pcm)
+        frame.pts = 0
+        frame.sample_rate = sample_rate
+        for packet in stream.encode(frame):
+            output.mux(packet)
+        for packet in stream.encode(None):
+            output.mux(packet)
+    detected = detect_audio_format(buffer.getvalue())
+    assert (detected.container, detected.encoding) == expected
+    assert detected.sample_rate == sample_rate
+    assert detected.channels == 1
+
+
+def pcm16(*segments) -> bytes:
+    """(秒数, 振幅) の区間をつなげた16kHzモノラルの正弦波PCMを作る"""
+    samples = []
+    for seconds, amplitude in segments:
+        samples += [int(amplitude * math.sin(2 * math.pi * 440 * i / 16000)) for i in range(int(16000 * seconds))]
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "audioop", "python"])
+def test_frame_rms_backends_agree(monkeypatch, backend):
+    if backend == "numpy" and audio_preprocessor.numpy is None:
+        pytest.skip("numpy is not installed")
+    if backend == "audioop" and audio_preprocessor.audioop is None:
+        pytest.skip("audioop is not available")
+    if backend != "numpy":
+        monkeypatch.setattr(audio_preprocessor, "numpy", None)
+    if backend == "python":
+        monkeypatch.setattr(audio_preprocessor, "audioop", None)
+
+    # 最後のフレームは端数（100サンプル）になる
+    pcm = pcm16((0.03, 0), (0.03, 10000)) + struct.pack("<100h", *([300] * 100))
+    rms = audio_preprocessor._frame_rms(pcm, 480)
+
+    assert len(rms) == 3
+    assert rms[0] == 0
+    assert rms[1] == pytest.approx(10000 / math.sqrt(2), rel=0.01)
+    assert rms[2] == pytest.approx(300, abs=1)
+    assert audio_preprocessor._frame_rms(b"", 480) == []
+
+
+def test_trim_silence_keeps_padding_around_speech():
+    preprocessor = AudioPreprocessor(vad_threshold_dbfs=-40, vad_frame_ms=30, vad_padding_ms=90)
+    pcm = pcm16((1.5, 0), (0.6, 8000), (1.5, 20))
+
+    trimmed = preprocessor._trim_silence(pcm, 16000, 1)
+
+    # 発話0.6秒＋前後のパディング（90ms）だけが残る
+    assert len(trimmed) / 32 == pytest.approx(600 + 2 * 90, abs=30)
+    assert preprocessor._trim_silence(pcm16((1.0, 20)), 16000, 1) == b""
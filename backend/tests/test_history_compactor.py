@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.history_compactor as history_compactor
+from app.services.history_compactor import HistoryCompactor, count_tokens
+
+
+class FakeChatClient:
+    """chat.completions.createの呼び出しを記録し、番号付きの要約を返す"""
+
+    def __init__(self):
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        summary = f"summary {len(self.requests)}"
+        return SimpleNamespace(
+            usage=None,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=summary))],
+        )
+
+    def user_prompt(self, index: int) -> str:
+        return self.requests[index]["messages"][-1]["content"]
+
+
+def message(i: int) -> dict:
+    # 1メッセージ約100トークン（ASCII 400文字）
+    role = "assistant" if i % 2 == 0 else "user"
+    return {"role": role, "content": f"message-{i:02d} " + "x" * 388}
+
+
+def history(count: int) -> list:
+    return [message(i) for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # tiktokenの有無で結果が変わらないよう、トークン数は概算で数える
+    monkeypatch.setattr(history_compactor, "tiktoken", None)
+    count_tokens.cache_clear()
+    yield
+    count_tokens.cache_clear()
+
+
+@pytest.fixture
+def client():
+    return FakeChatClient()
+
+
+@pytest.fixture
+def compactor(client):
+    compactor = HistoryCompactor(client, model="gpt-4.1-nano")
+    compactor.keep_recent_turns = 1
+    return compactor
+
+
+def test_history_within_budget_is_not_summarized(compactor, client):
+    messages = history(4)
+    result = asyncio.run(compactor.compact(messages, token_budget=10000, session_key="s"))
+    assert result.summary is None
+    assert result.messages == messages
+    assert client.requests == []
+
+
+def test_older_turns_are_replaced_by_summary(compactor, client):
+    messages = history(10)
+    result = asyncio.run(compactor.compact(messages, token_budget=500, session_key="s"))
+    assert result.summary == "summary 1"
+    assert result.messages == messages[-2:]
+    assert result.summarized_count == 8
+    prompt = client.user_prompt(0)
+    assert "message-00" in prompt and "message-07" in prompt
+    assert "message-08" not in prompt
+
+
+def test_cached_summary_is_reused_when_remaining_history_fits(compactor, client):
+    asyncio.run(compactor.compact(history(10), token_budget=500, session_key="s"))
+
+    # 次のターン: 要約済みの8件はそのままで、新しい2件を含めても予算に収まる
+    messages = history(12)
+    result = asyncio.run(compactor.compact(messages, token_budget=500, session_key="s"))
+    assert len(client.requests) == 1
+    assert result.summary == "summary 1"
+    assert result.messages == messages[8:]
+    assert compactor.summary_cache_hits == 1
+
+
+def test_cached_summary_is_extended_with_only_new_messages(compactor, client):
+    asyncio.run(compactor.compact(history(10), token_budget=500, session_key="s"))
+
+    messages = history(14)
+    result = asyncio.run(compactor.compact(messages, token_budget=500, session_key="s"))
+    assert len(client.requests) == 2
+    assert result.summary == "summary 2"
+    assert result.messages == messages[-2:]
+    assert result.summarized_count == 12
+    prompt = client.user_prompt(1)
+    # 既存の要約に、新たに古くなったメッセージだけを追加して要約し直す
+    assert "summary 1" in prompt
+    assert "message-08" in prompt and "message-11" in prompt
+    assert "message-07" not in prompt
+
+
+def test_cached_summary_is_ignored_when_earlier_history_changes(compactor, client):
+    asyncio.run(compactor.compact(history(10), token_budget=500, session_key="s"))
+
+    messages = history(12)
+    messages[3] = {"role": "user", "content": "edited " + "y" * 400}
+    result = asyncio.run(compactor.compact(messages, token_budget=500, session_key="s"))
+    assert len(client.requests) == 2
+    assert result.summary == "summary 2"
+    assert "summary 1" not in client.user_prompt(1)
+
+
+def test_summaries_are_cached_per_session_and_namespace(compactor, client):
+    messages = history(10)
+    asyncio.run(compactor.compact(messages, token_budget=500, session_key="a"))
+    asyncio.run(compactor.compact(messages, token_budget=500, session_key="a", namespace="evaluation"))
+    asyncio.run(compactor.compact(messages, token_budget=500, session_key="b"))
+    asyncio.run(compactor.compact(messages, token_budget=500, session_key="a"))
+    assert len(client.requests) == 3
+    assert compactor.stats()["cached_summaries"] == 3
+
+
+def test_count_tokens_estimate_without_tiktoken():
+    # ASCIIは4文字で1トークン、それ以外は1文字1トークン
+    assert count_tokens("abcdefgh") == 2
+    assert count_tokens("面接") == 2
+    assert count_tokens("") == 0
@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+
+from app.core import logger as app_logger
+from app.core.logger import log_payload
+
+
+@pytest.fixture
+def payload_logger(caplog):
+    caplog.set_level(logging.INFO, logger="test.payload")
+    return logging.getLogger("test.payload")
+
+
+def test_summary_mode_does_not_serialize_payload(payload_logger, caplog, monkeypatch):
+    monkeypatch.setattr(app_logger, "LOG_PAYLOAD_MODE", "summary")
+    monkeypatch.setattr(app_logger, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("summaryモードでシリアライズしている")
+
+    monkeypatch.setattr(app_logger.json, "dumps", fail)
+    monkeypatch.setattr(app_logger.hashlib, "sha256", fail)
+
+    log_payload(payload_logger, "messages", [{"role": "user", "content": "秘密の回答"}] * 3)
+    log_payload(payload_logger, "content", "秘密の回答")
+
+    first, second = caplog.records
+    assert first.getMessage() == "messages: (payload_type=list, payload_items=3)"
+    assert second.getMessage() == "content: (payload_type=str, payload_chars=5)"
+    assert "秘密" not in caplog.text
+    assert not hasattr(first, "payload_sha256")
+
+
+def test_sampled_payload_is_logged_in_full(payload_logger, caplog, monkeypatch):
+    monkeypatch.setattr(app_logger, "LOG_PAYLOAD_MODE", "summary")
+    monkeypatch.setattr(app_logger, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+
+    log_payload(payload_logger, "evaluation", {"score": 80})
+
+    record = caplog.records[0]
+    assert record.getMessage() == 'evaluation: {"score": 80}'
+    assert record.payload_items == 1
+    assert record.payload_bytes == len('{"score": 80}')
+    assert len(record.payload_sha256) == 16
+
+
+def test_disabled_level_skips_everything(payload_logger, caplog, monkeypatch):
+    monkeypatch.setattr(app_logger, "LOG_PAYLOAD_MODE", "full")
+
+    log_payload(payload_logger, "debug", object(), level=logging.DEBUG)
+
+    assert caplog.records == []
@@ -0,0 +1,154 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import logs
+from app.core.config import settings
+
+
+class FakeWriter:
+    """enqueue_manyで受け取った行を記録する（acceptがFalseの場合はキュー満杯として扱う）"""
+
+    def __init__(self, accept: bool = True):
+        self.accept = accept
+        self.lines = []
+
+    def enqueue_many(self, lines):
+        if not self.accept:
+            return False
+        self.lines.extend(lines)
+        return True
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = FakeWriter()
+    monkeypatch.setattr(logs, "access_log_writer", writer)
+    return writer
+
+
+@pytest.fixture
+def client(writer):
+    app = FastAPI()
+    app.include_router(logs.router)
+    return TestClient(app)
+
+
+def entry(i: int) -> dict:
+    return {"userId": f"user-{i}", "timestamp": "2024-01-01T00:00:00Z", "message": f"event {i}", "data": {"n": i}}
+
+
+def ndjson(entries) -> bytes:
+    return "\n".join(json.dumps(item, ensure_ascii=False) for item in entries).encode("utf-8")
+
+
+def test_accepts_json_array(client, writer):
+    response = client.post("/api/logs/batch", json=[entry(1), entry(2)])
+    assert response.status_code == 201
+    assert response.json() == {"status": "ok", "accepted": 2}
+    assert [json.loads(line)["userId"] for line in writer.lines] == ["user-1", "user-2"]
+
+
+@pytest.mark.parametrize("content_type", ["application/x-ndjson", "application/ndjson; charset=utf-8", "application/jsonl"])
+def test_accepts_ndjson_and_skips_blank_lines(client, writer, content_type):
+    body = ndjson([entry(1)]) + b"\n\n  \n" + ndjson([entry(2), {**entry(3), "message": "日本語"}]) + b"\n"
+    response = client.post("/api/logs/batch", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 201
+    assert response.json()["accepted"] == 3
+    assert json.loads(writer.lines[2])["message"] == "日本語"
+
+
+def test_accepts_gzip_ndjson(client, writer):
+    body = gzip.compress(ndjson([entry(i) for i in range(5)]))
+    response = client.post(
+        "/api/logs/batch", content=body,
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 201
+    assert response.json()["accepted"] == 5
+
+
+def test_rejects_gzip_body_over_decompressed_limit(client, writer, monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_BATCH_MAX_BYTES", 1024)
+    # 圧縮後は小さいが、展開すると上限を大きく超えるボディ
+    body = gzip.compress(ndjson([{**entry(i), "message": "x" * 1000} for i in range(100)]))
+    assert len(body) < 1024
+    response = client.post(
+        "/api/logs/batch", content=body,
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 400
+    assert "1024" in response.json()["error"]
+    assert writer.lines == []
+
+
+def test_rejects_plain_body_over_limit(client, writer, monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_BATCH_MAX_BYTES", 100)
+    response = client.post("/api/logs/batch", json=[entry(1), entry(2)])
+    assert response.status_code == 400
+
+
+def test_rejects_corrupt_gzip_and_unknown_encoding(client):
+    corrupt = client.post("/api/logs/batch", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert corrupt.status_code == 400
+    unknown = client.post("/api/logs/batch", content=b"[]", headers={"Content-Encoding": "br"})
+    assert unknown.status_code == 400
+
+
+def test_rejects_invalid_ndjson_line(client, writer):
+    body = ndjson([entry(1)]) + b"\n{broken"
+    response = client.post("/api/logs/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 400
+    assert writer.lines == []
+
+
+def test_rejects_entries_missing_fields(client, writer):
+    body = ndjson([entry(1), {"userId": "user-2"}])
+    response = client.post("/api/logs/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 422
+    assert response.json()["details"][0]["loc"][0] == 1
+    assert writer.lines == []
+
+
+def test_rejects_too_many_entries(client, writer, monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_BATCH_MAX_ENTRIES", 2)
+    response = client.post("/api/logs/batch", json=[entry(i) for i in range(3)])
+    assert response.status_code == 413
+    assert writer.lines == []
+
+
+def test_returns_503_when_queue_is_full(client, writer):
+    writer.accept = False
+    response = client.post("/api/logs/batch", json=[entry(1)])
+    assert response.status_code == 503
+
+
+def test_rejects_too_many_ndjson_lines_before_validation(client, writer, monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_BATCH_MAX_ENTRIES", 2)
+    validated = []
+    monkeypatch.setattr(logs.log_entries_adapter, "validate_python", lambda value: validated.append(value))
+    # 件数の確認はJSONの解析・検証より前に行うため、不正な行があっても413を返す
+    body = ndjson([entry(1), entry(2)]) + b"\n{broken"
+    response = client.post("/api/logs/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413
+    assert validated == []
+
+
+def test_rejects_truncated_gzip(client, writer):
+    body = gzip.compress(ndjson([entry(i) for i in range(5)]))
+    response = client.post(
+        "/api/logs/batch", content=body[:-8],
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 400
+    assert "途切れ" in response.json()["error"]
+    assert writer.lines == []
+
+
+def test_rejects_invalid_json_array(client, writer):
+    response = client.post("/api/logs/batch", content=b'[{"userId": ', headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert writer.lines == []
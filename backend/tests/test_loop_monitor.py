@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.loop_monitor import LoopMonitor, loop_monitor, percentile
+
+
+@pytest.mark.parametrize("q, expected", [(0, 1.0), (50, 2.5), (95, 3.85), (100, 4.0)])
+def test_percentile_interpolates(q, expected):
+    assert percentile([4.0, 1.0, 3.0, 2.0], q) == pytest.approx(expected)
+
+
+def test_percentile_of_empty_values():
+    assert percentile([], 99) == 0.0
+
+
+def blocking_sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_detects_blocking_call_with_stack():
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.05, max_events=5, window=100)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            blocking_sleep(0.3)
+            await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    stats = monitor.stats()
+    events = monitor.events()
+    assert not stats["running"]
+    assert stats["samples"] > 1
+    assert stats["blocked_count"] == 1
+    assert stats["lag_max_ms"] >= 200
+    assert len(events) == 1
+    # 閾値を超えた時点でイベントループのスレッドが実行していた処理を記録する
+    assert any("blocking_sleep" in line for line in events[0]["stack"])
+
+    monitor.reset()
+    assert monitor.stats()["samples"] == 0
+    assert monitor.events() == []
+
+
+def test_admin_endpoints_do_not_exist_without_token(build_app):
+    client = TestClient(build_app(ADMIN_API_TOKEN=""))
+
+    for path in ("/api/admin/loop-monitor", "/api/admin/sessions", "/api/admin/access-log"):
+        assert client.get(path, headers={"X-Admin-Token": ""}).status_code == 404
+
+
+def test_admin_endpoints_require_token(build_app):
+    client = TestClient(build_app(ADMIN_API_TOKEN="secret"))
+
+    assert client.get("/api/admin/loop-monitor").status_code == 401
+    assert client.get("/api/admin/loop-monitor", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+    loop_monitor._record_block(0.2, ["frame"])
+    response = client.get("/api/admin/loop-monitor", params={"reset": "true"}, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.json()["blocked_count"] >= 1
+    assert response.json()["blocking_events"][0]["stack"] == ["frame"]
+    # reset=trueの場合は返した後に記録を消去する
+    assert loop_monitor.events() == []
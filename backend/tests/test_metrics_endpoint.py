@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+
+def test_metrics_is_not_exposed_without_token(build_app):
+    client = TestClient(build_app(METRICS_ENABLED=True, METRICS_TOKEN=""))
+
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+
+def test_metrics_is_not_exposed_when_disabled(build_app):
+    client = TestClient(build_app(METRICS_ENABLED=False, METRICS_TOKEN="secret"))
+
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 404
+
+
+def test_metrics_requires_bearer_token(build_app):
+    client = TestClient(build_app(METRICS_ENABLED=True, METRICS_TOKEN="secret"))
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "secret"}).status_code == 401
+
+
+def test_metrics_exports_routes_and_component_stats(build_app):
+    client = TestClient(build_app(METRICS_ENABLED=True, METRICS_TOKEN="secret"))
+    client.get("/api/health")
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert any(line.startswith('ai_interview_http_request_duration_seconds_count{method="GET",route="/api/health"') for line in lines)
+    # register_statsで登録した各コンポーネントの統計も出力する
+    for prefix in ("ai_interview_openai_scheduler_", "ai_interview_access_log_", "ai_interview_tracing_"):
+        assert any(line.startswith(prefix) for line in lines)
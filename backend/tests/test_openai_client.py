@@ -0,0 +1,108 @@
+import asyncio
+import sys
+
+import httpx
+import pytest
+
+from app.services import openai_service
+from app.services.openai_service import OpenAIService, create_openai_client
+from app.services.rate_limiter import openai_scheduler
+
+
+@pytest.fixture
+def client_settings(monkeypatch):
+    def apply(**values):
+        for name, value in values.items():
+            monkeypatch.setattr(openai_service.settings, name, value)
+
+    apply(OPENAI_API_KEY="test")
+    return apply
+
+
+def test_client_uses_configured_pool_and_timeouts(client_settings):
+    client_settings(
+        OPENAI_MAX_CONNECTIONS=7,
+        OPENAI_MAX_KEEPALIVE_CONNECTIONS=3,
+        OPENAI_KEEPALIVE_EXPIRY=12.0,
+        OPENAI_CONNECT_TIMEOUT=2.0,
+        OPENAI_POOL_TIMEOUT=4.0,
+        OPENAI_CHAT_TIMEOUT=30.0,
+        OPENAI_HTTP2=False,
+        OPENAI_SCHEDULER_ENABLED=True,
+    )
+
+    client = create_openai_client()
+    try:
+        pool = client._client._transport._pool
+        assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (7, 3, 12.0)
+        assert client.timeout == httpx.Timeout(30.0, connect=2.0, pool=4.0)
+        # 再試行はスケジューラで行い、レート制限ヘッダーはレスポンスフックで取り込む
+        assert client.max_retries == 0
+        assert client._client.event_hooks["response"] == [openai_scheduler.on_response]
+    finally:
+        asyncio.run(client.close())
+
+
+def test_client_retries_itself_without_scheduler(client_settings):
+    client_settings(OPENAI_SCHEDULER_ENABLED=False, OPENAI_MAX_RETRIES=5, OPENAI_HTTP2=False)
+
+    client = create_openai_client()
+    try:
+        assert client.max_retries == 5
+        assert client._client.event_hooks["response"] == []
+    finally:
+        asyncio.run(client.close())
+
+
+def test_http2_falls_back_without_h2(client_settings, monkeypatch):
+    monkeypatch.setitem(sys.modules, "h2", None)
+    client_settings(OPENAI_HTTP2=True)
+
+    client = create_openai_client()
+    try:
+        assert client._client._transport._pool._http2 is False
+    finally:
+        asyncio.run(client.close())
+
+
+def test_warmup_opens_connections_and_records_failures(client_settings):
+    from openai import AsyncOpenAI
+
+    client_settings(OPENAI_WARMUP_CONNECTIONS=3)
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(500, json={"error": {"message": "unavailable"}})
+        return httpx.Response(200, json={"id": "gpt", "object": "model", "created": 0, "owned_by": "openai"})
+
+    async def scenario():
+        client = AsyncOpenAI(
+            api_key="test", base_url="https://api.openai.test/v1", max_retries=3,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        service = OpenAIService(client=client)
+        await service.warmup()
+        readiness = service.readiness()
+        await service.close()
+        return readiness, service.readiness()
+
+    readiness, closed = asyncio.run(scenario())
+    # 事前接続では再試行しない
+    assert len(requests) == 3
+    assert all(request.url.path.startswith("/v1/models/") for request in requests)
+    assert readiness["ready"] is True
+    assert readiness["warmed_connections"] == 2
+    assert "unavailable" in readiness["warmup_error"]
+    assert closed["ready"] is False
+
+
+def test_warmup_is_skipped_without_api_key(client_settings):
+    client_settings(OPENAI_API_KEY="", OPENAI_WARMUP_CONNECTIONS=3)
+    service = OpenAIService()
+
+    asyncio.run(service.warmup())
+
+    # クライアントも作成しない
+    assert service.readiness() == {"ready": False, "warmed_connections": 0, "warmup_error": None}
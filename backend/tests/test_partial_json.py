@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app.core.partial_json import PartialJSONFieldExtractor
+
+
+def feed_all(chunks, fields=("reaction", "question")):
+    """チャンクを順に与え、フィールドごとに受け取った差分を連結して返す"""
+    extractor = PartialJSONFieldExtractor(fields)
+    deltas = {}
+    done = []
+    for chunk in chunks:
+        for field, delta, completed in extractor.feed(chunk):
+            deltas[field] = deltas.get(field, "") + delta
+            if completed:
+                done.append(field)
+    return extractor, deltas, done
+
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_extracts_fields_incrementally():
+    extractor, deltas, done = feed_all(['{"reaction": "Gre', 'at!", "ques', 'tion": "Why?"}'])
+    assert deltas == {"reaction": "Great!", "question": "Why?"}
+    assert done == ["reaction", "question"]
+    assert extractor.values == {"reaction": "Great!", "question": "Why?"}
+    assert extractor.completed == ["reaction", "question"]
+
+
+def test_reports_partial_value_before_closing_quote():
+    extractor = PartialJSONFieldExtractor(["question"])
+    assert extractor.feed('{"question": "Tell me') == [("question", "Tell me", False)]
+    assert extractor.feed(' more"}') == [("question", " more", True)]
+
+
+@pytest.mark.parametrize("value", [
+    'line1\nline2\t"quoted" back\\slash /',
+    "日本語の質問ですか？",
+    "emoji 😀 and 𝄞",
+    "éあ",
+])
+@pytest.mark.parametrize("size", [1, 2, 3, 5])
+def test_escape_sequences_split_across_chunks(value, size):
+    # ensure_ascii=Trueで \uXXXX（サロゲートペアを含む）と \n \" \\ などのエスケープを含むJSONにする
+    text = json.dumps({"reaction": "ok", "question": value}, ensure_ascii=True)
+    _, deltas, done = feed_all(split_every(text, size))
+    assert deltas["question"] == value
+    assert "question" in done
+
+
+def test_unicode_escape_split_inside_hex_digits():
+    _, deltas, _ = feed_all(['{"question": "caf\\u00', 'e9"}'])
+    assert deltas["question"] == "café"
+
+
+def test_surrogate_pair_split_between_chunks():
+    _, deltas, _ = feed_all(['{"question": "\\ud83d', '\\ude00!"}'])
+    assert deltas["question"] == "😀!"
+
+
+def test_unpaired_surrogate_is_replaced():
+    _, deltas, _ = feed_all(['{"question": "a\\ud83db"}'])
+    assert deltas["question"] == "a�b"
+
+
+def test_skips_nested_and_scalar_values():
+    text = '{"meta": {"question": "nested", "list": ["}", "\\""]}, "score": 3, "question": "top"}'
+    _, deltas, done = feed_all(split_every(text, 4))
+    assert deltas == {"question": "top"}
+    assert done == ["question"]
+
+
+def test_ignores_fields_not_requested():
+    _, deltas, _ = feed_all(['{"other": "x", "reaction": "y"}'], fields=("reaction",))
+    assert deltas == {"reaction": "y"}
@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from app.core.prompt_registry import CompiledPrompt, PromptRegistry
+
+
+def write_prompts(path, body: str, mtime: float) -> None:
+    path.write_text(body, encoding="utf-8")
+    # 同じ秒内の書き換えでもmtimeの変化として検出されるように明示する
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def prompts_file(tmp_path):
+    path = tmp_path / "prompts.yaml"
+    write_prompts(path, "evaluation:\n  system: Evaluate in {language}.\nfeedback:\n  system: Be kind.\n", 1000)
+    return path
+
+
+@pytest.mark.parametrize("text, kind, fields", [
+    ("Hello {{ name }}", CompiledPrompt.JINJA, ()),
+    ("{% if a %}x{% endif %}", CompiledPrompt.JINJA, ()),
+    ("Evaluate in {language} for {level}.", CompiledPrompt.FORMAT, ("language", "level")),
+    ('Return JSON like {"score": 1}.', CompiledPrompt.TEXT, ()),
+    ("No placeholders.", CompiledPrompt.TEXT, ()),
+])
+def test_compiled_prompt_kind(text, kind, fields):
+    prompt = CompiledPrompt(text)
+    assert prompt.kind == kind
+    assert prompt.fields == fields
+
+
+def test_compiled_prompt_render():
+    assert CompiledPrompt("Hi {{ name }}").render(name="Ann") == "Hi Ann"
+    assert CompiledPrompt("Hi {name}").render(name="Ann") == "Hi Ann"
+    assert CompiledPrompt('{"a": 1}').render(name="Ann") == '{"a": 1}'
+
+
+def test_sections_are_compiled_once_and_served_from_memory(prompts_file):
+    registry = PromptRegistry(prompts_file, check_interval=3600)
+    registry.load()
+
+    assert registry.get("evaluation", "system").render(language="ja") == "Evaluate in ja."
+    assert registry.get("evaluation", "missing") is None
+    assert registry.get_section("missing") == {}
+    # 確認間隔内はファイルを見に行かない
+    write_prompts(prompts_file, "evaluation:\n  system: Changed.\n", 2000)
+    assert str(registry.get("evaluation", "system")) == "Evaluate in {language}."
+    assert registry.stats() == {"hits": 4, "reloads": 1, "reload_errors": 0, "sections": 2}
+
+
+def test_reloads_only_when_mtime_changes(prompts_file):
+    registry = PromptRegistry(prompts_file, check_interval=0)
+    registry.load()
+    version = registry.version("evaluation")
+    feedback_version = registry.version("feedback")
+
+    registry.get_section("evaluation")
+    assert registry.reloads == 1
+
+    write_prompts(prompts_file, "evaluation:\n  system: Changed.\nfeedback:\n  system: Be kind.\n", 2000)
+    assert str(registry.get("evaluation", "system")) == "Changed."
+    assert registry.reloads == 2
+    # 内容が変わったセクションのみバージョンが変わる
+    assert registry.version("evaluation") != version
+    assert registry.version("feedback") == feedback_version
+
+
+def test_version_is_stable_for_same_content(prompts_file, tmp_path):
+    other = tmp_path / "other.yaml"
+    write_prompts(other, prompts_file.read_text(encoding="utf-8"), 5000)
+
+    first = PromptRegistry(prompts_file, check_interval=0)
+    second = PromptRegistry(other, check_interval=0)
+
+    assert first.version("evaluation") == second.version("evaluation")
+    assert len(first.version("evaluation")) == 12
+    assert first.version("missing") == ""
+
+
+def test_failed_reload_keeps_previous_prompts(prompts_file):
+    registry = PromptRegistry(prompts_file, check_interval=0)
+    registry.load()
+
+    write_prompts(prompts_file, "evaluation: [unclosed\n", 2000)
+    assert str(registry.get("evaluation", "system")) == "Evaluate in {language}."
+    assert registry.reload_errors == 1
+
+
+def test_initial_load_failure_raises(tmp_path):
+    with pytest.raises(ValueError):
+        PromptRegistry(tmp_path / "missing.yaml").load()
+
+    path = tmp_path / "prompts.txt"
+    path.write_text("evaluation: {}", encoding="utf-8")
+    with pytest.raises(ValueError):
+        PromptRegistry(path).load()
+
+
+def test_json_prompts(tmp_path):
+    path = tmp_path / "prompts.json"
+    path.write_text('{"evaluation": {"system": "Hi {{ name }}", "weight": 3}, "meta": "ignored"}', encoding="utf-8")
+
+    registry = PromptRegistry(path, check_interval=0)
+
+    assert registry.get("evaluation", "system").render(name="Ann") == "Hi Ann"
+    # 文字列以外の値・セクション以外の項目はプロンプトとして扱わない
+    assert registry.get("evaluation", "weight") is None
+    assert registry.stats()["sections"] == 1
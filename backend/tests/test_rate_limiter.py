@@ -0,0 +1,212 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    UpstreamScheduler,
+    _Budget,
+    parse_reset_duration,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1s", 1.0),
+    ("6m0s", 360.0),
+    ("20ms", 0.02),
+    ("1h2m3s", 3723.0),
+    ("1.5s", 1.5),
+    ("6m30.5s", 390.5),
+    ("2m500ms", 120.5),
+    ("0.25", 0.25),
+    ("3", 3.0),
+])
+def test_parse_reset_duration(value, expected):
+    assert parse_reset_duration(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", [None, "", "soon"])
+def test_parse_reset_duration_invalid(value):
+    assert parse_reset_duration(value) is None
+
+
+def test_budget_refills_over_time():
+    budget = _Budget(60)
+    budget.updated = 0.0
+    budget.consume(60)
+    assert budget.available == 0
+    assert budget.wait_time(1) == pytest.approx(1.0)
+    budget.refill(30.0)
+    assert budget.available == pytest.approx(30)
+    budget.refill(1000.0)
+    assert budget.available == 60
+
+
+def test_budget_caps_oversized_requests_at_limit():
+    budget = _Budget(100)
+    budget.updated = 0.0
+    budget.consume(40)
+    # 上限を超える量は上限まで貯まれば実行できる
+    assert budget.wait_time(500) == pytest.approx(40 * 60 / 100)
+    budget.consume(500)
+    assert budget.available == pytest.approx(-40)
+
+
+def test_unlimited_budget_never_waits():
+    budget = _Budget(0)
+    budget.consume(1000)
+    assert budget.wait_time(10 ** 9) == 0.0
+
+
+def test_budget_sync_adopts_header_limit_and_remaining():
+    budget = _Budget(0)
+    budget.sync(limit=500, remaining=None, now=budget.updated)
+    assert budget.limit == 500 and budget.available == 500
+    budget.sync(limit=500, remaining=20, now=budget.updated)
+    assert budget.available == 20
+    # 残量が手元の予算より多い場合は増やさない
+    budget.sync(limit=500, remaining=400, now=budget.updated)
+    assert budget.available == 20
+
+
+def test_budget_share_splits_configured_and_header_limits():
+    budget = _Budget(400, share=4)
+    assert budget.limit == 100
+    budget.sync(limit=1000, remaining=200, now=budget.updated)
+    assert budget.limit == 250
+    assert budget.available == 50
+
+
+def test_observe_response_pauses_until_reset_when_requests_exhausted():
+    scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0, workers=1)
+    scheduler.observe_response(httpx.Headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "6m0s",
+        "x-ratelimit-limit-tokens": "200000",
+        "x-ratelimit-remaining-tokens": "150000",
+    }))
+    stats = scheduler.stats()
+    assert stats["requests_limit"] == 500
+    assert stats["requests_available"] == 0
+    assert stats["tokens_limit"] == 200000
+    assert stats["tokens_available"] == 150000
+    assert 359 < stats["paused_seconds"] <= 360
+
+
+def test_observe_response_ignores_responses_without_rate_limit_headers():
+    scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0, workers=1)
+    scheduler.observe_response(httpx.Headers({"x-ratelimit-reset-requests": "1s"}))
+    assert scheduler.stats()["requests_limit"] == 0
+
+
+def test_waiters_are_granted_by_priority_then_arrival():
+    async def scenario():
+        # 1分あたり6000件（10ミリ秒に1件）の予算を使い切った状態から始める
+        scheduler = UpstreamScheduler(requests_per_minute=6000, tokens_per_minute=0, workers=1)
+        scheduler.requests.available = 0
+        order = []
+
+        async def call(name, priority):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(call("background-1", PRIORITY_BACKGROUND)),
+            asyncio.create_task(call("interactive-1", PRIORITY_INTERACTIVE)),
+            asyncio.create_task(call("background-2", PRIORITY_BACKGROUND)),
+            asyncio.create_task(call("interactive-2", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["interactive-1", "interactive-2", "background-1", "background-2"]
+    assert stats["granted"] == 4
+    assert stats["max_queue_depth"] == 4
+
+
+def test_run_retries_connection_errors_then_succeeds():
+    import openai
+
+    async def scenario():
+        scheduler = UpstreamScheduler(
+            requests_per_minute=0, tokens_per_minute=0, max_retries=3, base_delay=0.001, max_delay=0.01, workers=1
+        )
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+            return "ok"
+
+        return await scheduler.run(call), len(attempts), scheduler.stats()
+
+    result, attempts, stats = asyncio.run(scenario())
+    assert result == "ok"
+    assert attempts == 3
+    assert stats["retries"] == 2
+
+
+def test_run_does_not_retry_client_errors():
+    async def scenario():
+        scheduler = UpstreamScheduler(requests_per_minute=0, tokens_per_minute=0, max_retries=3, workers=1)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await scheduler.run(call)
+        return len(attempts)
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_stream_text_to_speech_retries_429_and_learns_limits():
+    from openai import AsyncOpenAI
+
+    from app.services.openai_service import OpenAIService
+
+    audio = b"ID3" + bytes(range(256)) * 8
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(429, headers={
+                "retry-after-ms": "5",
+                "x-ratelimit-limit-requests": "120",
+                "x-ratelimit-remaining-requests": "0",
+            }, json={"error": {"message": "rate limited", "type": "requests", "code": "rate_limit_exceeded"}})
+        return httpx.Response(200, headers={
+            "content-type": "audio/mpeg",
+            "x-ratelimit-limit-requests": "120",
+            "x-ratelimit-remaining-requests": "119",
+        }, content=audio)
+
+    async def scenario():
+        client = AsyncOpenAI(
+            api_key="test", base_url="https://api.openai.test/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        service = OpenAIService(client=client)
+        service.tts_cache = None
+        service.scheduler = UpstreamScheduler(
+            requests_per_minute=0, tokens_per_minute=0, max_retries=2, base_delay=0.001, max_delay=0.01, workers=1
+        )
+        chunks = [chunk async for chunk in service.stream_text_to_speech("Hello")]
+        await client.close()
+        return b"".join(chunks), service.scheduler.stats()
+
+    body, stats = asyncio.run(scenario())
+    assert body == audio
+    assert len(requests) == 2
+    assert stats["rate_limited"] == 1
+    assert stats["retries"] == 1
+    # レスポンスフックのないクライアントでも、ヘッダーの上限を予算に取り込む
+    assert stats["requests_limit"] == 120
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from app.services.result_cache import ResultCache
+
+
+class Factory:
+    """呼び出し回数を数え、releaseされるまで完了しない計算"""
+
+    def __init__(self, value=None, error: Exception = None):
+        self.value = {"score": 1} if value is None else value
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_make_key_normalizes_text():
+    a = ResultCache.make_key("evaluation", language="en", history=[{"content": "Hello   world "}])
+    b = ResultCache.make_key("evaluation", language="en", history=[{"content": "Hello world"}])
+    c = ResultCache.make_key("evaluation", language="ja", history=[{"content": "Hello world"}])
+    assert a == b
+    assert a != c
+    # NFKC正規化で全角英数字と半角英数字を同一視する
+    assert ResultCache.make_key("k", text="ＡＢＣ１") == ResultCache.make_key("k", text="ABC1")
+
+
+def test_concurrent_callers_share_one_computation():
+    async def scenario():
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        factory = Factory()
+        waiters = [asyncio.create_task(cache.get_or_compute("k", factory)) for _ in range(5)]
+        await asyncio.sleep(0)
+        factory.release.set()
+        results = await asyncio.gather(*waiters)
+        return cache, factory, results
+
+    cache, factory, results = run(scenario())
+    assert factory.calls == 1
+    assert results == [{"score": 1}] * 5
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["shared"] == 4 and stats["inflight"] == 0
+    # 呼び出し側ごとにコピーを返す
+    assert len({id(result) for result in results}) == 5
+
+
+def test_cancelled_waiter_does_not_cancel_shared_computation():
+    async def scenario():
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        factory = Factory()
+        first = asyncio.create_task(cache.get_or_compute("k", factory))
+        second = asyncio.create_task(cache.get_or_compute("k", factory))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        factory.release.set()
+        return cache, factory, await second
+
+    cache, factory, result = run(scenario())
+    assert result == {"score": 1}
+    assert factory.calls == 1
+    assert cache.get("k") == {"score": 1}
+
+
+def test_computation_finishes_and_is_cached_after_all_waiters_time_out():
+    async def scenario():
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        factory = Factory()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(cache.get_or_compute("k", factory), timeout=0.01)
+        assert cache.stats()["inflight"] == 1
+        factory.release.set()
+        # 待機側がいなくなっても計算は完了し、次の呼び出しはキャッシュから返る
+        for _ in range(3):
+            await asyncio.sleep(0)
+        result = await cache.get_or_compute("k", factory)
+        return cache, factory, result
+
+    cache, factory, result = run(scenario())
+    assert result == {"score": 1}
+    assert factory.calls == 1
+    assert cache.hits == 1
+
+
+def test_errors_are_shared_and_not_cached():
+    async def scenario():
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        factory = Factory(error=RuntimeError("upstream failed"))
+        waiters = [asyncio.create_task(cache.get_or_compute("k", factory)) for _ in range(3)]
+        await asyncio.sleep(0)
+        factory.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return cache, factory, results
+
+    cache, factory, results = run(scenario())
+    assert factory.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get("k") is None
+    assert cache.stats()["inflight"] == 0
+
+
+def test_should_cache_controls_storage():
+    async def scenario():
+        cache = ResultCache(ttl_seconds=60, max_entries=10)
+        factory = Factory(value={})
+        factory.release.set()
+        await cache.get_or_compute("k", factory, should_cache=bool)
+        await cache.get_or_compute("k", factory, should_cache=bool)
+        return factory
+
+    assert run(scenario()).calls == 2
+
+
+def test_returned_values_do_not_alias_cache():
+    cache = ResultCache(ttl_seconds=60, max_entries=10)
+    cache.put("k", {"items": [1]})
+    cache.get("k")["items"].append(2)
+    assert cache.get("k") == {"items": [1]}
+
+
+def test_expired_entries_and_lru_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.result_cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(ttl_seconds=10, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.expired == 1
@@ -0,0 +1,124 @@
+import asyncio
+import types
+
+import pytest
+
+from app.services import session_store
+from app.services.session_store import InMemorySessionStore, create_session_store
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # asyncio側の時刻には影響させず、セッションストアの最終アクセス時刻だけを進める
+    monkeypatch.setattr(session_store, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def store(**kwargs) -> InMemorySessionStore:
+    options = {"ttl_seconds": 60, "max_messages": 100, "max_message_chars": 1000, "max_sessions": 100}
+    options.update(kwargs)
+    return InMemorySessionStore(**options)
+
+
+def test_create_append_and_get_returns_copies(clock):
+    async def scenario():
+        sessions = store()
+        session_id = await sessions.create({"mode": "general"})
+        assert await sessions.append(session_id, [{"role": "user", "content": "Hi", "extra": "dropped"}])
+        session = await sessions.get(session_id)
+        # 返した値を書き換えても保存済みの履歴は変わらない
+        session["history"].append({"role": "user", "content": "tampered"})
+        session["metadata"]["mode"] = "tampered"
+        return await sessions.get(session_id)
+
+    session = asyncio.run(scenario())
+    assert session == {"metadata": {"mode": "general"}, "history": [{"role": "user", "content": "Hi"}]}
+
+
+def test_unknown_session(clock):
+    async def scenario():
+        sessions = store()
+        return (
+            await sessions.get("missing"),
+            await sessions.append("missing", [{"role": "user", "content": "Hi"}]),
+            await sessions.update_metadata("missing", {"mode": "general"}),
+        )
+
+    assert asyncio.run(scenario()) == (None, False, False)
+
+
+def test_sessions_expire_after_ttl_since_last_access(clock):
+    async def scenario():
+        sessions = store(ttl_seconds=60)
+        active = await sessions.create({})
+        idle = await sessions.create({})
+        clock.now += 45
+        assert await sessions.get(active) is not None
+        clock.now += 30
+        return sessions, await sessions.get(active), await sessions.get(idle)
+
+    sessions, active, idle = asyncio.run(scenario())
+    assert active is not None
+    assert idle is None
+    assert sessions.stats()["expired_sessions"] == 1
+    assert sessions.stats()["sessions"] == 1
+
+
+def test_least_recently_used_session_is_evicted_at_capacity(clock):
+    async def scenario():
+        sessions = store(max_sessions=2)
+        first = await sessions.create({})
+        second = await sessions.create({})
+        await sessions.append(first, [{"role": "user", "content": "Hi"}])
+        third = await sessions.create({})
+        return sessions, [await sessions.get(session_id) is not None for session_id in (first, second, third)]
+
+    sessions, exists = asyncio.run(scenario())
+    assert exists == [True, False, True]
+    assert sessions.stats()["evicted_sessions"] == 1
+
+
+def test_history_is_capped_per_session(clock):
+    async def scenario():
+        sessions = store(max_messages=3, max_message_chars=5)
+        session_id = await sessions.create({})
+        await sessions.append(session_id, [{"role": "user", "content": f"answer {i}"} for i in range(4)])
+        await sessions.append(session_id, [{"role": "assistant", "content": "question"}])
+        return (await sessions.get(session_id))["history"]
+
+    history = asyncio.run(scenario())
+    # 古いメッセージから削除し、長すぎる内容は切り詰める
+    assert history == [
+        {"role": "user", "content": "answe"},
+        {"role": "user", "content": "answe"},
+        {"role": "assistant", "content": "quest"},
+    ]
+
+
+def test_update_metadata_and_delete(clock):
+    async def scenario():
+        sessions = store()
+        session_id = await sessions.create({"mode": "general"})
+        assert await sessions.update_metadata(session_id, {"summary": "short"})
+        metadata = (await sessions.get(session_id))["metadata"]
+        await sessions.delete(session_id)
+        await sessions.delete(session_id)
+        return metadata, await sessions.get(session_id)
+
+    metadata, deleted = asyncio.run(scenario())
+    assert metadata == {"mode": "general", "summary": "short"}
+    assert deleted is None
+
+
+def test_create_session_store_defaults_to_memory(monkeypatch):
+    monkeypatch.setattr(session_store.settings, "SESSION_STORE_BACKEND", "unknown")
+    assert isinstance(create_session_store(), InMemorySessionStore)
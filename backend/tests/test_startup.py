@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import dependencies
+from app.services import google_cloud_service
+
+
+@pytest.fixture
+def fresh_services():
+    """サービスはプロセスごとに1つだけ作成されるため、テストの前後で作り直す"""
+    def clear():
+        for provider in (dependencies.get_openai_service, dependencies.get_google_cloud_service, dependencies.get_session_store):
+            provider.cache_clear()
+
+    clear()
+    yield
+    clear()
+
+
+def test_importing_app_does_not_load_sdks():
+    code = (
+        "import sys, app.main\n"
+        "print('loaded:' + ','.join(m for m in ('openai', 'google.cloud.speech', 'google.cloud.speech_v1', 'av') if m in sys.modules))"
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=backend_dir, env=os.environ.copy(), capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    # SDKの読み込みはlifespanの準備処理（スレッド上）か最初の利用時まで遅らせる
+    assert result.stdout.strip().splitlines()[-1] == "loaded:"
+
+
+def test_services_are_created_once_on_first_use(fresh_services):
+    assert dependencies.get_openai_service() is dependencies.get_openai_service()
+    assert dependencies.get_session_store() is dependencies.get_session_store()
+    # 作成しただけではクライアントを作らない
+    assert dependencies.get_openai_service().readiness()["ready"] is False
+
+
+def test_ready_is_503_until_startup_completes(build_app, fresh_services):
+    client = TestClient(build_app())
+
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+    assert client.get("/api/health").status_code == 200
+
+
+def test_ready_after_startup(build_app, fresh_services, monkeypatch):
+    monkeypatch.setattr(google_cloud_service, "create_speech_client", lambda: object())
+    app = build_app(
+        STARTUP_WARMUP_IN_BACKGROUND=False, OPENAI_WARMUP_CONNECTIONS=0, LOOP_MONITOR_ENABLED=False, STT_PREPROCESS_ENABLED=False
+    )
+
+    with TestClient(app) as client:
+        response = client.get("/api/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["openai"]["ready"] is True
+    assert body["checks"]["google_speech"] == {"ready": True, "error": None}
+
+
+def test_not_ready_when_speech_client_cannot_be_created(build_app, fresh_services, monkeypatch):
+    def fail():
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setattr(google_cloud_service, "create_speech_client", fail)
+    app = build_app(
+        STARTUP_WARMUP_IN_BACKGROUND=False, OPENAI_WARMUP_CONNECTIONS=0, LOOP_MONITOR_ENABLED=False, STT_PREPROCESS_ENABLED=False
+    )
+
+    with TestClient(app) as client:
+        response = client.get("/api/ready")
+        # 準備に失敗しても起動は続ける
+        assert client.get("/api/health").status_code == 200
+
+    assert response.status_code == 503
+    assert response.json()["checks"]["google_speech"] == {"ready": False, "error": "no credentials"}
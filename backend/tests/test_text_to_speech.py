@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_openai_service
+from app.api.routes import interview
+from app.core.config import settings
+from app.services.tts_cache import TTSCache
+
+
+class FakeSpeechService:
+    async def text_to_speech(self, text, voice=None):
+        return b"audio"
+
+    async def stream_text_to_speech(self, text, voice=None):
+        yield b"au"
+        yield b"dio"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(interview.router)
+    app.dependency_overrides[get_openai_service] = FakeSpeechService
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("stream", ["true", "false"])
+@pytest.mark.parametrize("response_format, media_type", [("mp3", "audio/mpeg"), ("opus", "audio/ogg"), ("wav", "audio/wav")])
+def test_media_type_follows_response_format(client, monkeypatch, stream, response_format, media_type):
+    monkeypatch.setattr(settings, "OPENAI_TTS_RESPONSE_FORMAT", response_format)
+
+    response = client.post("/api/interview/text-to-speech", params={"stream": stream}, json={"text": "Hello"})
+
+    assert response.status_code == 200
+    assert response.content == b"audio"
+    assert response.headers["content-type"] == media_type
+    assert response.headers["content-disposition"] == f"attachment; filename=speech.{response_format}"
+
+
+def stream_with_cache(audio: bytes, max_item_bytes: int):
+    from openai import AsyncOpenAI
+
+    from app.services.openai_service import OpenAIService
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "audio/mpeg"}, content=audio)
+
+    async def scenario():
+        client = AsyncOpenAI(
+            api_key="test", base_url="https://api.openai.test/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        service = OpenAIService(client=client)
+        service.scheduler = None
+        service.tts_cache = TTSCache(memory_max_bytes=1024 * 1024, max_item_bytes=max_item_bytes)
+        service.tts_cache.disk_dir = None
+        chunks = [chunk async for chunk in service.stream_text_to_speech("Hello")]
+        cached = await service.tts_cache.get(TTSCache.make_key(
+            "Hello", settings.OPENAI_TTS_VOICE, settings.OPENAI_TTS_MODEL, settings.OPENAI_TTS_RESPONSE_FORMAT
+        ))
+        await client.close()
+        return b"".join(chunks), cached, service.tts_cache.stats()
+
+    return asyncio.run(scenario())
+
+
+def test_streamed_audio_is_cached_within_item_limit(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_TTS_STREAM_CHUNK_SIZE", 16)
+    audio = bytes(range(256))
+
+    body, cached, stats = stream_with_cache(audio, max_item_bytes=256)
+
+    assert body == cached == audio
+    assert stats["skipped_too_large"] == 0
+
+
+def test_streamed_audio_over_item_limit_is_streamed_but_not_cached(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_TTS_STREAM_CHUNK_SIZE", 16)
+    audio = bytes(range(256)) * 4
+
+    body, cached, stats = stream_with_cache(audio, max_item_bytes=100)
+
+    # 上限を超えた時点でチャンクの保持をやめ、クライアントへの転送は続ける
+    assert body == audio
+    assert cached is None
+    assert stats["skipped_too_large"] == 1
+    assert stats["memory_entries"] == 0
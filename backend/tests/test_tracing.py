@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+from app.core.tracing import RequestIdFilter, Span, SpanExporter, Tracer, TracingMiddleware, current_span_var, request_id_var
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    tracer.enabled = True
+    tracer.sample_rate = 1.0
+    tracer.exporter = CollectingExporter()
+    return tracer
+
+
+def test_child_spans_share_trace_and_link_parents(tracer):
+    with tracer.root_span("GET /api/x", **{"http.method": "GET"}) as root:
+        with tracer.span("service.call", model="gpt") as child:
+            with tracer.span("upstream"):
+                pass
+        assert current_span_var.get() is root
+    assert current_span_var.get() is None
+
+    upstream, service, request = tracer.exporter.spans
+    assert {span.trace_id for span in tracer.exporter.spans} == {root.trace_id}
+    assert request.parent_span_id is None
+    assert service.parent_span_id == root.span_id
+    assert upstream.parent_span_id == child.span_id
+    assert service.attributes == {"model": "gpt"}
+    assert all(span.end_ns >= span.start_ns for span in tracer.exporter.spans)
+
+
+def test_traceparent_continues_incoming_trace(tracer):
+    traceparent = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    tracer.sample_rate = 0.0
+
+    with tracer.root_span("GET /", traceparent=traceparent) as span:
+        pass
+
+    # 上流でサンプリングされたトレースは、自身のサンプリング率にかかわらず記録する
+    assert span.trace_id == "a" * 32
+    assert span.parent_span_id == "b" * 16
+    assert span.to_otlp()["parentSpanId"] == "b" * 16
+
+
+def test_unsampled_or_disabled_tracing_records_nothing(tracer):
+    tracer.sample_rate = 0.0
+    with tracer.root_span("GET /") as root:
+        with tracer.span("child") as child:
+            pass
+    assert (root, child) == (None, None)
+
+    tracer.enabled = False
+    tracer.sample_rate = 1.0
+    with tracer.root_span("GET /") as root:
+        pass
+    assert root is None
+    assert tracer.exporter.spans == []
+
+
+def test_errors_mark_span_and_propagate(tracer):
+    with pytest.raises(ValueError):
+        with tracer.root_span("GET /"):
+            with tracer.span("child"):
+                raise ValueError("boom")
+
+    child, root = tracer.exporter.spans
+    assert child.status == root.status == "ERROR"
+    assert child.to_otlp()["status"] == {"code": 2, "message": "ValueError: boom"}
+
+
+def test_traced_decorator_records_async_function(tracer, monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", tracer)
+
+    @tracing.traced("work")
+    async def work(value):
+        return value * 2
+
+    async def scenario():
+        with tracer.root_span("GET /"):
+            return await work(21)
+
+    assert asyncio.run(scenario()) == 42
+    assert [span.name for span in tracer.exporter.spans] == ["work", "GET /"]
+
+
+def test_span_otlp_attribute_types():
+    span = Span("name", "c" * 32, attributes={"flag": True, "count": 3, "ratio": 0.5, "text": "x"})
+    values = {item["key"]: item["value"] for item in span.to_otlp()["attributes"]}
+    assert values == {
+        "flag": {"boolValue": True},
+        "count": {"intValue": "3"},
+        "ratio": {"doubleValue": 0.5},
+        "text": {"stringValue": "x"},
+    }
+    assert span.to_otlp()["kind"] == 2
+
+
+def test_file_exporter_writes_otlp_json_batches(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter("file", str(path), "", "ai-interview", batch_size=2, flush_interval=0.05)
+    for i in range(3):
+        exporter.export(Span(f"span-{i}", "d" * 32))
+    exporter.stop()
+
+    payloads = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    names = [span["name"] for payload in payloads for span in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    assert names == ["span-0", "span-1", "span-2"]
+    assert payloads[0]["resourceSpans"][0]["resource"]["attributes"][0]["value"] == {"stringValue": "ai-interview"}
+    assert exporter.exported == 3
+    assert exporter.export_errors == 0
+
+
+def test_middleware_propagates_request_id(tracer, monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", tracer)
+    seen = []
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        record = logging.LogRecord("test", logging.INFO, __file__, 0, "message", None, None)
+        RequestIdFilter().filter(record)
+        seen.append((request_id_var.get(), record.request_id, record.trace_id))
+        return {"item_id": item_id}
+
+    app.add_middleware(TracingMiddleware)
+    client = TestClient(app)
+
+    response = client.get("/items/1", headers={"X-Request-ID": "req-123"})
+    generated = client.get("/items/2")
+
+    assert response.headers["x-request-id"] == "req-123"
+    assert len(generated.headers["x-request-id"]) == 32
+    request_id, logged_id, trace_id = seen[0]
+    assert request_id == logged_id == "req-123"
+    root = tracer.exporter.spans[0]
+    assert trace_id == root.trace_id
+    # ルートスパンの名前はパスではなくルートのテンプレートにする
+    assert root.name == "GET /items/{item_id}"
+    assert root.attributes["http.status_code"] == 200
+    assert root.attributes["request.id"] == "req-123"
@@ -0,0 +1,139 @@
+import asyncio
+import os
+
+from app.services.tts_cache import TTSCache
+
+
+def key(name: str) -> str:
+    return TTSCache.make_key(name, "alloy", "tts-1", "mp3")
+
+
+def test_make_key_depends_on_every_field():
+    base = TTSCache.make_key("Hello", "alloy", "tts-1", "mp3")
+    assert base == TTSCache.make_key("Hello", "alloy", "tts-1", "mp3")
+    assert len({
+        base,
+        TTSCache.make_key("Hello.", "alloy", "tts-1", "mp3"),
+        TTSCache.make_key("Hello", "nova", "tts-1", "mp3"),
+        TTSCache.make_key("Hello", "alloy", "tts-1-hd", "mp3"),
+        TTSCache.make_key("Hello", "alloy", "tts-1", "opus"),
+    }) == 5
+
+
+def test_memory_lru_evicts_least_recently_used_by_bytes():
+    async def scenario():
+        cache = TTSCache(memory_max_bytes=25, disk_max_bytes=0)
+        cache.disk_dir = None
+        await cache.put(key("a"), b"a" * 10)
+        await cache.put(key("b"), b"b" * 10)
+        # aを使うとbの方が古くなる
+        assert await cache.get(key("a")) == b"a" * 10
+        await cache.put(key("c"), b"c" * 10)
+        return cache, await cache.get(key("a")), await cache.get(key("b")), await cache.get(key("c"))
+
+    cache, a, b, c = asyncio.run(scenario())
+    assert (a, b, c) == (b"a" * 10, None, b"c" * 10)
+    stats = cache.stats()
+    assert stats["memory_bytes"] == 20
+    assert stats["memory_entries"] == 2
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["bytes_saved"] == 30
+    assert stats["hit_ratio"] == 0.75
+
+
+def test_memory_skips_items_larger_than_limit_and_replaces_same_key():
+    async def scenario():
+        cache = TTSCache(memory_max_bytes=10)
+        cache.disk_dir = None
+        await cache.put(key("big"), b"x" * 11)
+        await cache.put(key("a"), b"a" * 4)
+        await cache.put(key("a"), b"A" * 6)
+        return cache, await cache.get(key("big")), await cache.get(key("a"))
+
+    cache, big, a = asyncio.run(scenario())
+    assert big is None
+    assert a == b"A" * 6
+    assert cache.stats()["memory_bytes"] == 6
+    assert cache.stats()["memory_evictions"] == 0
+
+
+def test_disk_tier_survives_restart_and_promotes_to_memory(tmp_path):
+    async def scenario():
+        first = TTSCache(memory_max_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=100)
+        await first.put(key("a"), b"audio-a")
+
+        second = TTSCache(memory_max_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=100)
+        from_disk = await second.get(key("a"))
+        from_memory = await second.get(key("a"))
+        return second, from_disk, from_memory
+
+    cache, from_disk, from_memory = asyncio.run(scenario())
+    assert from_disk == from_memory == b"audio-a"
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+    # キー先頭2文字のディレクトリに保存する
+    assert (tmp_path / key("a")[:2] / f"{key('a')}.bin").exists()
+
+
+def test_disk_tier_evicts_oldest_files_over_limit(tmp_path):
+    async def scenario():
+        cache = TTSCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=25)
+        for name in ("a", "b", "c"):
+            await cache.put(key(name), name.encode() * 10)
+        return cache, [await cache.get(key(name)) for name in ("a", "b", "c")]
+
+    cache, results = asyncio.run(scenario())
+    assert results == [None, b"b" * 10, b"c" * 10]
+    assert cache.stats()["disk_bytes"] == 20
+    assert cache.stats()["disk_evictions"] == 1
+    assert not (tmp_path / key("a")[:2] / f"{key('a')}.bin").exists()
+
+
+def test_disk_index_is_rebuilt_oldest_first(tmp_path):
+    async def write(name: str, mtime: float):
+        cache = TTSCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+        await cache.put(key(name), name[0].encode() * 10)
+        path = tmp_path / key(name)[:2] / f"{key(name)}.bin"
+        os.utime(path, (mtime, mtime))
+
+    async def scenario():
+        await write("new", 2000)
+        await write("old", 1000)
+        # 上限を下げて再起動すると、更新時刻の古いファイルから削除される
+        cache = TTSCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=15)
+        return cache, await cache.get(key("old")), await cache.get(key("new"))
+
+    cache, old, new = asyncio.run(scenario())
+    assert old is None
+    assert new == b"n" * 10
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_missing_disk_file_is_treated_as_miss(tmp_path):
+    async def scenario():
+        cache = TTSCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+        await cache.put(key("a"), b"audio")
+        (tmp_path / key("a")[:2] / f"{key('a')}.bin").unlink()
+        return cache, await cache.get(key("a"))
+
+    cache, result = asyncio.run(scenario())
+    assert result is None
+    assert cache.stats()["disk_entries"] == 0
+    assert cache.stats()["disk_bytes"] == 0
+
+
+def test_items_over_max_item_bytes_are_not_cached(tmp_path):
+    async def scenario():
+        cache = TTSCache(memory_max_bytes=100, disk_dir=str(tmp_path), disk_max_bytes=100, max_item_bytes=8)
+        await cache.put(key("big"), b"x" * 9)
+        await cache.put(key("a"), b"a" * 8)
+        return cache, await cache.get(key("big")), await cache.get(key("a"))
+
+    cache, big, a = asyncio.run(scenario())
+    assert (big, a) == (None, b"a" * 8)
+    # メモリ層にもディスク層にも保存しない
+    assert not (tmp_path / key("big")[:2] / f"{key('big')}.bin").exists()
+    assert cache.stats()["skipped_too_large"] == 1
+    assert cache.stats()["disk_entries"] == 1
@@ -8,6 +8,7 @@ import Button from '../components/Button';
 import { interviewApi } from '../services/api';
 import { feedbackConfig } from '../config/interview';
 import { logToFile } from '../utils/logger';
+import { getInterviewSession, isSessionNotFound } from '../utils/interviewSession';
 
 const FeedbackPage: React.FC = () => {
   const navigate = useNavigate();
@@ -154,10 +155,23 @@ const FeedbackPage: React.FC = () => {
         content: msg.content
       }));
       
-      // APIリクエスト送信
-      console.log('evaluateInterview APIリクエスト送信');
-      const evaluation = await interviewApi.evaluateInterview(messageHistory, currentLanguage);
-      console.log('evaluateInterview APIレスポンス受信', evaluation);
+      // APIリクエスト送信（面接セッションがある場合は保存済みの履歴を使い、未送信のメッセージのみを送る）
+      const session = getInterviewSession();
+      let evaluation;
+      if (session) {
+        console.log('evaluateSession APIリクエスト送信');
+        try {
+          evaluation = await interviewApi.evaluateSession(session.id, messageHistory.slice(session.syncedCount), currentLanguage);
+        } catch (error) {
+          if (!isSessionNotFound(error)) throw error;
+          // セッションの有効期限切れなどの場合は対話履歴の全体を送信する
+          evaluation = await interviewApi.evaluateInterview(messageHistory, currentLanguage);
+        }
+      } else {
+        console.log('evaluateInterview APIリクエスト送信');
+        evaluation = await interviewApi.evaluateInterview(messageHistory, currentLanguage);
+      }
+      console.log('評価APIレスポンス受信', evaluation);
       
       // 評価結果を保存
       updateFeedback({ 
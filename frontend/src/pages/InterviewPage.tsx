@@ -13,6 +13,7 @@ import AudioRecorder, { AudioRecorderHandle } from '../components/AudioRecorder'
 import { interviewConfig } from '../config/interview';
 import { interviewApi } from '../services/api';
 import { createAudioWithVolume } from '../utils/audio';
+import { InterviewSessionState, getInterviewSession, setInterviewSession, clearInterviewSession, isSessionNotFound } from '../utils/interviewSession';
 
 const InterviewPage: React.FC = () => {
   const navigate = useNavigate();
@@ -74,37 +75,87 @@ const InterviewPage: React.FC = () => {
     setIsUserScrolling(true);
   };
 
-  const generateQuestion = async (): Promise<string> => {
-    try {
-      const interviewMode = sessionStorage.getItem('interviewMode') || 'general';
-      let response;
-      
-      // 対話履歴をAPI用のフォーマットに変換
-      const messageHistoryForApi = messages.map(msg => ({
-        role: msg.role,
-        content: msg.content,
-      }));
-      
-      // ログ出力（デバッグ用）
-      logToFile('Sending message history to API', { 
-        messageCount: messageHistoryForApi.length,
-        messages: messageHistoryForApi
-      });
+  // 面接モードに応じた面接セッションを作成し、sessionStorageに保存する
+  const startInterviewSession = async (): Promise<InterviewSessionState> => {
+    const interviewMode = sessionStorage.getItem('interviewMode') || 'general';
+    const resume = sessionStorage.getItem('resume') || '';
+    const jobDescription = sessionStorage.getItem('jobDescription') || '';
+    
+    const sessionId = interviewMode === 'personalized' && resume && jobDescription
+      ? await interviewApi.createSession('personalized', resume, jobDescription)
+      : await interviewApi.createSession('general');
+    setInterviewSession(sessionId, 0);
+    return { id: sessionId, syncedCount: 0 };
+  };
+
+  // 旧方式: 対話履歴の全体を送信して質問を生成する（セッションを作成できない場合のフォールバック）
+  const generateQuestionWithFullHistory = async (messageHistoryForApi: { role: string, content: string }[]): Promise<string> => {
+    const interviewMode = sessionStorage.getItem('interviewMode') || 'general';
+    let response;
+    
+    if (interviewMode === 'personalized') {
+      const resume = sessionStorage.getItem('resume') || '';
+      const jobDescription = sessionStorage.getItem('jobDescription') || '';
       
-      if (interviewMode === 'personalized') {
-        const resume = sessionStorage.getItem('resume') || '';
-        const jobDescription = sessionStorage.getItem('jobDescription') || '';
-        
-        if (resume && jobDescription) {
-          response = await interviewApi.generatePersonalizedQuestion(resume, jobDescription, messageHistoryForApi);
-        } else {
-          response = await interviewApi.generateGeneralQuestion(messageHistoryForApi);
-        }
+      if (resume && jobDescription) {
+        response = await interviewApi.generatePersonalizedQuestion(resume, jobDescription, messageHistoryForApi);
       } else {
         response = await interviewApi.generateGeneralQuestion(messageHistoryForApi);
       }
-      
-      return response.question;
+    } else {
+      response = await interviewApi.generateGeneralQuestion(messageHistoryForApi);
+    }
+    
+    return response.question;
+  };
+
+  // 面接セッションに前回の質問以降のメッセージのみを送信して次の質問を生成
+  const generateQuestionFromHistory = async (messagesForApi: any[]): Promise<string> => {
+    // 対話履歴をAPI用のフォーマットに変換
+    const messageHistoryForApi = messagesForApi.map(msg => ({
+      role: msg.role,
+      content: msg.content,
+    }));
+    
+    let session = getInterviewSession();
+    if (!session) {
+      try {
+        session = await startInterviewSession();
+      } catch (error) {
+        logToFile('Falling back to full-history question generation', { error });
+        return generateQuestionWithFullHistory(messageHistoryForApi);
+      }
+    }
+    
+    let newMessages = messageHistoryForApi.slice(session.syncedCount);
+    // ログ出力（デバッグ用）
+    logToFile('Sending new turn to interview session', { 
+      sessionId: session.id,
+      messageCount: messageHistoryForApi.length,
+      newMessageCount: newMessages.length,
+      lastMessage: messageHistoryForApi[messageHistoryForApi.length - 1]
+    });
+    
+    let response;
+    try {
+      response = await interviewApi.generateSessionQuestion(session.id, newMessages);
+    } catch (error) {
+      if (!isSessionNotFound(error)) throw error;
+      // セッションの有効期限切れなどの場合は作り直し、対話履歴の全体を1回だけ送信する
+      logToFile('Interview session not found, recreating', { sessionId: session.id });
+      session = await startInterviewSession();
+      newMessages = messageHistoryForApi;
+      response = await interviewApi.generateSessionQuestion(session.id, newMessages);
+    }
+    
+    // サーバー側の履歴には送信したメッセージと生成された質問が追加される
+    setInterviewSession(session.id, messageHistoryForApi.length + 1);
+    return response.question;
+  };
+
+  const generateQuestion = async (): Promise<string> => {
+    try {
+      return await generateQuestionFromHistory(messages);
     } catch (error) {
       logToFile('Error generating question', { error });
       throw error;
@@ -125,35 +176,7 @@ const InterviewPage: React.FC = () => {
   // APIリクエスト用のメッセージ履歴を生成
   const generateQuestionWithMessages = async (messagesForApi: any[]): Promise<string> => {
     try {
-      const interviewMode = sessionStorage.getItem('interviewMode') || 'general';
-      let response;
-      
-      // 対話履歴をAPI用のフォーマットに変換
-      const messageHistoryForApi = messagesForApi.map(msg => ({
-        role: msg.role,
-        content: msg.content,
-      }));
-      
-      // ログ出力（デバッグ用）
-      logToFile('Generating question with explicit messages', { 
-        messageCount: messageHistoryForApi.length,
-        lastMessage: messageHistoryForApi[messageHistoryForApi.length - 1]
-      });
-      
-      if (interviewMode === 'personalized') {
-        const resume = sessionStorage.getItem('resume') || '';
-        const jobDescription = sessionStorage.getItem('jobDescription') || '';
-        
-        if (resume && jobDescription) {
-          response = await interviewApi.generatePersonalizedQuestion(resume, jobDescription, messageHistoryForApi);
-        } else {
-          response = await interviewApi.generateGeneralQuestion(messageHistoryForApi);
-        }
-      } else {
-        response = await interviewApi.generateGeneralQuestion(messageHistoryForApi);
-      }
-      
-      return response.question;
+      return await generateQuestionFromHistory(messagesForApi);
     } catch (error) {
       logToFile('Error generating question', { error });
       throw error;
@@ -270,6 +293,13 @@ const InterviewPage: React.FC = () => {
     endInterview();
     startInterview();
     
+    // 前回の面接セッションは破棄する（新しいセッションは最初の回答の送信時に作成する）
+    const previousSession = getInterviewSession();
+    if (previousSession) {
+      clearInterviewSession();
+      interviewApi.deleteSession(previousSession.id);
+    }
+    
     // マイク許可を試みる
     try {
       await navigator.mediaDevices.getUserMedia({ audio: true });
@@ -23,6 +23,11 @@ interface QuestionResponse {
   question: string;
 }
 
+// 面接セッション作成レスポンスの型定義
+interface SessionCreateResponse {
+  session_id: string;
+}
+
 // メッセージの型定義
 interface Message {
   role: string;
@@ -80,7 +85,64 @@ interface DetailedFeedbackResponse {
 
 // インタビュー関連のAPI
 export const interviewApi = {
+  // 面接セッションを作成（対話履歴はサーバー側に保存され、以降は新しいターンのみを送信する）
+  async createSession(mode: string, resume?: string, jobDescription?: string): Promise<string> {
+    try {
+      const response = await axios.post<SessionCreateResponse>(
+        `${API_BASE_URL}/api/interview/sessions`,
+        { mode, resume, job_description: jobDescription }
+      );
+      logToFile('Interview session created', { sessionId: response.data.session_id, mode });
+      return response.data.session_id;
+    } catch (error) {
+      logToFile('Error creating interview session', { error });
+      throw error;
+    }
+  },
+
+  // 面接セッションに新しいターン（前回の質問以降のメッセージ）を追加して次の質問を生成
+  async generateSessionQuestion(sessionId: string, newMessages: Message[]): Promise<QuestionResponse> {
+    try {
+      const response = await axios.post<QuestionResponse>(
+        `${API_BASE_URL}/api/interview/sessions/${sessionId}/questions`,
+        { messages: newMessages }
+      );
+      return response.data;
+    } catch (error) {
+      logToFile('Error generating session question', { error, sessionId });
+      throw error;
+    }
+  },
+
+  // 面接セッションの対話履歴を評価（まだ保存されていないメッセージがあれば一緒に送信する）
+  async evaluateSession(sessionId: string, newMessages: Message[] = [], language: string = "en"): Promise<EvaluationResponse> {
+    try {
+      logToFile('Requesting session evaluation', { sessionId, newMessageCount: newMessages.length, language });
+      
+      const response = await axios.post<EvaluationResponse>(
+        `${API_BASE_URL}/api/interview/sessions/${sessionId}/evaluation`,
+        { messages: newMessages, language }
+      );
+      
+      logToFile('Session evaluation received successfully');
+      return response.data;
+    } catch (error) {
+      logToFile('Error evaluating interview session', { error, sessionId });
+      throw error;
+    }
+  },
+
+  // 面接セッションを削除
+  async deleteSession(sessionId: string): Promise<void> {
+    try {
+      await axios.delete(`${API_BASE_URL}/api/interview/sessions/${sessionId}`);
+    } catch (error) {
+      logToFile('Error deleting interview session', { error, sessionId });
+    }
+  },
+
   // 一般的な質問を生成
+  // 旧方式: 毎回対話履歴の全体を送信する（セッションを作成できない場合のフォールバック）
   async generateGeneralQuestion(messageHistory: Message[] = []): Promise<QuestionResponse> {
     try {
       const response = await axios.post<QuestionResponse>(
@@ -95,6 +157,7 @@ export const interviewApi = {
   },
 
   // パーソナライズされた質問を生成
+  // 旧方式: 毎回対話履歴の全体を送信する（セッションを作成できない場合のフォールバック）
   async generatePersonalizedQuestion(
     resume: string,
     jobDescription: string,
@@ -180,6 +243,7 @@ export const interviewApi = {
   },
 
   // 面接の評価を取得
+  // 旧方式: 対話履歴の全体を送信する（セッションがない・期限切れの場合のフォールバック）
   async evaluateInterview(messageHistory: Message[], language: string = "en"): Promise<EvaluationResponse> {
     try {
       logToFile('Requesting interview evaluation', { messageHistoryLength: messageHistory.length, language });
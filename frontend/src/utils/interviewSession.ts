@@ -0,0 +1,33 @@
+// 面接セッション（対話履歴をサーバー側に保存する）の状態をsessionStorageで管理するユーティリティ
+import axios from 'axios';
+
+const SESSION_ID_KEY = 'interviewSessionId';
+const SYNCED_COUNT_KEY = 'interviewSessionSyncedCount';
+
+export interface InterviewSessionState {
+  id: string;
+  // サーバー側の履歴に保存済みのメッセージ数（以降のメッセージのみを送信する）
+  syncedCount: number;
+}
+
+export function getInterviewSession(): InterviewSessionState | null {
+  const id = sessionStorage.getItem(SESSION_ID_KEY);
+  if (!id) return null;
+  const syncedCount = Number(sessionStorage.getItem(SYNCED_COUNT_KEY) || '0');
+  return { id, syncedCount: Number.isFinite(syncedCount) ? syncedCount : 0 };
+}
+
+export function setInterviewSession(id: string, syncedCount: number): void {
+  sessionStorage.setItem(SESSION_ID_KEY, id);
+  sessionStorage.setItem(SYNCED_COUNT_KEY, String(syncedCount));
+}
+
+export function clearInterviewSession(): void {
+  sessionStorage.removeItem(SESSION_ID_KEY);
+  sessionStorage.removeItem(SYNCED_COUNT_KEY);
+}
+
+// セッションの有効期限切れ・サーバーの再起動などでセッションが見つからないか
+export function isSessionNotFound(error: unknown): boolean {
+  return axios.isAxiosError(error) && error.response?.status === 404;
+}
@@ -4,6 +4,56 @@ import axios from 'axios';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
 
+// ログはまとめて /api/logs/batch へ送信する
+const LOG_BATCH_SIZE = 20;
+const LOG_FLUSH_INTERVAL_MS = 2000;
+
+interface LogEntry {
+  timestamp: string;
+  userId: string;
+  message: string;
+  data?: any;
+}
+
+let logBuffer: LogEntry[] = [];
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+
+const flushLogs = (keepalive = false) => {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  if (logBuffer.length === 0) return;
+
+  const entries = logBuffer;
+  logBuffer = [];
+
+  if (keepalive) {
+    // ページ離脱時はリクエストが中断されないようkeepaliveで送信
+    fetch(`${API_BASE_URL}/api/logs/batch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(entries),
+      keepalive: true
+    }).catch(err => {
+      console.warn('ログAPI送信エラー', err);
+    });
+    return;
+  }
+
+  axios.post(`${API_BASE_URL}/api/logs/batch`, entries)
+    .catch(err => {
+      console.warn('ログAPI送信エラー', err);
+    });
+};
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', () => flushLogs(true));
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushLogs(true);
+  });
+}
+
 export const logToFile = (message: string, data?: any) => {
   const timestamp = new Date().toISOString();
   const userId = getOrCreateUserId();
@@ -17,9 +67,11 @@ export const logToFile = (message: string, data?: any) => {
   // 開発環境でのデバッグ用にコンソールに出力
   console.log('Log Entry:', logEntry);
 
-  // バックエンドAPIへも送信
-  axios.post(`${API_BASE_URL}/api/logs`, logEntry)
-    .catch(err => {
-      console.warn('ログAPI送信エラー', err);
-    });
-};
\ No newline at end of file
+  // バックエンドAPIへはまとめて送信
+  logBuffer.push(logEntry);
+  if (logBuffer.length >= LOG_BATCH_SIZE) {
+    flushLogs();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(() => flushLogs(), LOG_FLUSH_INTERVAL_MS);
+  }
+};